@@ -0,0 +1,207 @@
+"""
+Agent loop engine
+Drives one user turn: completion -> tool round -> completion ... until the
+model answers or the step/time/token budget runs out.
+
+Nothing here touches Streamlit. Tool calls run on worker threads that have no
+script context, so callers resolve the LlamaStack URL and client up front and
+pass in plain callables; UI rendering happens in the callbacks app.py supplies.
+"""
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Max tool calls executed at once within a single assistant turn
+TOOL_CONCURRENCY = int(os.getenv("TOOL_CONCURRENCY", "4"))
+# Overall wall-clock budget for all tool calls of one turn
+TOOL_TURN_DEADLINE = float(os.getenv("TOOL_TURN_DEADLINE_SECONDS", "90"))
+
+# Budget for one user turn of the agent loop (0 disables a limit)
+AGENT_MAX_STEPS = int(os.getenv("AGENT_MAX_STEPS", "5"))
+AGENT_MAX_SECONDS = float(os.getenv("AGENT_MAX_SECONDS", "180"))
+AGENT_MAX_TOKENS = int(os.getenv("AGENT_MAX_TOKENS", "32000"))
+
+
+def parse_tool_call(tool_call: Dict) -> Tuple[str, Dict]:
+    """Return (tool_name, tool_args) from an OpenAI-format tool call."""
+    func = tool_call.get("function", {})
+    tool_name = func.get("name", "")
+    try:
+        tool_args = json.loads(func.get("arguments") or "{}")
+    except (json.JSONDecodeError, TypeError):
+        tool_args = {}
+    return tool_name, tool_args
+
+
+def dispatch_tool_calls(tool_calls: List[Dict], execute: Callable[[str, Dict], str],
+                        max_workers: int = TOOL_CONCURRENCY,
+                        deadline: float = TOOL_TURN_DEADLINE) -> List[str]:
+    """Execute tool calls concurrently and return their results in call order.
+
+    At most ``max_workers`` calls run at once. Calls still running when the
+    turn ``deadline`` expires are abandoned and reported as timed out, so the
+    follow-up completion still gets one tool message per tool_call_id.
+    """
+    if not tool_calls:
+        return []
+
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(tool_calls))),
+        thread_name_prefix="tool-call"
+    )
+    try:
+        futures = [
+            executor.submit(execute, *parse_tool_call(tool_call))
+            for tool_call in tool_calls
+        ]
+        wait(futures, timeout=deadline)
+
+        results = []
+        for future, tool_call in zip(futures, tool_calls):
+            if future.done():
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append(f"Tool execution error: {str(e)}")
+            else:
+                future.cancel()
+                tool_name, _ = parse_tool_call(tool_call)
+                results.append(f"Tool execution error: {tool_name} did not finish within {deadline:g}s")
+        return results
+    finally:
+        # Don't block the turn on calls that overran the deadline
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) when no usage is reported."""
+    return len(text) // 4 + 1 if text else 0
+
+
+def response_tokens(response: Dict, messages: List[Dict]) -> int:
+    """Tokens consumed by one completion, from its usage block or an estimate."""
+    usage = response.get("usage") or {}
+    if usage.get("total_tokens"):
+        return usage["total_tokens"]
+    message = (response.get("choices") or [{}])[0].get("message", {})
+    return estimate_tokens(json.dumps(messages)) + estimate_tokens(json.dumps(message))
+
+
+class AgentBudget:
+    """Limits on tool rounds, wall-clock time and tokens for one user turn."""
+
+    def __init__(self, max_steps: int = AGENT_MAX_STEPS, max_seconds: float = AGENT_MAX_SECONDS,
+                 max_tokens: int = AGENT_MAX_TOKENS):
+        self.max_steps = max_steps
+        self.max_seconds = max_seconds
+        self.max_tokens = max_tokens
+
+    def exhausted(self, tool_rounds: int, elapsed: float, tokens: int) -> Optional[str]:
+        """Return why the budget is spent, or None if another tool round fits."""
+        if self.max_steps and tool_rounds >= self.max_steps:
+            return "step budget"
+        if self.max_seconds and elapsed >= self.max_seconds:
+            return "time budget"
+        if self.max_tokens and tokens >= self.max_tokens:
+            return "token budget"
+        return None
+
+
+def run_agent_loop(messages: List[Dict], tools: Optional[List[Dict]],
+                   complete: Callable[..., Dict],
+                   execute: Callable[[List[Dict]], List[str]],
+                   budget: AgentBudget = None,
+                   on_tool_calls: Callable[[int, List[Tuple[str, Dict]]], None] = None,
+                   on_tool_results: Callable[[int, List[Tuple[str, Dict]], List[str]], None] = None) -> Dict:
+    """Run tool rounds until the model answers or the budget is exhausted.
+
+    ``complete(messages, tools, tool_choice, step)`` returns a chat completion
+    response and ``execute(tool_calls)`` returns one result per tool call.
+    ``messages`` is extended in place with each assistant tool_calls message
+    and its tool results. Once the budget is spent (or the model repeats the
+    exact same calls) one last completion runs with tool_choice="none" so the
+    model has to answer from what it already has.
+
+    Returns a dict with "content" (or "error"), the final "response",
+    "stop_reason" and per-step "steps" latency/token accounting.
+    """
+    budget = budget or AgentBudget()
+    started = time.monotonic()
+    steps = []
+    tokens_used = 0
+    tool_rounds = 0
+    previous_calls = None
+    stop_reason = "answered"
+    tool_choice = "auto" if tools else None
+
+    while True:
+        step = len(steps) + 1
+        step_started = time.monotonic()
+        response = complete(messages, tools, tool_choice, step)
+        record = {
+            "step": step,
+            "llm_seconds": time.monotonic() - step_started,
+            "tool_seconds": 0.0,
+            "tool_calls": 0,
+            "tokens": response_tokens(response, messages),
+        }
+        steps.append(record)
+        tokens_used += record["tokens"]
+
+        if "error" in response:
+            return {"error": response["error"], "response": response,
+                    "stop_reason": "error", "steps": steps}
+
+        message = (response.get("choices") or [{}])[0].get("message", {})
+        tool_calls = message.get("tool_calls") if tool_choice == "auto" else None
+        if not tool_calls:
+            return {"content": message.get("content") or "", "response": response,
+                    "stop_reason": stop_reason, "steps": steps}
+
+        calls = [parse_tool_call(tool_call) for tool_call in tool_calls]
+        signature = json.dumps(calls, sort_keys=True)
+        if signature == previous_calls:
+            # The model is looping on the same request; make it answer instead
+            stop_reason = "repeated tool calls"
+            tool_choice = "none"
+            continue
+        previous_calls = signature
+
+        if on_tool_calls:
+            on_tool_calls(step, calls)
+        tools_started = time.monotonic()
+        results = execute(tool_calls)
+        record["tool_seconds"] = time.monotonic() - tools_started
+        record["tool_calls"] = len(calls)
+        tool_rounds += 1
+        if on_tool_results:
+            on_tool_results(step, calls, results)
+
+        messages.append({
+            "role": "assistant",
+            "content": message.get("content"),
+            "tool_calls": tool_calls
+        })
+        for tool_call, result in zip(tool_calls, results):
+            messages.append({
+                "role": "tool",
+                "tool_call_id": tool_call.get("id", ""),
+                "content": result
+            })
+
+        exhausted = budget.exhausted(tool_rounds, time.monotonic() - started, tokens_used)
+        if exhausted:
+            stop_reason = exhausted
+            tool_choice = "none"
+
+
+def summarize_steps(steps: List[Dict]) -> str:
+    """One-line latency summary of an agent turn for display."""
+    llm_seconds = sum(s["llm_seconds"] for s in steps)
+    tool_seconds = sum(s["tool_seconds"] for s in steps)
+    tool_rounds = len([s for s in steps if s["tool_calls"]])
+    tokens = sum(s["tokens"] for s in steps)
+    return (f"⏱️ {tool_rounds} tool round{'s' if tool_rounds != 1 else ''} · "
+            f"LLM {llm_seconds:.1f}s · tools {tool_seconds:.1f}s · ~{tokens:,} tokens")
@@ -4,15 +4,42 @@ Enhanced interface supporting multiple MCP servers with dynamic management
 MCP servers are auto-detected from LlamaStack's configured toolgroups
 """
 import streamlit as st
-import requests
-import json
 import os
+import time
+import uuid
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+from catalog import CatalogCache, MCP_SERVER_METADATA, select_tools
+from conversations import create_conversation_store, new_conversation_id
+from history import build_api_messages
+from llamastack_client import LlamaStackClient
+from metrics import MetricsRegistry, start_metrics_server
+from poller import CatalogPoller, CATALOG_POLL_SECONDS
+from prefetch import SPECULATIVE_TOOLS, StationDirectory, predict_tool_calls
+from session_store import SessionStore
+from tool_cache import ToolResultCache
+from transcript import message_html, split_transcript, tool_call_html, tool_result_html
+from turns import ChatTurn, create_turn_executor, start_turn, turn_transcript
 
 # Configuration from environment or defaults
 DEFAULT_LLAMASTACK_URL = os.getenv("LLAMASTACK_URL", "http://localhost:8321")
 DEFAULT_MODEL_ID = os.getenv("MODEL_ID", "")  # Will be auto-detected if empty
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "true").lower() == "true"
+# How often a running chat turn is polled for progress
+TURN_POLL_SECONDS = float(os.getenv("TURN_POLL_SECONDS", "0.5"))
+# Within a poll, how often newly streamed tokens are pushed to the page
+TURN_STREAM_REFRESH_SECONDS = float(os.getenv("TURN_STREAM_REFRESH_SECONDS", "0.05"))
+# First paint (page shell rendered) above this many seconds is logged as over budget
+FIRST_PAINT_BUDGET_SECONDS = float(os.getenv("FIRST_PAINT_BUDGET_SECONDS", "1.0"))
+# Status polling interval until the first LlamaStack snapshot has arrived
+STARTUP_POLL_SECONDS = 1.0
+# Theme stylesheet, served by Streamlit static serving when it is enabled
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+# Start of this script run, for frontend_render_seconds
+RUN_STARTED = time.monotonic()
 
 def get_llamastack_url() -> str:
     """Get the current LlamaStack URL from session state or default."""
@@ -26,49 +53,81 @@ def get_model_id() -> str:
         return st.session_state.selected_model_id
     return DEFAULT_MODEL_ID
 
-# MCP Server metadata for display (icon, description)
-MCP_SERVER_METADATA = {
-    "mcp::weather-data": {
-        "name": "Weather",
-        "icon": "🌤️",
-        "description": "Weather data via OpenWeatherMap API"
-    },
-    "mcp::hr-tools": {
-        "name": "HR Tools",
-        "icon": "👥",
-        "description": "Employee info, vacation, job openings"
-    },
-    "mcp::jira-confluence": {
-        "name": "Jira/Confluence",
-        "icon": "📋",
-        "description": "Issue tracking and documentation"
-    },
-    "mcp::github-tools": {
-        "name": "GitHub",
-        "icon": "🐙",
-        "description": "Repository search, issues, code search"
-    },
-    "builtin::rag": {
-        "name": "RAG",
-        "icon": "🔍",
-        "description": "Built-in retrieval augmented generation"
-    }
-}
-
-def get_available_models() -> List[Dict]:
-    """Fetch available models from LlamaStack."""
-    try:
-        url = get_llamastack_url()
-        response = requests.get(f"{url}/v1/models", timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            # Filter to only LLM models (not embeddings)
-            return [m for m in data.get("data", []) if m.get("model_type") == "llm"]
-    except:
-        pass
-    return []
-
-def get_default_model_id() -> str:
+@st.cache_resource
+def get_metrics() -> MetricsRegistry:
+    """Process-wide latency metrics, also served to Prometheus on METRICS_PORT."""
+    registry = MetricsRegistry()
+    start_metrics_server(registry)
+    return registry
+
+@st.cache_resource
+def get_llamastack_client() -> LlamaStackClient:
+    """Process-wide pooled LlamaStack client, shared across reruns and sessions."""
+    return LlamaStackClient(metrics=get_metrics())
+
+@st.cache_resource
+def get_catalog_cache() -> CatalogCache:
+    """Process-wide TTL cache of model/tool catalogs, keyed by LlamaStack URL."""
+    return CatalogCache(get_llamastack_client())
+
+@st.cache_resource
+def get_catalog_poller() -> CatalogPoller:
+    """Process-wide background poller of LlamaStack health and catalogs.
+    
+    A changed tool catalog (an MCP server added, removed or redeployed) drops
+    the tool results cached for that LlamaStack URL.
+    """
+    return CatalogPoller(get_llamastack_client(), get_catalog_cache(),
+                         on_catalog_change=get_tool_cache().invalidate)
+
+@st.cache_resource
+def get_tool_cache() -> ToolResultCache:
+    """Process-wide cache of read-only tool results, shared by all sessions."""
+    return ToolResultCache()
+
+@st.cache_resource
+def get_station_directory() -> StationDirectory:
+    """Process-wide station codes and names for prefetch, loaded from list_stations."""
+    return StationDirectory()
+
+@st.cache_resource
+def get_session_store() -> SessionStore:
+    """Process-wide store bounding the memory each session's transcript holds."""
+    return SessionStore()
+
+@st.cache_resource
+def get_conversation_store():
+    """Process-wide persistent conversation store (None when CONVERSATION_STORE=none)."""
+    return create_conversation_store()
+
+@st.cache_resource
+def get_turn_executor() -> ThreadPoolExecutor:
+    """Process-wide worker pool that runs chat turns off the script thread."""
+    return create_turn_executor()
+
+@st.cache_resource
+def load_css() -> str:
+    """Theme stylesheet, read from disk once per process."""
+    with open(os.path.join(STATIC_DIR, "app.css")) as f:
+        return f.read()
+
+def inject_css():
+    """Link the cached theme stylesheet, or inline it without static serving."""
+    if st.get_option("server.enableStaticServing"):
+        base_path = st.get_option("server.baseUrlPath").strip("/")
+        href = f"/{base_path}/app/static/app.css" if base_path else "/app/static/app.css"
+        st.markdown(f'<link rel="stylesheet" href="{href}">', unsafe_allow_html=True)
+    else:
+        st.markdown(f"<style>\n{load_css()}\n</style>", unsafe_allow_html=True)
+
+def get_available_models(wait: bool = True) -> Optional[List[Dict]]:
+    """Fetch available models from LlamaStack (cached per URL).
+    
+    With wait=False returns None while the catalog is still loading.
+    """
+    return get_catalog_cache().get_models(get_llamastack_url(), wait=wait)
+
+def get_default_model_id(wait: bool = True) -> str:
     """Get the default model ID - either from session state, env, or auto-detect."""
     # Check session state first
     if "selected_model_id" in st.session_state and st.session_state.selected_model_id:
@@ -79,7 +138,7 @@ def get_default_model_id() -> str:
         return DEFAULT_MODEL_ID
     
     # Auto-detect from LlamaStack
-    models = get_available_models()
+    models = get_available_models(wait)
     if models:
         # Prefer the first LLM model
         model_id = models[0].get("identifier", "")
@@ -90,48 +149,8 @@ def get_default_model_id() -> str:
     return "llama-32-3b-instruct"
 
 def get_available_tools() -> List[Dict]:
-    """Fetch available MCP tools from LlamaStack."""
-    try:
-        url = get_llamastack_url()
-        response = requests.get(f"{url}/v1/tools", timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            if isinstance(data, list):
-                return data
-            return data.get("data", [])
-    except Exception as e:
-        pass
-    return []
-
-def extract_mcp_servers_from_tools(tools: List[Dict]) -> List[Dict]:
-    """Extract unique MCP servers from the tools list."""
-    toolgroups = set()
-    for tool in tools:
-        toolgroup_id = tool.get("toolgroup_id", "")
-        if toolgroup_id:
-            toolgroups.add(toolgroup_id)
-    
-    servers = []
-    for tg in sorted(toolgroups):
-        metadata = MCP_SERVER_METADATA.get(tg, {
-            "name": tg.replace("mcp::", "").replace("::", " ").title(),
-            "icon": "🔧",
-            "description": f"Tools from {tg}"
-        })
-        
-        # Count tools in this group
-        tool_count = len([t for t in tools if t.get("toolgroup_id") == tg])
-        
-        servers.append({
-            "toolgroup_id": tg,
-            "name": metadata["name"],
-            "icon": metadata["icon"],
-            "description": f"{metadata['description']} ({tool_count} tools)",
-            "tool_count": tool_count,
-            "enabled": True
-        })
-    
-    return servers
+    """Fetch available MCP tools from LlamaStack (cached per URL)."""
+    return get_catalog_cache().get_tools(get_llamastack_url())
 
 # UI Customization
 APP_TITLE = os.getenv("APP_TITLE", "LlamaStack Multi-MCP Demo")
@@ -149,251 +168,15 @@ st.set_page_config(
 )
 
 # Custom CSS for modern dark theme
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&family=JetBrains+Mono:wght@400;500&display=swap');
-    
-    :root {
-        --primary: #8b5cf6;
-        --primary-light: #a78bfa;
-        --secondary: #10b981;
-        --accent: #f59e0b;
-        --danger: #ef4444;
-        --background: #0f172a;
-        --surface: #1e293b;
-        --surface-light: #334155;
-        --text: #f1f5f9;
-        --text-muted: #94a3b8;
-        --border: #475569;
-    }
-    
-    .stApp {
-        font-family: 'Inter', sans-serif;
-    }
-    
-    /* Header */
-    .main-header {
-        background: linear-gradient(135deg, #6366f1 0%, #8b5cf6 50%, #a855f7 100%);
-        padding: 1.5rem 2rem;
-        border-radius: 16px;
-        margin-bottom: 1.5rem;
-        box-shadow: 0 4px 20px rgba(99, 102, 241, 0.3);
-    }
-    
-    .main-header h1 {
-        color: white;
-        font-weight: 700;
-        margin: 0;
-        font-size: 1.8rem;
-    }
-    
-    .main-header p {
-        color: rgba(255,255,255,0.85);
-        margin: 0.5rem 0 0 0;
-    }
-    
-    /* MCP Server Cards */
-    .mcp-server-card {
-        background: linear-gradient(145deg, #1e293b 0%, #0f172a 100%);
-        border: 1px solid #334155;
-        border-radius: 12px;
-        padding: 1rem;
-        margin: 0.5rem 0;
-        transition: all 0.2s ease;
-    }
-    
-    .mcp-server-card:hover {
-        border-color: #8b5cf6;
-        box-shadow: 0 0 15px rgba(139, 92, 246, 0.2);
-    }
-    
-    .mcp-server-card.enabled {
-        border-left: 3px solid #10b981;
-    }
-    
-    .mcp-server-card.disabled {
-        border-left: 3px solid #475569;
-        opacity: 0.7;
-    }
-    
-    .mcp-server-header {
-        display: flex;
-        align-items: center;
-        gap: 0.5rem;
-        margin-bottom: 0.5rem;
-    }
-    
-    .mcp-server-icon {
-        font-size: 1.5rem;
-    }
-    
-    .mcp-server-name {
-        font-weight: 600;
-        color: #f1f5f9;
-    }
-    
-    .mcp-server-desc {
-        font-size: 0.8rem;
-        color: #94a3b8;
-    }
-    
-    /* Status badges */
-    .status-badge {
-        display: inline-flex;
-        align-items: center;
-        gap: 0.3rem;
-        padding: 0.2rem 0.6rem;
-        border-radius: 12px;
-        font-size: 0.7rem;
-        font-weight: 600;
-    }
-    
-    .status-badge.online {
-        background: rgba(16, 185, 129, 0.2);
-        color: #10b981;
-        border: 1px solid #10b981;
-    }
-    
-    .status-badge.offline {
-        background: rgba(239, 68, 68, 0.2);
-        color: #ef4444;
-        border: 1px solid #ef4444;
-    }
-    
-    .status-badge.checking {
-        background: rgba(245, 158, 11, 0.2);
-        color: #f59e0b;
-        border: 1px solid #f59e0b;
-    }
-    
-    /* Tool call styling */
-    .tool-call-box {
-        background: linear-gradient(135deg, #064e3b 0%, #022c22 100%);
-        border: 1px solid #10b981;
-        border-radius: 10px;
-        padding: 1rem;
-        margin: 0.75rem 0;
-        font-family: 'JetBrains Mono', monospace;
-        font-size: 0.8rem;
-    }
-    
-    .tool-call-header {
-        color: #10b981;
-        font-weight: 600;
-        margin-bottom: 0.5rem;
-        display: flex;
-        align-items: center;
-        gap: 0.5rem;
-    }
-    
-    .tool-call-content {
-        color: #a7f3d0;
-        white-space: pre-wrap;
-        overflow-x: auto;
-    }
-    
-    /* Tool result styling */
-    .tool-result-box {
-        background: linear-gradient(135deg, #1e3a5f 0%, #0f172a 100%);
-        border: 1px solid #3b82f6;
-        border-radius: 10px;
-        padding: 1rem;
-        margin: 0.75rem 0;
-        font-family: 'JetBrains Mono', monospace;
-        font-size: 0.8rem;
-    }
-    
-    .tool-result-header {
-        color: #60a5fa;
-        font-weight: 600;
-        margin-bottom: 0.5rem;
-    }
-    
-    .tool-result-content {
-        color: #bfdbfe;
-        white-space: pre-wrap;
-        overflow-x: auto;
-        max-height: 300px;
-        overflow-y: auto;
-    }
-    
-    /* Architecture diagram */
-    .architecture-container {
-        background: linear-gradient(145deg, #1e293b 0%, #0f172a 100%);
-        border: 1px solid #334155;
-        border-radius: 12px;
-        padding: 1.5rem;
-        margin: 1rem 0;
-    }
-    
-    .flow-diagram {
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        gap: 0.5rem;
-        flex-wrap: wrap;
-        padding: 1rem;
-    }
-    
-    .flow-box {
-        background: linear-gradient(135deg, #334155, #1e293b);
-        border: 2px solid #6366f1;
-        border-radius: 10px;
-        padding: 0.75rem 1rem;
-        color: #f1f5f9;
-        font-weight: 600;
-        font-size: 0.85rem;
-        text-align: center;
-        min-width: 100px;
-    }
-    
-    .flow-box.mcp {
-        border-color: #10b981;
-        background: linear-gradient(135deg, #064e3b, #0f172a);
-    }
-    
-    .flow-box.llm {
-        border-color: #f59e0b;
-        background: linear-gradient(135deg, #451a03, #0f172a);
-    }
-    
-    .flow-arrow {
-        color: #6366f1;
-        font-size: 1.2rem;
-        font-weight: bold;
-    }
-    
-    /* Metrics */
-    .metrics-container {
-        display: flex;
-        gap: 1rem;
-        margin: 1rem 0;
-    }
-    
-    .metric-card {
-        flex: 1;
-        background: #1e293b;
-        border-radius: 10px;
-        padding: 1rem;
-        text-align: center;
-        border: 1px solid #334155;
-    }
-    
-    .metric-value {
-        font-size: 1.5rem;
-        font-weight: 700;
-        color: #8b5cf6;
-    }
-    
-    .metric-label {
-        font-size: 0.75rem;
-        color: #94a3b8;
-        text-transform: uppercase;
-    }
-</style>
-""", unsafe_allow_html=True)
+inject_css()
 
 # Initialize session state
+if "conversation_id" not in st.session_state:
+    # Resume the conversation named in the URL (reconnects, pod restarts)
+    st.session_state.conversation_id = st.query_params.get("conversation") or new_conversation_id()
+    st.query_params["conversation"] = st.session_state.conversation_id
+    # Loaded once the page shell has painted, so a slow store cannot hold it back
+    st.session_state.conversation_pending = True
 if "messages" not in st.session_state:
     st.session_state.messages = []
 if "mcp_servers" not in st.session_state:
@@ -404,105 +187,148 @@ if "llamastack_status" not in st.session_state:
     st.session_state.llamastack_status = "unknown"
 if "tool_calls_count" not in st.session_state:
     st.session_state.tool_calls_count = 0
+if "active_turn" not in st.session_state:
+    st.session_state.active_turn = None
+if "snapshot_seen" not in st.session_state:
+    st.session_state.snapshot_seen = None
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
-
-def check_llamastack_health() -> bool:
-    """Check if LlamaStack is healthy."""
-    try:
-        url = get_llamastack_url()
-        response = requests.get(f"{url}/v1/health", timeout=5)
-        return response.status_code == 200
-    except:
-        return False
+if get_session_store().touch(st.session_state.session_id, st.session_state.messages):
+    # Trimmed while idle: handled once the page shell has painted
+    st.session_state.conversation_compacted = True
 
 
-def refresh_tools_and_servers():
-    """Refresh tools and extract MCP servers from them."""
-    tools = get_available_tools()
+def check_llamastack_health() -> bool:
+    """Check if LlamaStack is healthy (polled now instead of waiting for the poller)."""
+    return get_catalog_poller().poll_now(get_llamastack_url(), refetch=False)["healthy"]
+
+
+def refresh_tools_and_servers(force: bool = False):
+    """Refresh tools and extract MCP servers from them.
+    
+    With force=True LlamaStack is polled right away so the tools are
+    re-fetched rather than served from the shared cache, and cached tool
+    results for this URL are dropped.
+    """
+    cache = get_catalog_cache()
+    url = get_llamastack_url()
+    if force:
+        get_catalog_poller().poll_now(url)
+        get_tool_cache().invalidate(url)
+    tools = cache.get_tools(url)
+    enabled = {s["toolgroup_id"]: s.get("enabled", True) for s in st.session_state.mcp_servers}
+    servers = cache.get_servers(url)
+    for server in servers:
+        server["enabled"] = enabled.get(server["toolgroup_id"], server.get("enabled", True))
     st.session_state.mcp_tools = tools
-    st.session_state.mcp_servers = extract_mcp_servers_from_tools(tools)
+    st.session_state.mcp_servers = servers
     return tools
 
 
-def chat_completion_openai(messages: List[Dict], tools: List[Dict] = None) -> Dict:
-    """Send chat completion request using OpenAI-compatible endpoint."""
-    payload = {
-        "model": get_default_model_id(),
-        "messages": messages,
-        "temperature": 0.7,
-        "max_tokens": 4096,
-    }
+def sync_llamastack_snapshot() -> bool:
+    """Adopt the poller's latest snapshot; returns True if anything changed.
     
-    if tools:
-        payload["tools"] = tools
-        payload["tool_choice"] = "auto"
+    Updates the status badge and, when the tool catalog changed, this
+    session's tools and servers (keeping its enabled toggles), with a toast
+    for MCP servers that appeared or went away.
+    """
+    url = get_llamastack_url()
+    poller = get_catalog_poller()
+    poller.watch(url)
+    snapshot = poller.snapshot(url)
+    seen = st.session_state.snapshot_seen
+    if snapshot is None or seen == (url, snapshot["version"], snapshot["catalog_version"]):
+        return False
     
-    try:
-        url = get_llamastack_url()
-        response = requests.post(
-            f"{url}/v1/openai/v1/chat/completions",
-            json=payload,
-            timeout=120
-        )
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        return {"error": str(e)}
-
-
-def format_tools_for_openai(mcp_tools: List[Dict]) -> List[Dict]:
-    """Convert MCP tools to OpenAI function calling format."""
-    openai_tools = []
-    for tool in mcp_tools:
-        openai_tool = {
-            "type": "function",
-            "function": {
-                "name": tool.get("name", tool.get("identifier", "")),
-                "description": tool.get("description", ""),
-                "parameters": tool.get("parameters", tool.get("parameter_definitions", {
-                    "type": "object",
-                    "properties": {},
-                    "required": []
-                }))
-            }
-        }
-        openai_tools.append(openai_tool)
-    return openai_tools
-
-
-def execute_tool_call(tool_name: str, tool_args: Dict) -> str:
-    """Execute a tool call via LlamaStack."""
-    try:
-        url = get_llamastack_url()
-        response = requests.post(
-            f"{url}/v1/tool-runtime/invoke",
-            json={
-                "tool_name": tool_name,
-                "kwargs": tool_args
-            },
-            timeout=60
+    st.session_state.llamastack_status = "online" if snapshot["healthy"] else "offline"
+    if seen is None or seen[0] != url or seen[2] != snapshot["catalog_version"]:
+        known = {s["toolgroup_id"] for s in st.session_state.mcp_servers}
+        refresh_tools_and_servers()
+        if seen is not None and seen[0] == url:
+            for toolgroup_id in sorted(set(snapshot["toolgroups"]) - known):
+                st.toast(f"🔌 New MCP server available: {toolgroup_id}")
+            for toolgroup_id in sorted(known - set(snapshot["toolgroups"])):
+                st.toast(f"🔌 MCP server removed: {toolgroup_id}")
+    st.session_state.snapshot_seen = (url, snapshot["version"], snapshot["catalog_version"])
+    return True
+
+
+def make_tool_executor() -> Callable[[str, Dict], str]:
+    """Build the tool executor for a turn, bound to this session's URL and tools.
+    
+    The returned callable runs on worker threads, so everything it needs from
+    st.session_state is captured here. Read-only tools on the cache allowlist
+    are answered from the shared tool result cache when possible.
+    """
+    client = get_llamastack_client()
+    tool_cache = get_tool_cache()
+    url = get_llamastack_url()
+    toolgroups = {t.get("name", t.get("identifier", "")): t.get("toolgroup_id", "") for t in st.session_state.mcp_tools}
+    
+    def execute(tool_name: str, tool_args: Dict) -> str:
+        return tool_cache.call(
+            url, toolgroups.get(tool_name, ""), tool_name, tool_args,
+            lambda: client.invoke_tool(url, tool_name, tool_args)
         )
-        response.raise_for_status()
-        result = response.json()
-        
-        if isinstance(result, dict):
-            content = result.get("content", result)
-            if isinstance(content, list):
-                return "\n".join(
-                    item.get("text", json.dumps(item)) if isinstance(item, dict) else str(item)
-                    for item in content
-                )
-            elif isinstance(content, dict):
-                return json.dumps(content, indent=2)
-            return str(content)
-        elif isinstance(result, list):
-            return "\n".join(
-                item.get("text", json.dumps(item)) if isinstance(item, dict) else str(item)
-                for item in result
-            )
-        return str(result)
-    except Exception as e:
-        return f"Tool execution error: {str(e)}"
+    
+    return execute
+
+
+def make_turn_recorder(save: bool = True) -> Callable[[ChatTurn], List[Dict]]:
+    """Build the callback that turns a settled turn into saved transcript entries.
+    
+    It usually runs on the worker thread the moment the turn completes, so
+    everything it needs from st.session_state is captured here. With
+    save=False (an earlier entry such as the prompt is still unsaved) the
+    worker leaves saving to the session, which appends entries in transcript
+    order; saving the answer first would number it before its prompt.
+    """
+    conversation_store = get_conversation_store() if save else None
+    conversation_id = st.session_state.conversation_id
+    session_store = get_session_store()
+    session_id = st.session_state.session_id
+    metrics = get_metrics()
+    
+    def record(turn: ChatTurn) -> List[Dict]:
+        entries = turn_transcript(turn, session_store, session_id)
+        metrics.observe("frontend_turn_seconds", turn.elapsed(), stop_reason=turn.result().get("stop_reason", ""))
+        if conversation_store is not None:
+            try:
+                conversation_store.append(conversation_id, entries)
+            except Exception as e:
+                # The session retries entries without a "seq" after its next turn
+                print(f"⚠️ Could not save conversation {conversation_id}: {e}")
+        return entries
+    
+    return record
+
+
+def get_station_aliases() -> Dict[str, str]:
+    """Station codes and place names the weather server knows (empty while loading)."""
+    if not any(t.get("name", t.get("identifier")) == "list_stations" for t in st.session_state.mcp_tools):
+        return {}
+    return get_station_directory().aliases(get_llamastack_url(), make_tool_executor())
+
+
+def start_chat_turn(api_messages: List[Dict], tools: Optional[List[Dict]],
+                    prefetch: List = (), save: bool = True) -> ChatTurn:
+    """Run the agent loop for this prompt on the shared turn executor.
+
+    save=False keeps the worker from saving the answer (see make_turn_recorder).
+    """
+    return start_turn(
+        get_turn_executor(),
+        ChatTurn(record=make_turn_recorder(save)),
+        client=get_llamastack_client(),
+        base_url=get_llamastack_url(),
+        model_id=get_default_model_id(),
+        api_messages=api_messages,
+        tools=tools,
+        execute_tool=make_tool_executor(),
+        stream=STREAM_RESPONSES,
+        prefetch=prefetch
+    )
 
 
 def toggle_mcp_server(index: int):
@@ -511,6 +337,264 @@ def toggle_mcp_server(index: int):
         st.session_state.mcp_servers[index]["enabled"] = not st.session_state.mcp_servers[index]["enabled"]
 
 
+def render_tool_calls(calls: List):
+    """Show the tool calls the model requested in one step."""
+    st.markdown("".join(
+        tool_call_html(f"🔧 Calling: {tool_name}", tool_args) for tool_name, tool_args in calls
+    ), unsafe_allow_html=True)
+
+
+def render_tool_results(calls: List, results: List[str]):
+    """Show the results of one step's tool calls."""
+    st.markdown("".join(
+        tool_result_html(f"📊 Result from {tool_name}", result)
+        for (tool_name, _), result in zip(calls, results)
+    ), unsafe_allow_html=True)
+
+
+def render_message(message: Dict):
+    """Render one transcript entry from its cached tool-box HTML."""
+    with st.chat_message(message["role"]):
+        st.markdown(message["content"])
+        
+        tool_html = message_html(message)
+        if tool_html:
+            st.markdown(tool_html, unsafe_allow_html=True)
+        
+        if message.get("tool_result_ref") and st.toggle(
+            f"📄 Full result ({message['tool_result_chars']:,} characters)", key=f"full_{message['tool_result_ref']}"
+        ):
+            full_result = get_session_store().get(message["tool_result_ref"])
+            if full_result is None:
+                st.caption("The full result is no longer available.")
+            else:
+                st.text(full_result)
+        
+        if message.get("notice"):
+            st.caption(message["notice"])
+        if message.get("summary"):
+            st.caption(message["summary"])
+
+
+def save_new_messages() -> bool:
+    """Append transcript entries not yet persisted to the conversation store.
+
+    Returns False if some entries are still unsaved.
+    """
+    conversation_store = get_conversation_store()
+    if conversation_store is None:
+        return True
+    new_messages = [m for m in st.session_state.messages if "seq" not in m]
+    try:
+        conversation_store.append(st.session_state.conversation_id, new_messages)
+    except Exception as e:
+        # Unsaved entries keep no "seq" and are retried after the next turn
+        print(f"⚠️ Could not save conversation {st.session_state.conversation_id}: {e}")
+    return all("seq" in m for m in new_messages)
+
+
+def load_conversation():
+    """Put the newest page of the resumed conversation in front of the transcript.
+
+    A store that is down leaves the transcript empty with a warning; entries
+    saved later still number after the stored ones, so "Load earlier" can
+    fetch them once the store is back.
+    """
+    conversation_store = get_conversation_store()
+    if conversation_store is None:
+        return
+    try:
+        messages = conversation_store.load(st.session_state.conversation_id)
+    except Exception as e:
+        print(f"⚠️ Could not load conversation {st.session_state.conversation_id}: {e}")
+        st.session_state.conversation_warning = "⚠️ Could not load the saved conversation, starting with an empty one."
+        return
+    st.session_state.messages[:0] = messages
+    st.session_state.tool_calls_count += sum(len(m.get("tool_calls") or []) for m in messages)
+
+
+def reload_compacted_conversation():
+    """Tell the user their idle transcript was trimmed, restoring it from the store when there is one."""
+    conversation_store = get_conversation_store()
+    if conversation_store is None:
+        st.session_state.conversation_warning = (
+            "⚠️ This chat was idle for a while, so only its latest messages were kept."
+        )
+        return
+    save_new_messages()
+    # Unsaved entries (store unreachable) are kept as they are rather than lost
+    if all("seq" in m for m in st.session_state.messages):
+        st.session_state.messages.clear()
+        st.session_state.tool_calls_count = 0
+        load_conversation()
+    st.session_state.setdefault(
+        "conversation_warning",
+        "⚠️ This chat was idle for a while, so only its latest messages are loaded; "
+        "use \"Load earlier messages\" for the rest."
+    )
+
+
+def load_earlier_messages():
+    """Page the previous CONVERSATION_PAGE_SIZE entries in from the store."""
+    first_seq = st.session_state.messages[0]["seq"]
+    try:
+        earlier = get_conversation_store().load(st.session_state.conversation_id, before_seq=first_seq)
+    except Exception as e:
+        print(f"⚠️ Could not load conversation {st.session_state.conversation_id}: {e}")
+        st.session_state.conversation_warning = "⚠️ Could not load earlier messages, please try again."
+        return
+    st.session_state.messages[:0] = earlier
+    st.session_state.tool_calls_count += sum(len(m.get("tool_calls") or []) for m in earlier)
+    st.session_state.show_older_messages = True
+
+
+def finish_chat_turn(turn: ChatTurn):
+    """Move a settled turn's tool rounds and answer into the transcript.
+    
+    The worker has usually recorded (and saved) them already; a turn the UI
+    stopped waiting for is recorded here instead.
+    """
+    entries = turn.settle()
+    st.session_state.tool_calls_count += sum(len(m.get("tool_calls") or []) for m in entries)
+    st.session_state.messages.extend(entries)
+    save_new_messages()
+    # Entries dropped here stay in the conversation store and can be paged back in
+    get_session_store().bound(st.session_state.messages)
+    st.session_state.active_turn = None
+
+
+@st.fragment(run_every=TURN_POLL_SECONDS)
+def render_active_turn():
+    """Poll the running turn and render its progress; finalize it once done."""
+    turn = st.session_state.active_turn
+    if turn is None:
+        return
+    if turn.settled:
+        finish_chat_turn(turn)
+        st.rerun()
+    
+    with st.chat_message("assistant"):
+        events = turn.events()
+        for event in events:
+            if event["type"] == "tool_calls":
+                render_tool_calls(event["calls"])
+            elif event["type"] == "tool_results":
+                render_tool_results(event["calls"], event["results"])
+        
+        progress = st.empty()
+        st.button("⏹️ Stop", key="stop_turn", on_click=turn.cancel)
+        
+        # Push tokens as they stream in rather than only once per poll; a new
+        # tool event or the end of the turn hands back to a full render
+        poll_ends = time.monotonic() + TURN_POLL_SECONDS
+        shown = None
+        while True:
+            state = (turn.status, turn.partial)
+            if state != shown:
+                render_turn_progress(progress, state, events)
+                shown = state
+            if turn.settled or len(turn.events()) != len(events) or time.monotonic() >= poll_ends:
+                break
+            time.sleep(TURN_STREAM_REFRESH_SECONDS)
+    
+    if turn.settled:
+        finish_chat_turn(turn)
+        st.rerun()
+
+
+def render_turn_progress(progress, state: Tuple[str, str], events: List[Dict]):
+    """Streamed text so far, or what the turn is waiting on, given its (status, partial)."""
+    status, partial = state
+    last_event = events[-1]["type"] if events else None
+    if status == "queued":
+        progress.caption("⏳ Waiting for a free worker...")
+    elif partial:
+        progress.markdown(partial + " ▌")
+    elif last_event == "tool_calls":
+        progress.caption("⚙️ Executing tools...")
+    elif last_event == "thinking" and len(events) > 1:
+        progress.caption("✨ Generating response...")
+    else:
+        progress.caption("🤔 Thinking...")
+
+
+def format_latency(name: str, **labels) -> str:
+    """Markdown table row cells (count, p50, p95, p99) for one latency series."""
+    summary = get_metrics().summary(name, **labels)
+    if not summary["count"]:
+        return "0 | – | – | –"
+    return f"{summary['count']} | {summary['p50']:.2f}s | {summary['p95']:.2f}s | {summary['p99']:.2f}s"
+
+
+def record_first_paint():
+    """Record how long a new session waited for the page shell (header and sidebar).
+    
+    The first session of a process is the cold start: it also builds the
+    shared caches and clients every later (warm) session reuses.
+    """
+    if st.session_state.get("first_paint_recorded"):
+        return
+    st.session_state.first_paint_recorded = True
+    metrics = get_metrics()
+    start = "warm" if metrics.label_values("frontend_first_paint_seconds", "start") else "cold"
+    first_paint = time.monotonic() - RUN_STARTED
+    metrics.observe("frontend_first_paint_seconds", first_paint, start=start)
+    if first_paint > FIRST_PAINT_BUDGET_SECONDS:
+        print(f"⚠️ First paint took {first_paint:.2f}s ({start} start), "
+              f"over the {FIRST_PAINT_BUDGET_SECONDS:.2f}s budget")
+
+
+def render_performance_panel():
+    """Latency percentiles and token totals collected by this frontend process."""
+    metrics = get_metrics()
+    rows = [
+        ("Time to first token", format_latency("llamastack_ttft_seconds")),
+        ("LLM completion", format_latency("llamastack_completion_seconds")),
+        ("Catalog fetch", format_latency("llamastack_catalog_fetch_seconds")),
+        ("Chat turn", format_latency("frontend_turn_seconds")),
+        ("Page render", format_latency("frontend_render_seconds")),
+        ("First paint (cold)", format_latency("frontend_first_paint_seconds", start="cold")),
+        ("First paint (warm)", format_latency("frontend_first_paint_seconds", start="warm")),
+    ]
+    rows += [
+        (f"Tool `{tool}`", format_latency("llamastack_tool_seconds", tool=tool))
+        for tool in metrics.label_values("llamastack_tool_seconds", "tool")
+    ]
+    table = "| | Count | p50 | p95 | p99 |\n|---|---|---|---|---|\n"
+    table += "\n".join(f"| {label} | {cells} |" for label, cells in rows)
+    st.markdown(table)
+    st.caption(
+        f"🔢 Tokens: {metrics.counter('llamastack_tokens_total', kind='prompt'):,.0f} prompt / "
+        f"{metrics.counter('llamastack_tokens_total', kind='completion'):,.0f} completion · "
+        f"❗ Errors: {metrics.counter('llamastack_errors_total'):,.0f}"
+    )
+
+
+# Check back quickly until the first snapshot arrives, so a fast start fills in soon
+STATUS_POLL_SECONDS = CATALOG_POLL_SECONDS if st.session_state.snapshot_seen else STARTUP_POLL_SECONDS
+
+@st.fragment(run_every=STATUS_POLL_SECONDS)
+def render_llamastack_status():
+    """Status badge; reruns the page when the poller publishes a new snapshot."""
+    if sync_llamastack_snapshot():
+        st.rerun()
+    
+    ls_status = st.session_state.llamastack_status
+    ls_class = "online" if ls_status == "online" else "offline" if ls_status == "offline" else "checking"
+    st.markdown(f"""
+    <div class="status-badge {ls_class}">
+        ● {ls_status.upper()}
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Per-replica routing state when LLAMASTACK_URL lists several replicas
+    endpoints = get_llamastack_client().endpoint_status(get_llamastack_url())
+    if len(endpoints) > 1:
+        for endpoint in endpoints:
+            icon = "🔴" if not endpoint["healthy"] else "🟢" if endpoint["circuit"] == "closed" else "🟡"
+            st.caption(f"{icon} {endpoint['url']} · {endpoint['outstanding']} in flight · {endpoint['latency_ms']} ms")
+
+
 # ============== HEADER ==============
 st.markdown(f"""
 <div class="main-header">
@@ -519,6 +603,9 @@ st.markdown(f"""
 </div>
 """, unsafe_allow_html=True)
 
+# Pick up health/catalog changes published by the background poller
+sync_llamastack_snapshot()
+
 # ============== SIDEBAR ==============
 with st.sidebar:
     st.markdown("### 🔧 Configuration")
@@ -537,12 +624,15 @@ with st.sidebar:
             help="LlamaStack service endpoint"
         )
         
-        # Auto-detect available models
-        available_models = get_available_models()
+        # Auto-detect available models (loaded in the background on a cold start)
+        available_models = get_available_models(wait=False)
         model_options = [m.get("identifier", "") for m in available_models] if available_models else []
-        current_model = get_default_model_id()
+        current_model = get_default_model_id(wait=False)
         
-        if model_options:
+        if available_models is None:
+            st.caption("⏳ Loading models from LlamaStack...")
+            new_model_id = st.session_state.selected_model_id
+        elif model_options:
             # Show dropdown with available models
             default_idx = model_options.index(current_model) if current_model in model_options else 0
             new_model_id = st.selectbox(
@@ -569,13 +659,7 @@ with st.sidebar:
     st.markdown("### 📡 LlamaStack Status")
     col1, col2 = st.columns([2, 1])
     with col1:
-        ls_status = st.session_state.llamastack_status
-        ls_class = "online" if ls_status == "online" else "offline" if ls_status == "offline" else "checking"
-        st.markdown(f"""
-        <div class="status-badge {ls_class}">
-            ● {ls_status.upper()}
-        </div>
-        """, unsafe_allow_html=True)
+        render_llamastack_status()
     with col2:
         if st.button("🔄", key="check_ls"):
             st.session_state.llamastack_status = "online" if check_llamastack_health() else "offline"
@@ -590,7 +674,7 @@ with st.sidebar:
     # Refresh button - this now updates both tools AND servers
     if st.button("🔄 Refresh", use_container_width=True, key="refresh_all"):
         with st.spinner("Fetching from LlamaStack..."):
-            tools = refresh_tools_and_servers()
+            tools = refresh_tools_and_servers(force=True)
             st.session_state.llamastack_status = "online" if tools else "offline"
         if st.session_state.mcp_servers:
             st.success(f"Found {len(st.session_state.mcp_servers)} MCP servers!")
@@ -646,6 +730,11 @@ with st.sidebar:
                 for tool in tools:
                     tool_name = tool.get("name", tool.get("identifier", "Unknown"))
                     st.caption(f"• {tool_name}")
+        cache_stats = get_tool_cache().stats()
+        st.caption(f"🗄️ Tool cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses / {cache_stats['coalesced']} shared")
+        memory = get_session_store().usage(st.session_state.session_id, st.session_state.messages)
+        st.caption(f"🧠 Session memory: {memory['inline'] / 1024:.0f} KiB · "
+                   f"{memory['compressed'] / 1024:.0f} KiB compressed · {memory['spilled'] / 1024:.0f} KiB on disk")
     else:
         st.info("Click 'Refresh' to load tools")
     
@@ -655,10 +744,24 @@ with st.sidebar:
     st.markdown("### ⚡ Actions")
     
     if st.button("🗑️ Clear Chat", use_container_width=True):
+        if st.session_state.active_turn is not None:
+            st.session_state.active_turn.cancel()
+            st.session_state.active_turn = None
+        get_session_store().drop_session(st.session_state.session_id)
+        st.session_state.conversation_id = new_conversation_id()
+        st.query_params["conversation"] = st.session_state.conversation_id
         st.session_state.messages = []
         st.session_state.tool_calls_count = 0
         st.rerun()
 
+# Header and sidebar are on screen: the page shell has painted
+record_first_paint()
+
+if st.session_state.pop("conversation_pending", False):
+    load_conversation()
+elif st.session_state.pop("conversation_compacted", False):
+    reload_compacted_conversation()
+
 # ============== MAIN CONTENT ==============
 
 # Architecture diagram
@@ -721,145 +824,67 @@ with col3:
 with col4:
     st.metric("🛠️ Tools", len(st.session_state.mcp_tools))
 
+with st.expander("📈 Performance", expanded=False):
+    render_performance_panel()
+
 st.markdown("---")
 
-# Display chat messages
-for message in st.session_state.messages:
-    with st.chat_message(message["role"]):
-        st.markdown(message["content"])
-        
-        if "tool_calls" in message and message["tool_calls"]:
-            for tc in message["tool_calls"]:
-                st.markdown(f"""
-                <div class="tool-call-box">
-                    <div class="tool-call-header">🔧 Tool Call: {tc.get('name', 'unknown')}</div>
-                    <div class="tool-call-content">{json.dumps(tc.get('args', {}), indent=2)}</div>
-                </div>
-                """, unsafe_allow_html=True)
-        
-        if "tool_result" in message and message["tool_result"]:
-            result_preview = message["tool_result"][:500] + "..." if len(message["tool_result"]) > 500 else message["tool_result"]
-            st.markdown(f"""
-            <div class="tool-result-box">
-                <div class="tool-result-header">📊 Tool Result</div>
-                <div class="tool-result-content">{result_preview}</div>
-            </div>
-            """, unsafe_allow_html=True)
+# Display chat messages: the newest turns, older ones on demand
+if warning := st.session_state.pop("conversation_warning", None):
+    st.warning(warning)
+if st.session_state.messages and st.session_state.messages[0].get("seq", 1) > 1:
+    st.button("⬆️ Load earlier messages", key="load_earlier", on_click=load_earlier_messages)
+older_messages, recent_messages = split_transcript(st.session_state.messages)
+if older_messages and st.toggle(f"📜 Show {len(older_messages)} earlier messages", key="show_older_messages"):
+    for message in older_messages:
+        render_message(message)
+for message in recent_messages:
+    render_message(message)
 
 # Chat input
-if prompt := st.chat_input("Ask a question... (e.g., 'What's the weather forecast?' or 'Check vacation balance for EMP001')"):
+if prompt := st.chat_input(
+    "Ask a question... (e.g., 'What's the weather forecast?' or 'Check vacation balance for EMP001')",
+    disabled=st.session_state.active_turn is not None
+):
     st.session_state.messages.append({"role": "user", "content": prompt})
+    # Saved before the turn starts: the worker saves the answer itself, even if
+    # this tab goes away, but only once everything before it has been saved
+    saved = save_new_messages()
     with st.chat_message("user"):
         st.markdown(prompt)
     
-    # Build messages for API
-    api_messages = [{"role": "system", "content": SYSTEM_PROMPT}]
-    for msg in st.session_state.messages:
-        api_messages.append({"role": msg["role"], "content": msg["content"]})
+    # Build messages for API: recent turns verbatim, older ones summarized
+    api_messages = build_api_messages(SYSTEM_PROMPT, st.session_state.messages)
     
-    # Get tools in OpenAI format
-    tools = format_tools_for_openai(st.session_state.mcp_tools) if st.session_state.mcp_tools else None
+    # Get tools in OpenAI format, limited to enabled MCP servers (and the most relevant tools)
+    enabled_toolgroups = {s["toolgroup_id"] for s in st.session_state.mcp_servers if s.get("enabled", True)}
+    selected_tools = select_tools(st.session_state.mcp_tools, enabled_toolgroups, prompt)
+    tools = get_catalog_cache().get_openai_tools(get_llamastack_url(), selected_tools) if selected_tools else None
     
-    # Call LlamaStack
-    with st.chat_message("assistant"):
-        with st.spinner("🤔 Thinking..."):
-            response = chat_completion_openai(api_messages, tools)
-        
-        if "error" in response:
-            st.error(f"Error: {response['error']}")
-            st.session_state.messages.append({
-                "role": "assistant",
-                "content": f"Sorry, I encountered an error: {response['error']}"
-            })
-        else:
-            choice = response.get("choices", [{}])[0]
-            message = choice.get("message", {})
-            
-            if message.get("tool_calls"):
-                tool_calls_info = []
-                tool_results = []
-                
-                for tool_call in message["tool_calls"]:
-                    func = tool_call.get("function", {})
-                    tool_name = func.get("name", "")
-                    try:
-                        tool_args = json.loads(func.get("arguments", "{}"))
-                    except:
-                        tool_args = {}
-                    
-                    tool_calls_info.append({
-                        "name": tool_name,
-                        "args": tool_args
-                    })
-                    
-                    st.session_state.tool_calls_count += 1
-                    
-                    st.markdown(f"""
-                    <div class="tool-call-box">
-                        <div class="tool-call-header">🔧 Calling: {tool_name}</div>
-                        <div class="tool-call-content">{json.dumps(tool_args, indent=2)}</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    with st.spinner(f"⚙️ Executing {tool_name}..."):
-                        result = execute_tool_call(tool_name, tool_args)
-                        tool_results.append(result)
-                    
-                    result_preview = result[:500] + "..." if len(result) > 500 else result
-                    st.markdown(f"""
-                    <div class="tool-result-box">
-                        <div class="tool-result-header">📊 Result from {tool_name}</div>
-                        <div class="tool-result-content">{result_preview}</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": "Using tools to fetch data...",
-                    "tool_calls": tool_calls_info,
-                    "tool_result": "\n".join(tool_results)
-                })
-                
-                api_messages.append({
-                    "role": "assistant",
-                    "content": None,
-                    "tool_calls": message["tool_calls"]
-                })
-                
-                for i, tool_call in enumerate(message["tool_calls"]):
-                    api_messages.append({
-                        "role": "tool",
-                        "tool_call_id": tool_call["id"],
-                        "content": tool_results[i]
-                    })
-                
-                with st.spinner("✨ Generating response..."):
-                    final_response = chat_completion_openai(api_messages, tools)
-                
-                if "error" not in final_response:
-                    final_content = final_response.get("choices", [{}])[0].get("message", {}).get("content", "")
-                    st.markdown(final_content)
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": final_content
-                    })
-                else:
-                    st.error(f"Error generating final response: {final_response['error']}")
-            else:
-                content = message.get("content", "")
-                st.markdown(content)
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": content
-                })
+    # Optionally start likely read-only tool calls alongside the first completion
+    prefetch = predict_tool_calls(
+        prompt, selected_tools, get_tool_cache().is_cacheable, get_station_aliases()
+    ) if SPECULATIVE_TOOLS else []
+    
+    # Run the turn on a background worker; the fragment below polls its progress
+    st.session_state.active_turn = start_chat_turn(api_messages, tools, prefetch, save=saved)
+
+if st.session_state.active_turn is not None:
+    render_active_turn()
 
 # Footer
 st.markdown("---")
 enabled_servers = [s["name"] for s in st.session_state.mcp_servers if s.get("enabled", True)]
-current_model_display = get_default_model_id() or "Not detected"
+# Until the model list arrives get_default_model_id can only offer its hard-coded fallback
+if not (st.session_state.get("selected_model_id") or DEFAULT_MODEL_ID) and get_available_models(wait=False) is None:
+    current_model_display = "⏳ loading..."
+else:
+    current_model_display = get_default_model_id(wait=False) or "Not detected"
 st.markdown(f"""
 <div style="text-align: center; color: #64748b; font-size: 0.8rem;">
     <p>🦙 LlamaStack Multi-MCP Demo | Model: {current_model_display}</p>
     <p>Active MCP Servers: {', '.join(enabled_servers) if enabled_servers else 'Click Refresh to load'}</p>
 </div>
 """, unsafe_allow_html=True)
+
+get_metrics().observe("frontend_render_seconds", time.monotonic() - RUN_STARTED)
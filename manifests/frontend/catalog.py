@@ -0,0 +1,337 @@
+"""
+LlamaStack catalog cache
+Process-wide TTL cache for the model and tool catalogs, keyed by LlamaStack URL.
+
+Streamlit reruns the whole script on every click or keystroke; without this
+cache each rerun re-fetched /v1/models (sometimes twice). Entries are served
+from memory while fresh, served stale while a background thread refreshes them
+once expired, and re-fetched right away when the user hits "🔄 Refresh".
+"""
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from llamastack_client import LlamaStackClient
+from singleflight import SingleFlight
+
+CATALOG_TTL = float(os.getenv("CATALOG_TTL_SECONDS", "60"))
+# Empty results (LlamaStack down or not configured yet) expire much sooner
+CATALOG_EMPTY_TTL = float(os.getenv("CATALOG_EMPTY_TTL_SECONDS", "5"))
+
+# Send only the K tools most relevant to the prompt (0 sends every enabled tool)
+TOOL_TOP_K = int(os.getenv("TOOL_TOP_K", "0"))
+
+# Words that say nothing about which tool a prompt needs
+STOPWORDS = {
+    "the", "and", "for", "with", "what", "whats", "what's", "how", "can", "you",
+    "are", "is", "me", "my", "show", "tell", "give", "get", "find", "please",
+    "about", "from", "this", "that", "there", "any", "all", "list", "of", "in",
+}
+
+# MCP Server metadata for display (icon, description)
+MCP_SERVER_METADATA = {
+    "mcp::weather-data": {
+        "name": "Weather",
+        "icon": "🌤️",
+        "description": "Weather data via OpenWeatherMap API"
+    },
+    "mcp::hr-tools": {
+        "name": "HR Tools",
+        "icon": "👥",
+        "description": "Employee info, vacation, job openings"
+    },
+    "mcp::jira-confluence": {
+        "name": "Jira/Confluence",
+        "icon": "📋",
+        "description": "Issue tracking and documentation"
+    },
+    "mcp::github-tools": {
+        "name": "GitHub",
+        "icon": "🐙",
+        "description": "Repository search, issues, code search"
+    },
+    "builtin::rag": {
+        "name": "RAG",
+        "icon": "🔍",
+        "description": "Built-in retrieval augmented generation"
+    }
+}
+
+
+def extract_mcp_servers_from_tools(tools: List[Dict]) -> List[Dict]:
+    """Extract unique MCP servers from the tools list."""
+    tool_counts = {}
+    for tool in tools:
+        toolgroup_id = tool.get("toolgroup_id", "")
+        if toolgroup_id:
+            tool_counts[toolgroup_id] = tool_counts.get(toolgroup_id, 0) + 1
+
+    servers = []
+    for tg in sorted(tool_counts):
+        metadata = MCP_SERVER_METADATA.get(tg, {
+            "name": tg.replace("mcp::", "").replace("::", " ").title(),
+            "icon": "🔧",
+            "description": f"Tools from {tg}"
+        })
+        tool_count = tool_counts[tg]
+
+        servers.append({
+            "toolgroup_id": tg,
+            "name": metadata["name"],
+            "icon": metadata["icon"],
+            "description": f"{metadata['description']} ({tool_count} tools)",
+            "tool_count": tool_count,
+            "enabled": True
+        })
+
+    return servers
+
+
+def _keywords(text: str) -> set:
+    """Lowercase word set of text, with snake_case/kebab-case split apart."""
+    words = re.findall(r"[a-z0-9]+", text.lower().replace("_", " ").replace("-", " "))
+    return {w for w in words if len(w) > 2 and w not in STOPWORDS}
+
+
+def _tool_relevance(tool: Dict, prompt_words: set) -> int:
+    """Keyword overlap between the prompt and a tool; name/toolgroup hits count double."""
+    name_words = _keywords(f"{tool.get('name', tool.get('identifier', ''))} {tool.get('toolgroup_id', '')}")
+    desc_words = _keywords(tool.get("description", ""))
+    params = tool.get("parameters", tool.get("parameter_definitions")) or {}
+    if isinstance(params, dict):
+        desc_words |= _keywords(" ".join(params.get("properties", params).keys()))
+    return 2 * len(prompt_words & name_words) + len(prompt_words & desc_words)
+
+
+def select_tools(tools: List[Dict], enabled_toolgroups: set, prompt: str = "",
+                 top_k: int = TOOL_TOP_K) -> List[Dict]:
+    """Tools to offer the model for a prompt.
+
+    Tools from disabled MCP servers are always dropped. With top_k set, only the
+    top_k tools sharing keywords with the prompt are kept; if nothing matches,
+    every enabled tool is sent rather than leaving the model without tools.
+    """
+    selected = [
+        tool for tool in tools
+        if not tool.get("toolgroup_id") or tool["toolgroup_id"] in enabled_toolgroups
+    ]
+    if not top_k or len(selected) <= top_k:
+        return selected
+
+    prompt_words = _keywords(prompt)
+    scored = [(_tool_relevance(tool, prompt_words), i, tool) for i, tool in enumerate(selected)]
+    relevant = sorted((entry for entry in scored if entry[0] > 0), key=lambda e: (-e[0], e[1]))
+    if not relevant:
+        return selected
+    return [tool for _, _, tool in relevant[:top_k]]
+
+
+def tool_to_openai(tool: Dict) -> Dict:
+    """Convert one MCP tool to the OpenAI function calling format."""
+    return {
+        "type": "function",
+        "function": {
+            "name": tool.get("name", tool.get("identifier", "")),
+            "description": tool.get("description", ""),
+            "parameters": tool.get("parameters", tool.get("parameter_definitions", {
+                "type": "object",
+                "properties": {},
+                "required": []
+            }))
+        }
+    }
+
+
+def format_tools_for_openai(mcp_tools: List[Dict]) -> List[Dict]:
+    """Convert MCP tools to OpenAI function calling format."""
+    return [tool_to_openai(tool) for tool in mcp_tools]
+
+
+def catalog_version(tools: List[Dict]) -> str:
+    """Content hash of a /v1/tools payload, identifying one catalog version."""
+    encoded = json.dumps(tools, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+class OpenAITools(list):
+    """OpenAI tool schemas that also carry their JSON array pre-serialized.
+
+    LlamaStackClient splices ``json_fragment`` into the request body instead of
+    re-encoding every schema on each completion.
+    """
+
+    def __init__(self, schemas: List[Dict], fragments: List[str]):
+        super().__init__(schemas)
+        self.json_fragment = "[" + ",".join(fragments) + "]"
+
+
+def precompute_tool_schemas(tools: List[Dict]) -> Dict:
+    """Convert and serialize every tool once per catalog version."""
+    by_name = {}
+    for tool in tools:
+        schema = tool_to_openai(tool)
+        by_name[schema["function"]["name"]] = (schema, json.dumps(schema))
+    return {"version": catalog_version(tools), "by_name": by_name}
+
+
+class CatalogCache:
+    """TTL cache of /v1/models and /v1/tools (plus derived MCP servers) per URL."""
+
+    def __init__(self, client: LlamaStackClient, ttl: float = CATALOG_TTL,
+                 empty_ttl: float = CATALOG_EMPTY_TTL):
+        self.client = client
+        self.ttl = ttl
+        self.empty_ttl = empty_ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], Tuple[float, object]] = {}
+        self._refreshing = set()
+        # Concurrent loads of the same catalog share one upstream request
+        self._flight = SingleFlight()
+        # Precomputed tool schemas by catalog version; survive catalog refreshes
+        self._schemas: Dict[str, Dict] = {}
+
+    def _expires_after(self, value) -> float:
+        return self.ttl if value else self.empty_ttl
+
+    def _store(self, key: Tuple[str, str], value, ttl: float = None):
+        ttl = self._expires_after(value) if ttl is None else ttl
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+
+    def _schemas_for(self, tools: List[Dict]) -> Dict:
+        """Precomputed schemas for this tool list, converted only on a new version."""
+        version = catalog_version(tools)
+        with self._lock:
+            schemas = self._schemas.get(version)
+        if schemas is None:
+            schemas = precompute_tool_schemas(tools)
+            with self._lock:
+                if len(self._schemas) >= 8:
+                    self._schemas.pop(next(iter(self._schemas)))
+                self._schemas[version] = schemas
+        return schemas
+
+    def _load(self, base_url: str, kind: str) -> Dict[str, object]:
+        """Fetch one catalog from LlamaStack and store it (and anything derived)."""
+        return self._flight.do((base_url, kind), lambda: self._fetch(base_url, kind))
+
+    def _fetch(self, base_url: str, kind: str) -> Dict[str, object]:
+        if kind == "models":
+            loaded = {"models": self.client.list_models(base_url)}
+        else:
+            tools = self.client.list_tools(base_url)
+            if tools is None:
+                kept = self._keep_tools(base_url)
+                if kept is not None:
+                    return kept
+                tools = []
+            loaded = {"tools": tools, "servers": extract_mcp_servers_from_tools(tools)}
+            loaded["schemas"] = self._schemas_for(tools)
+        for loaded_kind, value in loaded.items():
+            self._store((base_url, loaded_kind), value)
+        return loaded
+
+    def _keep_tools(self, base_url: str) -> Optional[Dict[str, object]]:
+        """Keep the cached tool catalog after a failed fetch and retry it soon.
+
+        A failed /v1/tools must not read as "every MCP server went away":
+        that would change the catalog version and tell sessions their
+        servers were removed. Returns None when nothing was cached yet.
+        """
+        with self._lock:
+            entries = {kind: self._entries.get((base_url, kind)) for kind in ("tools", "servers", "schemas")}
+        if any(entry is None for entry in entries.values()):
+            return None
+        kept = {kind: entry[1] for kind, entry in entries.items()}
+        for kind, value in kept.items():
+            self._store((base_url, kind), value, ttl=self.empty_ttl)
+        return kept
+
+    def _refresh_in_background(self, base_url: str, kind: str):
+        key = (base_url, "models" if kind == "models" else "tools")
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._load(base_url, key[1])
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f"catalog-refresh-{key[1]}", daemon=True).start()
+
+    def _get(self, base_url: str, kind: str, wait: bool = True):
+        with self._lock:
+            entry = self._entries.get((base_url, kind))
+        if entry is None:
+            if not wait:
+                # Not loaded yet: start loading and let the caller render a placeholder
+                self._refresh_in_background(base_url, kind)
+                return None
+            return self._load(base_url, "models" if kind == "models" else "tools")[kind]
+        expires_at, value = entry
+        if time.monotonic() > expires_at:
+            # Serve the stale copy now; the next rerun picks up the fresh one
+            self._refresh_in_background(base_url, kind)
+        return value
+
+    def get_models(self, base_url: str, wait: bool = True) -> Optional[List[Dict]]:
+        """LLM models for base_url, fetched at most once per TTL.
+
+        With wait=False a cold cache returns None at once and loads in the
+        background instead of blocking the caller on /v1/models.
+        """
+        return self._get(base_url, "models", wait)
+
+    def get_tools(self, base_url: str) -> List[Dict]:
+        """Tools for base_url, fetched at most once per TTL."""
+        return self._get(base_url, "tools")
+
+    def get_servers(self, base_url: str) -> List[Dict]:
+        """MCP servers derived from the tool catalog.
+
+        Returns a copy: callers keep per-session state (the "enabled" toggle)
+        on these dicts, which must not leak into the shared cache.
+        """
+        return copy.deepcopy(self._get(base_url, "servers"))
+
+    def get_catalog_version(self, base_url: str) -> str:
+        """Version (content hash) of the tool catalog currently cached for base_url."""
+        return self._get(base_url, "schemas")["version"]
+
+    def get_openai_tools(self, base_url: str, tools: List[Dict]) -> OpenAITools:
+        """OpenAI schemas for a selection of tools, reusing the precomputed ones.
+
+        Tools missing from the current catalog version (a session still holding
+        an older tool list) are converted on the fly.
+        """
+        by_name = self._get(base_url, "schemas")["by_name"]
+        schemas, fragments = [], []
+        for tool in tools:
+            name = tool.get("name", tool.get("identifier", ""))
+            schema, fragment = by_name.get(name) or (None, None)
+            if schema is None:
+                schema = tool_to_openai(tool)
+                fragment = json.dumps(schema)
+            schemas.append(schema)
+            fragments.append(fragment)
+        return OpenAITools(schemas, fragments)
+
+    def tools_expired(self, base_url: str) -> bool:
+        """True if base_url's tool catalog was never fetched or is past its TTL."""
+        with self._lock:
+            entry = self._entries.get((base_url, "tools"))
+        return entry is None or time.monotonic() > entry[0]
+
+    def refresh(self, base_url: str) -> List[Dict]:
+        """Re-fetch both catalogs for base_url now and return the tools."""
+        self._load(base_url, "models")
+        return self._load(base_url, "tools")["tools"]
@@ -0,0 +1,175 @@
+"""
+Conversation store
+Persists chat transcripts outside Streamlit's session state.
+
+Each conversation is an append-only sequence of transcript entries numbered
+1, 2, 3... . A session holds only a window of recent entries in memory and
+pages older ones in on request, and the conversation id lives in the page URL
+(?conversation=...) so a reconnect resumes it (and a pod restart, with MongoDB
+or a mounted data dir).
+
+CONVERSATION_STORE selects the backend:
+    sqlite:///<CONVERSATION_DATA_DIR>/conversations.db  local file (default)
+    mongodb://mongodb:27017/frontend                    MongoDB (needs pymongo)
+    none                                                keep transcripts in session state only
+
+The default SQLite file lives in CONVERSATION_DATA_DIR, on the container's own
+filesystem unless a volume is mounted there, so it is lost when the pod
+restarts.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+# Directory of the default SQLite store (created on first use)
+CONVERSATION_DATA_DIR = os.getenv("CONVERSATION_DATA_DIR", "/tmp/frontend-data")
+CONVERSATION_STORE = os.getenv(
+    "CONVERSATION_STORE", "sqlite:///" + os.path.join(CONVERSATION_DATA_DIR, "conversations.db")
+)
+# Transcript entries loaded per page (initial load and "Load earlier")
+CONVERSATION_PAGE_SIZE = int(os.getenv("CONVERSATION_PAGE_SIZE", "20"))
+# How long a MongoDB store waits for the server before an operation fails
+CONVERSATION_STORE_TIMEOUT_MS = int(os.getenv("CONVERSATION_STORE_TIMEOUT_MS", "1500"))
+
+# Per-process render/token caches and process-local references are not persisted
+TRANSIENT_KEYS = ("seq", "html", "tokens", "tool_result_ref")
+
+
+def to_record(message: Dict) -> str:
+    return json.dumps({k: v for k, v in message.items() if k not in TRANSIENT_KEYS}, default=str)
+
+
+class SQLiteConversationStore:
+    """Conversation store in a local SQLite file."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                " conversation_id TEXT NOT NULL, seq INTEGER NOT NULL,"
+                " created_at REAL NOT NULL, data TEXT NOT NULL,"
+                " PRIMARY KEY (conversation_id, seq))"
+            )
+            self._db.commit()
+
+    def append(self, conversation_id: str, messages: List[Dict]):
+        """Append entries, numbering them (message["seq"]) after the last stored one.
+
+        Entries are numbered only once the transaction has committed, so a
+        failed append leaves them without a "seq" to be retried later.
+        """
+        if not messages:
+            return
+        with self._lock:
+            with self._db:
+                (last_seq,) = self._db.execute(
+                    "SELECT COALESCE(MAX(seq), 0) FROM messages WHERE conversation_id = ?", (conversation_id,)
+                ).fetchone()
+                seqs = range(last_seq + 1, last_seq + 1 + len(messages))
+                self._db.executemany(
+                    "INSERT INTO messages (conversation_id, seq, created_at, data) VALUES (?, ?, ?, ?)",
+                    [(conversation_id, seq, time.time(), to_record(m)) for seq, m in zip(seqs, messages)]
+                )
+            for seq, message in zip(seqs, messages):
+                message["seq"] = seq
+
+    def load(self, conversation_id: str, before_seq: Optional[int] = None,
+             limit: int = CONVERSATION_PAGE_SIZE) -> List[Dict]:
+        """Up to ``limit`` entries preceding before_seq (or the newest ones), oldest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT seq, data FROM messages WHERE conversation_id = ? AND seq < ?"
+                " ORDER BY seq DESC LIMIT ?",
+                (conversation_id, before_seq or 2 ** 62, limit)
+            ).fetchall()
+        return [dict(json.loads(data), seq=seq) for seq, data in reversed(rows)]
+
+
+class MongoConversationStore:
+    """Conversation store in MongoDB (the database the MCP stack already runs)."""
+
+    def __init__(self, url: str):
+        from pymongo import MongoClient
+
+        database = urlparse(url).path.strip("/") or "frontend"
+        # Fail fast when MongoDB is down: loads and saves run on the page's script thread
+        client = MongoClient(
+            url, serverSelectionTimeoutMS=CONVERSATION_STORE_TIMEOUT_MS,
+            connectTimeoutMS=CONVERSATION_STORE_TIMEOUT_MS, socketTimeoutMS=4 * CONVERSATION_STORE_TIMEOUT_MS
+        )
+        self._collection = client[database]["conversation_messages"]
+        self._lock = threading.Lock()
+        # MongoClient connects lazily; build the index off the startup path too
+        threading.Thread(target=self._create_index, name="conversation-index", daemon=True).start()
+
+    def _create_index(self):
+        from pymongo import ASCENDING
+
+        try:
+            self._collection.create_index([("conversation_id", ASCENDING), ("seq", ASCENDING)], unique=True)
+        except Exception as e:
+            print(f"⚠️ Could not create conversation index: {e}")
+
+    def append(self, conversation_id: str, messages: List[Dict]):
+        """Append entries; only the ones actually inserted get their "seq"."""
+        from pymongo.errors import BulkWriteError
+
+        if not messages:
+            return
+        with self._lock:
+            last = self._collection.find_one(
+                {"conversation_id": conversation_id}, sort=[("seq", -1)], projection={"seq": 1}
+            )
+            last_seq = last["seq"] if last else 0
+            seqs = range(last_seq + 1, last_seq + 1 + len(messages))
+            try:
+                self._collection.insert_many([
+                    {"conversation_id": conversation_id, "seq": seq, "created_at": time.time(), "data": to_record(m)}
+                    for seq, m in zip(seqs, messages)
+                ])
+            except BulkWriteError as e:
+                # Ordered inserts stop at the first error; the entries before it are stored
+                inserted = e.details.get("nInserted", 0)
+                for seq, message in zip(seqs[:inserted], messages):
+                    message["seq"] = seq
+                raise
+            for seq, message in zip(seqs, messages):
+                message["seq"] = seq
+
+    def load(self, conversation_id: str, before_seq: Optional[int] = None,
+             limit: int = CONVERSATION_PAGE_SIZE) -> List[Dict]:
+        query = {"conversation_id": conversation_id}
+        if before_seq:
+            query["seq"] = {"$lt": before_seq}
+        docs = list(self._collection.find(query, projection={"seq": 1, "data": 1}).sort("seq", -1).limit(limit))
+        return [dict(json.loads(doc["data"]), seq=doc["seq"]) for doc in reversed(docs)]
+
+
+def create_conversation_store(url: str = CONVERSATION_STORE):
+    """Store for a CONVERSATION_STORE url, or None when persistence is off or unavailable."""
+    if not url or url == "none":
+        return None
+    try:
+        if url.startswith("sqlite:///"):
+            return SQLiteConversationStore(url[len("sqlite:///"):])
+        if url.startswith(("mongodb://", "mongodb+srv://")):
+            return MongoConversationStore(url)
+    except Exception as e:
+        print(f"⚠️ Conversation store {url} unavailable, keeping chats in memory only: {e}")
+        return None
+    print(f"⚠️ Unsupported CONVERSATION_STORE {url}, keeping chats in memory only")
+    return None
+
+
+def new_conversation_id() -> str:
+    return uuid.uuid4().hex
@@ -0,0 +1,119 @@
+"""
+LlamaStack endpoint pool
+Routing, circuit breaking and failover across LlamaStack replicas.
+
+LLAMASTACK_URL may list several replicas separated by commas. The comma list
+stays the logical URL everywhere else (cache keys, session state); only
+LlamaStackClient resolves it to a concrete replica per request: the healthy
+replica with the fewest requests in flight (weighted by its recent latency)
+wins, and a replica that keeps failing is skipped for a cooldown period.
+"""
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Consecutive failures that open a replica's circuit
+CIRCUIT_FAILURES = int(os.getenv("LLAMASTACK_CIRCUIT_FAILURES", "3"))
+# Seconds an open circuit skips the replica before one trial request
+CIRCUIT_COOLDOWN = float(os.getenv("LLAMASTACK_CIRCUIT_COOLDOWN", "30"))
+# Weight of the newest sample in the latency moving average
+LATENCY_ALPHA = 0.3
+
+
+def split_endpoints(base_url: str) -> List[str]:
+    """Replica URLs of a (possibly comma-separated) LlamaStack URL."""
+    return [url.strip().rstrip("/") for url in base_url.split(",") if url.strip()]
+
+
+class Endpoint:
+    """Routing state of one LlamaStack replica."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.failures = 0
+        self.open_until = 0.0
+        self.healthy = True
+        self.latency = 0.1
+
+    def available(self, now: float) -> bool:
+        """Closed circuit, or an open one whose cooldown is over (half-open)."""
+        return now >= self.open_until
+
+    def score(self) -> float:
+        return (self.outstanding + 1) * self.latency
+
+
+class EndpointPool:
+    """Least-outstanding-requests routing with per-replica circuit breakers."""
+
+    def __init__(self, urls: List[str], failure_threshold: int = CIRCUIT_FAILURES,
+                 cooldown: float = CIRCUIT_COOLDOWN):
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+
+    def acquire(self, exclude: List[Endpoint] = ()) -> Optional[Endpoint]:
+        """Pick a replica for one request and count it as in flight.
+
+        Replicas that failed their last health check are used only when no
+        healthy one is available. When every remaining circuit is open, the
+        replica closest to the end of its cooldown gets a half-open trial
+        rather than failing the request outright (so a single replica is
+        never refused). Returns None only once every replica was excluded.
+        """
+        now = time.monotonic()
+        with self._lock:
+            remaining = [e for e in self.endpoints if e not in exclude]
+            if not remaining:
+                return None
+            candidates = [e for e in remaining if e.available(now)]
+            if not candidates:
+                candidates = [min(remaining, key=lambda e: e.open_until)]
+            healthy = [e for e in candidates if e.healthy] or candidates
+            endpoint = min(healthy, key=Endpoint.score)
+            endpoint.outstanding += 1
+            if endpoint.open_until:
+                # Half-open: let this one trial request through, hold the rest back
+                endpoint.open_until = now + self.cooldown
+            return endpoint
+
+    def release(self, endpoint: Endpoint, latency: float = None, ok: bool = True):
+        """Finish a request: update latency and the replica's circuit."""
+        with self._lock:
+            endpoint.outstanding -= 1
+            if latency is not None:
+                endpoint.latency += LATENCY_ALPHA * (latency - endpoint.latency)
+            if ok:
+                self._close(endpoint)
+            else:
+                endpoint.failures += 1
+                if endpoint.failures >= self.failure_threshold:
+                    endpoint.open_until = time.monotonic() + self.cooldown
+
+    def mark_health(self, endpoint: Endpoint, healthy: bool):
+        """Record a health check; a passing check also closes the circuit."""
+        with self._lock:
+            endpoint.healthy = healthy
+            if healthy:
+                self._close(endpoint)
+
+    def _close(self, endpoint: Endpoint):
+        endpoint.failures = 0
+        endpoint.open_until = 0.0
+
+    def status(self) -> List[Dict]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "url": e.url,
+                    "healthy": e.healthy,
+                    "circuit": "closed" if not e.open_until else "open" if now < e.open_until else "half-open",
+                    "outstanding": e.outstanding,
+                    "latency_ms": round(e.latency * 1000),
+                }
+                for e in self.endpoints
+            ]
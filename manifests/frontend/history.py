@@ -0,0 +1,102 @@
+"""
+Conversation history manager
+Builds a bounded chat payload from the session transcript.
+
+The most recent messages are sent verbatim up to a token budget; anything
+older is folded into a short extractive summary so long sessions keep a
+roughly constant request size. Tool rounds are replayed as assistant text with
+their (truncated) results instead of being dropped.
+"""
+import os
+from typing import Dict, List
+
+from agent import estimate_tokens
+
+# Token budget for verbatim history (system prompt included)
+HISTORY_MAX_TOKENS = int(os.getenv("HISTORY_MAX_TOKENS", "6000"))
+# Token budget for the summary of messages that fell out of the window
+HISTORY_SUMMARY_TOKENS = int(os.getenv("HISTORY_SUMMARY_TOKENS", "500"))
+# Characters of a stored tool result replayed to the model
+HISTORY_TOOL_RESULT_CHARS = int(os.getenv("HISTORY_TOOL_RESULT_CHARS", "1500"))
+# Characters of each older message kept in the summary
+SUMMARY_LINE_CHARS = 200
+
+
+def truncate(text: str, max_chars: int, total_chars: int = 0) -> str:
+    """Cut text to max_chars, marking how much was dropped.
+
+    ``total_chars`` is the original length when ``text`` is already a prefix.
+    """
+    total = max(len(text), total_chars)
+    if total <= max_chars:
+        return text
+    kept = text[:max_chars]
+    return f"{kept}\n... [truncated {total - len(kept)} characters]"
+
+
+def to_api_message(message: Dict, tool_result_chars: int = HISTORY_TOOL_RESULT_CHARS) -> Dict:
+    """Convert a transcript entry into a chat message, inlining tool results."""
+    content = message.get("content") or ""
+    if message.get("tool_result"):
+        tool_names = ", ".join(tc.get("name", "") for tc in message.get("tool_calls", []))
+        content = (f"{content}\n\nResults from {tool_names or 'tools'}:\n"
+                   f"{truncate(message['tool_result'], tool_result_chars, message.get('tool_result_chars', 0))}")
+    return {"role": message["role"], "content": content}
+
+
+def message_tokens(message: Dict) -> int:
+    """Approximate tokens of a transcript entry, computed once and cached on it."""
+    if "tokens" not in message:
+        message["tokens"] = estimate_tokens(to_api_message(message)["content"]) + 4
+    return message["tokens"]
+
+
+def summarize_messages(messages: List[Dict], max_tokens: int = HISTORY_SUMMARY_TOKENS) -> str:
+    """Extractive summary of older messages, newest lines kept first."""
+    lines = []
+    for message in messages:
+        if message.get("tool_calls"):
+            tool_names = ", ".join(tc.get("name", "") for tc in message["tool_calls"])
+            lines.append(f"- Assistant called tools: {tool_names}")
+            continue
+        speaker = "User" if message["role"] == "user" else "Assistant"
+        text = " ".join((message.get("content") or "").split())
+        if text:
+            lines.append(f"- {speaker}: {truncate(text, SUMMARY_LINE_CHARS)}")
+
+    kept = []
+    used = 0
+    for line in reversed(lines):
+        used += estimate_tokens(line)
+        if kept and used > max_tokens:
+            kept.append("- ...")
+            break
+        kept.append(line)
+    return "\n".join(reversed(kept))
+
+
+def build_api_messages(system_prompt: str, messages: List[Dict],
+                       max_tokens: int = HISTORY_MAX_TOKENS,
+                       summary_tokens: int = HISTORY_SUMMARY_TOKENS) -> List[Dict]:
+    """System prompt (with a summary of older turns) + the newest messages within max_tokens.
+
+    The latest message is always included, even if it alone exceeds the budget.
+    """
+    used = estimate_tokens(system_prompt)
+    start = len(messages)
+    while start > 0:
+        tokens = message_tokens(messages[start - 1])
+        if start < len(messages) and used + tokens > max_tokens:
+            break
+        used += tokens
+        start -= 1
+
+    system_content = system_prompt
+    if start > 0 and summary_tokens:
+        summary = summarize_messages(messages[:start], summary_tokens)
+        if summary:
+            # One system message: many chat templates reject or drop a second one
+            system_content = f"{system_prompt}\n\nSummary of the earlier conversation:\n{summary}"
+    api_messages = [{"role": "system", "content": system_content}]
+    api_messages.extend(to_api_message(message) for message in messages[start:])
+    return api_messages
@@ -0,0 +1,429 @@
+"""
+LlamaStack HTTP client
+Process-wide, pooled keep-alive client shared by every session of the frontend.
+
+Streamlit re-executes app.py on every interaction, so anything created there is
+rebuilt per rerun. The client below is created once per process (app.py caches
+it with st.cache_resource) and reuses TCP/TLS connections across reruns and
+across users of the same pod.
+
+A comma-separated LlamaStack URL is spread over its replicas (see
+endpoints.py), failing over to another replica when one cannot be reached.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, List, Dict, Iterator, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, MaxRetryError
+from urllib3.util.retry import Retry
+
+from endpoints import EndpointPool, split_endpoints
+
+# Connection pool configuration
+POOL_SIZE = int(os.getenv("LLAMASTACK_POOL_SIZE", "20"))
+MAX_RETRIES = int(os.getenv("LLAMASTACK_MAX_RETRIES", "2"))
+RETRY_BACKOFF = float(os.getenv("LLAMASTACK_RETRY_BACKOFF", "0.5"))
+CONNECT_TIMEOUT = float(os.getenv("LLAMASTACK_CONNECT_TIMEOUT", "5"))
+# Methods that may be resent to another replica after any connection error
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Read timeouts (seconds) per endpoint
+DEFAULT_TIMEOUTS = {
+    "health": float(os.getenv("LLAMASTACK_HEALTH_TIMEOUT", "5")),
+    "models": float(os.getenv("LLAMASTACK_MODELS_TIMEOUT", "5")),
+    "tools": float(os.getenv("LLAMASTACK_TOOLS_TIMEOUT", "10")),
+    "chat": float(os.getenv("LLAMASTACK_CHAT_TIMEOUT", "120")),
+    "tool_invoke": float(os.getenv("LLAMASTACK_TOOL_TIMEOUT", "60")),
+}
+
+
+def iter_sse_events(response: requests.Response, stats: Dict = None) -> Iterator[Dict]:
+    """Parse a server-sent events stream into JSON chunks, stopping at [DONE].
+
+    If ``stats`` is given, stats["bytes"] accumulates the size of the stream.
+    """
+    for line in response.iter_lines(decode_unicode=True):
+        if stats is not None and line:
+            stats["bytes"] = stats.get("bytes", 0) + len(line) + 1
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            break
+        try:
+            yield json.loads(data)
+        except json.JSONDecodeError:
+            continue
+
+
+def merge_tool_call_deltas(tool_calls: Dict[int, Dict], deltas: List[Dict]):
+    """Merge streamed tool_call deltas into tool_calls, keyed by their index."""
+    for delta in deltas:
+        index = delta.get("index", len(tool_calls))
+        call = tool_calls.setdefault(index, {
+            "id": "",
+            "type": "function",
+            "function": {"name": "", "arguments": ""}
+        })
+        if delta.get("id"):
+            call["id"] = delta["id"]
+        if delta.get("type"):
+            call["type"] = delta["type"]
+        func = delta.get("function") or {}
+        if func.get("name"):
+            call["function"]["name"] += func["name"]
+        if func.get("arguments"):
+            call["function"]["arguments"] += func["arguments"]
+
+
+def format_tool_result(result: Any) -> str:
+    """Flatten a tool-runtime invoke response into display/LLM text."""
+    if isinstance(result, dict):
+        content = result.get("content", result)
+        if isinstance(content, list):
+            return "\n".join(
+                item.get("text", json.dumps(item)) if isinstance(item, dict) else str(item)
+                for item in content
+            )
+        elif isinstance(content, dict):
+            return json.dumps(content, indent=2)
+        return str(content)
+    elif isinstance(result, list):
+        return "\n".join(
+            item.get("text", json.dumps(item)) if isinstance(item, dict) else str(item)
+            for item in result
+        )
+    return str(result)
+
+
+def chat_payload(model_id: str, messages: List[Dict], tools: List[Dict] = None,
+                 tool_choice: str = "auto") -> Dict:
+    """Build the request body for the OpenAI-compatible chat completions endpoint."""
+    payload = {
+        "model": model_id,
+        "messages": messages,
+        "temperature": 0.7,
+        "max_tokens": 4096,
+    }
+
+    if tools:
+        payload["tools"] = tools
+        payload["tool_choice"] = tool_choice
+
+    return payload
+
+
+def encode_payload(payload: Dict) -> bytes:
+    """JSON-encode a request body, splicing in pre-serialized tool schemas.
+
+    When payload["tools"] carries a ``json_fragment`` (see catalog.OpenAITools)
+    that string is used verbatim rather than re-encoding every schema.
+    """
+    fragment = getattr(payload.get("tools"), "json_fragment", None)
+    if fragment is None:
+        return json.dumps(payload).encode()
+    body = json.dumps({k: v for k, v in payload.items() if k != "tools"})
+    separator = ", " if body != "{}" else ""
+    return f'{body[:-1]}{separator}"tools": {fragment}}}'.encode()
+
+
+def never_sent(error: requests.exceptions.ConnectionError) -> bool:
+    """Whether a connection error happened before the request was sent.
+
+    True only when no connection could be made (refused, unresolvable, connect
+    timeout). A dropped or reset connection may have delivered the request.
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    if isinstance(reason, MaxRetryError):
+        reason = reason.reason
+    # urllib3's NewConnectionError (refused, DNS failure) is a ConnectTimeoutError
+    return isinstance(reason, ConnectTimeoutError)
+
+
+def create_adapter(pool_size: int = POOL_SIZE, max_retries: int = MAX_RETRIES,
+                   retry_backoff: float = RETRY_BACKOFF, connect_retries: int = None) -> HTTPAdapter:
+    """Create a pooled adapter with retries.
+
+    Connection errors are retried for every method (``connect_retries`` times,
+    max_retries by default); status-based retries (502/503/504) only apply to
+    idempotent methods, so a chat completion or tool invocation is never
+    replayed after the server has accepted it.
+    """
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries if connect_retries is None else connect_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=retry_backoff,
+        status_forcelist=(502, 503, 504),
+        raise_on_status=False,
+    )
+    return HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+
+def create_session(pool_size: int = POOL_SIZE, max_retries: int = MAX_RETRIES,
+                   retry_backoff: float = RETRY_BACKOFF) -> requests.Session:
+    """Create a keep-alive session with a bounded connection pool and retries."""
+    adapter = create_adapter(pool_size, max_retries, retry_backoff)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class LlamaStackClient:
+    """Pooled client for the LlamaStack REST endpoints used by the frontend."""
+
+    def __init__(self, session: requests.Session = None, timeouts: Dict[str, float] = None,
+                 metrics=None):
+        self.session = session or create_session()
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+        # Optional metrics.MetricsRegistry receiving latency/size/token samples
+        self.metrics = metrics
+        self._pools: Dict[str, EndpointPool] = {}
+        self._pools_lock = threading.Lock()
+        self._failover_adapter = None
+
+    def endpoint_pool(self, base_url: str) -> EndpointPool:
+        """Routing state for the replicas behind a (comma-separated) LlamaStack URL."""
+        with self._pools_lock:
+            if base_url not in self._pools:
+                urls = split_endpoints(base_url)
+                if len(urls) > 1:
+                    # A refused connection fails over to another replica at once
+                    # instead of first being retried against the same one
+                    if self._failover_adapter is None:
+                        self._failover_adapter = create_adapter(connect_retries=0)
+                    for url in urls:
+                        self.session.mount(f"{url}/", self._failover_adapter)
+                self._pools[base_url] = EndpointPool(urls)
+            return self._pools[base_url]
+
+    @contextmanager
+    def _request(self, base_url: str, method: str, path: str, **kwargs) -> Iterator[requests.Response]:
+        """Send a request to the best replica, failing over when it cannot be reached.
+
+        A completion or tool call moves to another replica only if it was never
+        sent (see never_sent): a connection dropped after sending could
+        otherwise run it twice. Idempotent methods fail over on any connection
+        error. Timeouts and errors after a response arrived are not retried.
+        """
+        pool = self.endpoint_pool(base_url)
+        tried = []
+        last_error = None
+        while True:
+            endpoint = pool.acquire(exclude=tried)
+            if endpoint is None:
+                if last_error is not None:
+                    raise last_error
+                raise requests.exceptions.ConnectionError(f"No LlamaStack endpoint configured in {base_url!r}")
+            if tried:
+                self._inc("llamastack_failovers_total", endpoint=tried[-1].url)
+            started = time.monotonic()
+            try:
+                response = self.session.request(method, f"{endpoint.url}{path}", **kwargs)
+                break
+            except requests.exceptions.ConnectionError as e:
+                pool.release(endpoint, ok=False)
+                if method not in IDEMPOTENT_METHODS and not never_sent(e):
+                    raise
+                tried.append(endpoint)
+                last_error = e
+            except requests.exceptions.RequestException:
+                pool.release(endpoint, ok=False)
+                raise
+
+        latency = time.monotonic() - started
+        ok = response.status_code < 500
+        try:
+            with response:
+                yield response
+        except requests.exceptions.RequestException:
+            ok = False
+            raise
+        finally:
+            pool.release(endpoint, latency, ok=ok)
+
+    def endpoint_status(self, base_url: str) -> List[Dict]:
+        return self.endpoint_pool(base_url).status()
+
+    def _observe(self, name: str, value: float, **labels):
+        if self.metrics is not None:
+            self.metrics.observe(name, value, **labels)
+
+    def _inc(self, name: str, value: float = 1, **labels):
+        if self.metrics is not None:
+            self.metrics.inc(name, value, **labels)
+
+    def _record_usage(self, usage: Dict):
+        for kind in ("prompt", "completion"):
+            if usage.get(f"{kind}_tokens"):
+                self._inc("llamastack_tokens_total", usage[f"{kind}_tokens"], kind=kind)
+
+    def timeout(self, endpoint: str) -> Tuple[float, float]:
+        """Return the (connect, read) timeout for an endpoint."""
+        return (CONNECT_TIMEOUT, self.timeouts.get(endpoint, 30))
+
+    def list_models(self, base_url: str) -> List[Dict]:
+        """Fetch LLM models (embedding models are filtered out)."""
+        started = time.monotonic()
+        try:
+            with self._request(base_url, "GET", "/v1/models", timeout=self.timeout("models")) as response:
+                if response.status_code == 200:
+                    data = response.json()
+                    return [m for m in data.get("data", []) if m.get("model_type") == "llm"]
+        except (requests.exceptions.RequestException, ValueError):
+            self._inc("llamastack_errors_total", endpoint="models")
+        finally:
+            self._observe("llamastack_catalog_fetch_seconds", time.monotonic() - started, catalog="models")
+        return []
+
+    def list_tools(self, base_url: str) -> Optional[List[Dict]]:
+        """Fetch the tools of every registered toolgroup (None if the fetch failed).
+
+        Unlike list_models, a failure is not reported as an empty list, so the
+        catalog cache can tell it apart from "no MCP servers registered".
+        """
+        started = time.monotonic()
+        try:
+            with self._request(base_url, "GET", "/v1/tools", timeout=self.timeout("tools")) as response:
+                if response.status_code == 200:
+                    data = response.json()
+                    if isinstance(data, list):
+                        return data
+                    return data.get("data", [])
+        except (requests.exceptions.RequestException, ValueError):
+            self._inc("llamastack_errors_total", endpoint="tools")
+        finally:
+            self._observe("llamastack_catalog_fetch_seconds", time.monotonic() - started, catalog="tools")
+        return None
+
+    def health(self, base_url: str) -> bool:
+        """Check if LlamaStack is healthy (any replica, each one is probed)."""
+        pool = self.endpoint_pool(base_url)
+        healthy = False
+        for endpoint in pool.endpoints:
+            try:
+                response = self.session.get(f"{endpoint.url}/v1/health", timeout=self.timeout("health"))
+                endpoint_healthy = response.status_code == 200
+            except requests.exceptions.RequestException:
+                endpoint_healthy = False
+            pool.mark_health(endpoint, endpoint_healthy)
+            healthy = healthy or endpoint_healthy
+        return healthy
+
+    def chat_completion(self, base_url: str, payload: Dict) -> Dict:
+        """Send a blocking chat completion request."""
+        body = encode_payload(payload)
+        self._observe("llamastack_request_bytes", len(body))
+        started = time.monotonic()
+        try:
+            with self._request(
+                base_url, "POST", "/v1/openai/v1/chat/completions",
+                data=body,
+                headers={"Content-Type": "application/json"},
+                timeout=self.timeout("chat")
+            ) as response:
+                response.raise_for_status()
+                self._observe("llamastack_response_bytes", len(response.content))
+                result = response.json()
+            self._record_usage(result.get("usage") or {})
+            return result
+        except requests.exceptions.RequestException as e:
+            self._inc("llamastack_errors_total", endpoint="chat")
+            return {"error": str(e)}
+        finally:
+            self._observe("llamastack_completion_seconds", time.monotonic() - started, mode="blocking")
+
+    def stream_chat_completion(self, base_url: str, payload: Dict, result: Dict,
+                               stop: Callable[[], bool] = None) -> Iterator[str]:
+        """Stream a chat completion, yielding content tokens as they arrive.
+
+        Once the stream ends, the assembled response is written into ``result``
+        in the same shape chat_completion returns, including any tool_calls
+        reconstructed from their streamed deltas (or an "error" key on failure).
+        ``stop`` is checked before every chunk, tool-call deltas included; once
+        it returns True the stream is closed and ``result`` is left empty.
+        """
+        content_parts = []
+        tool_calls = {}
+        finish_reason = None
+        usage = None
+        stream_stats = {}
+        first_chunk = True
+
+        body = encode_payload(dict(payload, stream=True, stream_options={"include_usage": True}))
+        self._observe("llamastack_request_bytes", len(body))
+        started = time.monotonic()
+        try:
+            with self._request(
+                base_url, "POST", "/v1/openai/v1/chat/completions",
+                data=body,
+                headers={"Content-Type": "application/json"},
+                stream=True,
+                timeout=self.timeout("chat")
+            ) as response:
+                response.raise_for_status()
+                for chunk in iter_sse_events(response, stream_stats):
+                    if stop is not None and stop():
+                        return
+                    if first_chunk:
+                        self._observe("llamastack_ttft_seconds", time.monotonic() - started)
+                        first_chunk = False
+                    if "error" in chunk:
+                        result["error"] = str(chunk["error"])
+                        return
+                    if chunk.get("usage"):
+                        usage = chunk["usage"]
+                    for choice in chunk.get("choices", []):
+                        delta = choice.get("delta") or {}
+                        if delta.get("content"):
+                            content_parts.append(delta["content"])
+                            yield delta["content"]
+                        if delta.get("tool_calls"):
+                            merge_tool_call_deltas(tool_calls, delta["tool_calls"])
+                        if choice.get("finish_reason"):
+                            finish_reason = choice["finish_reason"]
+        except requests.exceptions.RequestException as e:
+            self._inc("llamastack_errors_total", endpoint="chat")
+            result["error"] = str(e)
+            return
+        finally:
+            self._observe("llamastack_completion_seconds", time.monotonic() - started, mode="stream")
+            self._observe("llamastack_response_bytes", stream_stats.get("bytes", 0))
+
+        if usage:
+            self._record_usage(usage)
+        message = {"role": "assistant", "content": "".join(content_parts) or None}
+        if tool_calls:
+            message["tool_calls"] = [tool_calls[i] for i in sorted(tool_calls)]
+        result["choices"] = [{"message": message, "finish_reason": finish_reason}]
+        if usage:
+            result["usage"] = usage
+
+    def invoke_tool(self, base_url: str, tool_name: str, tool_args: Dict) -> str:
+        """Execute a tool call via the LlamaStack tool runtime."""
+        started = time.monotonic()
+        try:
+            with self._request(
+                base_url, "POST", "/v1/tool-runtime/invoke",
+                json={
+                    "tool_name": tool_name,
+                    "kwargs": tool_args
+                },
+                timeout=self.timeout("tool_invoke")
+            ) as response:
+                response.raise_for_status()
+                return format_tool_result(response.json())
+        except Exception as e:
+            self._inc("llamastack_errors_total", endpoint="tool_invoke")
+            return f"Tool execution error: {str(e)}"
+        finally:
+            self._observe("llamastack_tool_seconds", time.monotonic() - started, tool=tool_name)
@@ -0,0 +1,183 @@
+"""
+Frontend metrics
+Process-wide latency/size/token metrics with percentile summaries for the UI
+and a Prometheus text-format endpoint.
+
+Streamlit can't add routes to its own server, so the exposition endpoint runs
+on a separate port (METRICS_PORT) from a daemon thread.
+"""
+import os
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9102"))
+# Samples kept per series for percentile summaries
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "1000"))
+
+# Histogram buckets (upper bounds) by unit
+SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+HELP = {
+    "llamastack_ttft_seconds": "Time to first streamed chunk of a chat completion",
+    "llamastack_completion_seconds": "Wall time of a chat completion request",
+    "llamastack_tool_seconds": "Wall time of a tool-runtime invocation",
+    "llamastack_catalog_fetch_seconds": "Wall time of a model/tool catalog fetch",
+    "llamastack_request_bytes": "Size of chat completion request bodies",
+    "llamastack_response_bytes": "Size of chat completion response bodies",
+    "llamastack_tokens_total": "Tokens reported by chat completions",
+    "llamastack_errors_total": "Failed LlamaStack requests",
+    "llamastack_failovers_total": "Requests retried on another replica after a connection error",
+    "frontend_turn_seconds": "Wall time of a user turn, queueing included",
+    "frontend_render_seconds": "Wall time of a Streamlit script run",
+    "frontend_first_paint_seconds": "Time until a new session's page shell is rendered",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Dict[str, str] = None) -> str:
+    pairs = list(key) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    escaped = (
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " "))
+        for k, v in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class Histogram:
+    """Prometheus-style cumulative buckets plus a sliding window for percentiles."""
+
+    def __init__(self, buckets: Tuple[float, ...], window: int = METRICS_WINDOW):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.samples.append(value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+
+    def percentiles(self, quantiles=(0.5, 0.95, 0.99)) -> Dict[str, float]:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {}
+        return {
+            f"p{int(q * 100)}": ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+            for q in quantiles
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe registry of histograms and counters keyed by name and labels."""
+
+    def __init__(self, window: int = METRICS_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+
+    def observe(self, name: str, value: float, **labels):
+        """Record one sample (seconds or bytes, by the name's suffix)."""
+        buckets = BYTES_BUCKETS if name.endswith("_bytes") else SECONDS_BUCKETS
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            key = _label_key(labels)
+            if key not in series:
+                series[key] = Histogram(buckets, self.window)
+            series[key].observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + value
+
+    def summary(self, name: str, **labels) -> Dict[str, float]:
+        """count and p50/p95/p99 for one series, or over all its label sets."""
+        with self._lock:
+            series = self._histograms.get(name, {})
+            if labels:
+                histograms = [h for k, h in series.items() if k == _label_key(labels)]
+            else:
+                histograms = list(series.values())
+            merged = Histogram(SECONDS_BUCKETS, self.window * max(1, len(histograms)))
+            for histogram in histograms:
+                for sample in histogram.samples:
+                    merged.observe(sample)
+            count = sum(h.count for h in histograms)
+        return dict(merged.percentiles(), count=count)
+
+    def label_values(self, name: str, label: str) -> List[str]:
+        with self._lock:
+            keys = list(self._histograms.get(name, {})) + list(self._counters.get(name, {}))
+        return sorted({v for key in keys for k, v in key if k == label})
+
+    def counter(self, name: str, **labels) -> float:
+        with self._lock:
+            series = self._counters.get(name, {})
+            if labels:
+                return series.get(_label_key(labels), 0)
+            return sum(series.values())
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in series.items():
+                    for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+                        lines.append(f"{name}_bucket{_format_labels(key, {'le': f'{bound:g}'})} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(key, {'le': '+Inf'})} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum:g}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(registry: MetricsRegistry, port: int = METRICS_PORT) -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics for Prometheus from a daemon thread (port 0 disables it)."""
+    if not port:
+        return None
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer(("0.0.0.0", port), MetricsHandler)
+    except OSError as e:
+        print(f"⚠️ Metrics endpoint disabled, port {port} unavailable: {e}")
+        return None
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -0,0 +1,118 @@
+"""
+LlamaStack status poller
+One background thread per process that checks /v1/health for every
+LlamaStack URL in use, and re-fetches /v1/models and /v1/tools once their
+CATALOG_TTL_SECONDS is up or LlamaStack comes back after being down.
+
+Without it each session polled LlamaStack itself (and only on demand); now
+sessions just read the latest snapshot. A snapshot's version is bumped when
+health or the tool catalog changes, and it records which toolgroups appeared
+or disappeared so sessions can pick up new MCP servers without a manual
+refresh.
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from catalog import CatalogCache
+from llamastack_client import LlamaStackClient
+
+# Seconds between health checks (keep below CATALOG_TTL_SECONDS so sessions never wait)
+CATALOG_POLL_SECONDS = float(os.getenv("CATALOG_POLL_SECONDS", "15"))
+# Stop polling a URL no session has asked about for this long
+POLL_IDLE_SECONDS = float(os.getenv("POLL_IDLE_SECONDS", "600"))
+
+
+class CatalogPoller:
+    """Publishes a versioned health/catalog snapshot per LlamaStack URL."""
+
+    def __init__(self, client: LlamaStackClient, catalog: CatalogCache,
+                 interval: float = CATALOG_POLL_SECONDS, idle: float = POLL_IDLE_SECONDS,
+                 on_catalog_change: Callable[[str], None] = None):
+        self.client = client
+        self.catalog = catalog
+        self.interval = interval
+        self.idle = idle
+        # Called with the URL whenever its tool catalog changes (not on the first poll)
+        self.on_catalog_change = on_catalog_change
+        self._lock = threading.Lock()
+        self._watched: Dict[str, float] = {}
+        self._snapshots: Dict[str, Dict] = {}
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="catalog-poller", daemon=True)
+        self._thread.start()
+
+    def watch(self, base_url: str):
+        """Keep base_url polled; a new URL is polled right away."""
+        with self._lock:
+            is_new = base_url not in self._watched
+            self._watched[base_url] = time.monotonic()
+        if is_new:
+            self._wake.set()
+
+    def snapshot(self, base_url: str) -> Optional[Dict]:
+        """Latest snapshot for base_url, or None before its first poll."""
+        with self._lock:
+            return self._snapshots.get(base_url)
+
+    def poll_now(self, base_url: str, refetch: bool = True) -> Dict:
+        """Poll base_url synchronously (the manual refresh buttons).
+
+        With refetch=False only health is checked right away; the catalog is
+        re-fetched on the usual schedule.
+        """
+        self.watch(base_url)
+        return self._poll(base_url, refetch)
+
+    def _poll(self, base_url: str, refetch: bool = False) -> Dict:
+        healthy = self.client.health(base_url)
+        with self._lock:
+            previous = self._snapshots.get(base_url)
+        # The catalog is only re-fetched while LlamaStack answers, and only
+        # when asked to, once its TTL is up or after LlamaStack was down; a
+        # down server keeps the last known tools instead of flapping to empty
+        came_back = previous is not None and not previous["healthy"]
+        if healthy and (refetch or came_back or self.catalog.tools_expired(base_url)):
+            tools = self.catalog.refresh(base_url)
+        else:
+            tools = self.catalog.get_tools(base_url)
+        toolgroups = sorted({t.get("toolgroup_id", "") for t in tools if t.get("toolgroup_id")})
+        catalog_version = self.catalog.get_catalog_version(base_url)
+
+        with self._lock:
+            previous = self._snapshots.get(base_url)
+            if previous and (previous["healthy"], previous["catalog_version"]) == (healthy, catalog_version):
+                snapshot = dict(previous, checked_at=time.time())
+            else:
+                before = set(previous["toolgroups"]) if previous else set()
+                snapshot = {
+                    "version": previous["version"] + 1 if previous else 1,
+                    "healthy": healthy,
+                    "catalog_version": catalog_version,
+                    "toolgroups": toolgroups,
+                    "added": sorted(set(toolgroups) - before) if previous else [],
+                    "removed": sorted(before - set(toolgroups)),
+                    "checked_at": time.time(),
+                }
+            self._snapshots[base_url] = snapshot
+        if previous and previous["catalog_version"] != catalog_version and self.on_catalog_change:
+            self.on_catalog_change(base_url)
+        return snapshot
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            now = time.monotonic()
+            with self._lock:
+                for url, last_seen in list(self._watched.items()):
+                    if now - last_seen > self.idle:
+                        del self._watched[url]
+                        self._snapshots.pop(url, None)
+                urls = list(self._watched)
+            for url in urls:
+                try:
+                    self._poll(url)
+                except Exception as e:
+                    print(f"⚠️ Polling {url} failed: {e}")
@@ -0,0 +1,175 @@
+"""
+Speculative tool prefetch
+Guesses the read-only tool calls a prompt will need so they can run while
+the first completion is still being generated.
+
+Prompts like "What's the weather in Delhi?" or "vacation balance for EMP001"
+almost always lead to the same call. Predicted calls go through the shared
+tool result cache, so when the model asks for the same call it is answered
+from the cache (or joins the in-flight prefetch) instead of costing another
+sequential round trip. Stations are recognized only by the codes and place
+names of a structured (JSON) list_stations result; a server whose
+list_stations prints a human-readable listing instead gets no station
+predictions. Off unless SPECULATIVE_TOOLS=true.
+"""
+import json
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from tool_cache import ERROR_PREFIXES
+
+SPECULATIVE_TOOLS = os.getenv("SPECULATIVE_TOOLS", "false").lower() == "true"
+# Most calls prefetched for one prompt
+SPECULATIVE_MAX_CALLS = int(os.getenv("SPECULATIVE_MAX_CALLS", "2"))
+
+# Seconds a station directory loaded from list_stations is used before reloading
+STATION_DIRECTORY_TTL = float(os.getenv("STATION_DIRECTORY_TTL_SECONDS", "3600"))
+# Retry interval while list_stations fails
+STATION_DIRECTORY_RETRY = 60.0
+
+WEATHER_WORDS = re.compile(r"\b(weather|temperature|temp|conditions?|wind|humidity|visibility|forecast|raining|sunny)\b", re.I)
+STATION_LIST_WORDS = re.compile(r"\b(list|which|what|available|all)\b.*\bstations\b", re.I)
+VACATION_WORDS = re.compile(r"\b(vacation|leave|pto|holidays?|time off)\b", re.I)
+EMPLOYEE_WORDS = re.compile(r"\b(employee|who is|profile|details|info)\b", re.I)
+EMPLOYEE_ID = re.compile(r"\bEMP\d{3,}\b", re.I)
+STATION_CODE = re.compile(r"\b[A-Za-z0-9]{3,5}\b")
+
+
+def parse_station_list(result: str) -> Optional[Dict[str, str]]:
+    """Lowercase station codes and place names -> station code, from a JSON list_stations result.
+
+    Accepts a list of stations or {"stations": [...]}, each a code or an
+    object with "station" (or "_id"), "city" and "station_name". Places are
+    the city and the leading part of the station name ("Delhi - Indira Gandhi
+    International" -> "delhi"); country names are left out since they usually
+    cover several stations. Returns None if the result is not such a list.
+    """
+    try:
+        data = json.loads(result)
+    except ValueError:
+        return None
+    if isinstance(data, dict):
+        data = data.get("stations")
+    if not isinstance(data, list):
+        return None
+    aliases = {}
+    for row in data:
+        if not isinstance(row, dict):
+            row = {"station": row}
+        code = row.get("station", row.get("_id"))
+        if not isinstance(code, str) or not code:
+            continue
+        aliases[code.lower()] = code
+        names = [str(row.get("city") or ""), str(row.get("station_name") or "").split(" - ")[0]]
+        for name in names:
+            name = " ".join(name.lower().split())
+            if len(name) > 2:
+                aliases.setdefault(name, code)
+    return aliases
+
+
+class StationDirectory:
+    """Station codes and place names known to the weather MCP server, per LlamaStack URL.
+
+    Loaded from a JSON list_stations result in the background (through the tool
+    result cache), so predicting a prompt never waits on it; until it has
+    loaded, only station-independent calls are predicted.
+    """
+
+    def __init__(self, ttl: float = STATION_DIRECTORY_TTL, retry: float = STATION_DIRECTORY_RETRY):
+        self.ttl = ttl
+        self.retry = retry
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, Dict[str, str]]] = {}
+        self._loading = set()
+
+    def aliases(self, base_url: str, execute_tool: Callable[[str, Dict], str]) -> Dict[str, str]:
+        """Alias -> station code for base_url (empty until the first load finishes)."""
+        with self._lock:
+            expires_at, aliases = self._entries.get(base_url, (0.0, {}))
+            load = time.monotonic() >= expires_at and base_url not in self._loading
+            if load:
+                self._loading.add(base_url)
+        if load:
+            threading.Thread(
+                target=self._load, args=(base_url, execute_tool), name="station-directory", daemon=True
+            ).start()
+        return aliases
+
+    def _load(self, base_url: str, execute_tool: Callable[[str, Dict], str]):
+        try:
+            result = execute_tool("list_stations", {})
+            aliases = parse_station_list(result)
+            if aliases is None and not result.startswith(ERROR_PREFIXES):
+                # A human-readable listing: nothing to learn until the next reload
+                aliases = {}
+        except Exception as e:
+            print(f"⚠️ Loading the station list failed: {e}")
+            aliases = None
+        with self._lock:
+            previous = self._entries.get(base_url, (0.0, {}))[1]
+            if aliases is not None:
+                self._entries[base_url] = (time.monotonic() + self.ttl, aliases)
+            else:
+                # Keep what we knew and try again soon
+                self._entries[base_url] = (time.monotonic() + self.retry, previous)
+            self._loading.discard(base_url)
+
+
+def _stations(prompt: str, aliases: Dict[str, str]) -> List[str]:
+    """Known station codes a prompt refers to, by code or place name, in order."""
+    codes = {code.lower(): code for code in aliases.values()}
+    found = [
+        (match.start(), codes[match.group().lower()])
+        for match in STATION_CODE.finditer(prompt) if match.group().lower() in codes
+    ]
+    lowered = prompt.lower()
+    for alias, code in aliases.items():
+        if alias in codes:
+            continue
+        position = re.search(rf"\b{re.escape(alias)}\b", lowered)
+        if position:
+            found.append((position.start(), code))
+    ordered = []
+    for _, code in sorted(found):
+        if code not in ordered:
+            ordered.append(code)
+    return ordered
+
+
+def classify_prompt(prompt: str, stations: Dict[str, str] = None) -> List[Tuple[str, Dict]]:
+    """Tool calls the prompt very likely needs, most likely first.
+
+    ``stations`` maps lowercase station codes and place names to codes (see
+    StationDirectory); only those stations are recognized.
+    """
+    calls = []
+    if WEATHER_WORDS.search(prompt):
+        calls += [("get_current_weather", {"station": code}) for code in _stations(prompt, stations or {})]
+    if STATION_LIST_WORDS.search(prompt):
+        calls.append(("list_stations", {}))
+    employee_ids = [match.upper() for match in EMPLOYEE_ID.findall(prompt)]
+    if employee_ids and VACATION_WORDS.search(prompt):
+        calls += [("get_vacation_balance", {"employee_id": employee_id}) for employee_id in employee_ids]
+    elif employee_ids and EMPLOYEE_WORDS.search(prompt):
+        calls += [("get_employee_info", {"employee_id": employee_id}) for employee_id in employee_ids]
+    return calls
+
+
+def predict_tool_calls(prompt: str, tools: List[Dict], is_cacheable: Callable[[str], bool],
+                       stations: Dict[str, str] = None,
+                       max_calls: int = SPECULATIVE_MAX_CALLS) -> List[Tuple[str, Dict]]:
+    """Calls worth prefetching: predicted, offered to the model and cacheable.
+
+    Only cacheable tools are prefetched; anything else could not be reused
+    and might not be safe to run speculatively.
+    """
+    offered = {tool.get("name", tool.get("identifier", "")) for tool in tools}
+    calls = [
+        (tool_name, tool_args) for tool_name, tool_args in classify_prompt(prompt, stations)
+        if tool_name in offered and is_cacheable(tool_name)
+    ]
+    return calls[:max_calls]
@@ -0,0 +1,190 @@
+"""
+Session memory store
+Keeps per-session transcripts bounded in process memory.
+
+Streamlit holds every session's st.session_state in the pod, and a single
+search_weather round can return hundreds of KB. Transcript entries therefore
+keep only the head of a tool result (what the model and the UI preview use);
+the full text is zlib-compressed in memory, or spilled to disk when large,
+and loaded only when the user expands it. Transcripts are capped at
+SESSION_MAX_MESSAGES, and sessions idle for SESSION_IDLE_SECONDS are
+compacted and their stored results released.
+"""
+import os
+import threading
+import time
+import uuid
+import zlib
+from typing import Dict, List, Optional
+
+from history import HISTORY_TOOL_RESULT_CHARS
+
+# Characters of a tool result kept inline on the transcript entry
+SESSION_INLINE_RESULT_CHARS = int(os.getenv("SESSION_INLINE_RESULT_CHARS", str(HISTORY_TOOL_RESULT_CHARS)))
+# Directory for spilled results (empty keeps everything compressed in memory)
+SESSION_SPILL_DIR = os.getenv("SESSION_SPILL_DIR", "")
+# Compressed results larger than this are spilled to SESSION_SPILL_DIR
+SESSION_SPILL_BYTES = int(os.getenv("SESSION_SPILL_BYTES", "32768"))
+# Transcript entries kept per session (oldest turns are dropped first)
+SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", "200"))
+# Sessions without a rerun for this long are compacted
+SESSION_IDLE_SECONDS = float(os.getenv("SESSION_IDLE_SECONDS", "1800"))
+# Transcript entries an idle session keeps after compaction
+SESSION_IDLE_KEEP_MESSAGES = int(os.getenv("SESSION_IDLE_KEEP_MESSAGES", "10"))
+# How often idle sessions are looked for
+SWEEP_INTERVAL = 60
+# How long a compacted session is remembered, to tell its user when they come back
+EVICTED_MEMORY_SECONDS = 86400
+
+
+def message_bytes(message: Dict) -> int:
+    """Approximate in-memory size of a transcript entry's text."""
+    return sum(len(message.get(key) or "") for key in ("content", "tool_result", "html"))
+
+
+class SessionStore:
+    """Compressed/spilled tool results plus transcript bounds for all sessions."""
+
+    def __init__(self, inline_chars: int = SESSION_INLINE_RESULT_CHARS, spill_dir: str = SESSION_SPILL_DIR,
+                 spill_bytes: int = SESSION_SPILL_BYTES, max_messages: int = SESSION_MAX_MESSAGES,
+                 idle_seconds: float = SESSION_IDLE_SECONDS, idle_keep: int = SESSION_IDLE_KEEP_MESSAGES):
+        self.inline_chars = inline_chars
+        self.spill_dir = spill_dir
+        self.spill_bytes = spill_bytes
+        self.max_messages = max_messages
+        self.idle_seconds = idle_seconds
+        self.idle_keep = idle_keep
+        self._lock = threading.Lock()
+        # ref -> {"session", "data" (compressed bytes) or "path", "size" (compressed)}
+        self._blobs: Dict[str, Dict] = {}
+        # session id -> {"last_seen", "messages"}
+        self._sessions: Dict[str, Dict] = {}
+        # session id -> when it was compacted, until the session runs again
+        self._evicted: Dict[str, float] = {}
+        self._last_sweep = time.monotonic()
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    # --- tool results ---
+    def add_tool_result(self, session_id: str, message: Dict, result: str):
+        """Set message["tool_result"], storing the full text aside if it's long."""
+        if len(result) <= self.inline_chars:
+            message["tool_result"] = result
+            return
+        message["tool_result"] = result[:self.inline_chars]
+        message["tool_result_chars"] = len(result)
+        message["tool_result_ref"] = self._put(session_id, result)
+
+    def _put(self, session_id: str, text: str) -> str:
+        ref = uuid.uuid4().hex
+        data = zlib.compress(text.encode(), 6)
+        blob = {"session": session_id, "size": len(data)}
+        if self.spill_dir and len(data) > self.spill_bytes:
+            blob["path"] = os.path.join(self.spill_dir, f"{ref}.z")
+            with open(blob["path"], "wb") as f:
+                f.write(data)
+        else:
+            blob["data"] = data
+        with self._lock:
+            self._blobs[ref] = blob
+        return ref
+
+    def get(self, ref: str) -> Optional[str]:
+        """Full tool result for ref, or None once it was released."""
+        with self._lock:
+            blob = self._blobs.get(ref)
+        if blob is None:
+            return None
+        data = blob.get("data")
+        if data is None:
+            try:
+                with open(blob["path"], "rb") as f:
+                    data = f.read()
+            except OSError:
+                return None
+        return zlib.decompress(data).decode()
+
+    def _release(self, refs: List[str]):
+        with self._lock:
+            blobs = [self._blobs.pop(ref, None) for ref in refs]
+        for blob in blobs:
+            if blob and blob.get("path"):
+                try:
+                    os.remove(blob["path"])
+                except OSError:
+                    pass
+
+    # --- sessions ---
+    def touch(self, session_id: str, messages: List[Dict]) -> bool:
+        """Record activity of a session (once per rerun) and sweep idle ones.
+        
+        Returns True on the first run after the session was compacted, so the
+        caller can reload its transcript and tell the user.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[session_id] = {"last_seen": now, "messages": messages}
+            compacted = self._evicted.pop(session_id, None) is not None
+            sweep = now - self._last_sweep > SWEEP_INTERVAL
+            if sweep:
+                self._last_sweep = now
+        if sweep:
+            self.evict_idle()
+        return compacted
+
+    def bound(self, messages: List[Dict]):
+        """Drop the oldest whole turns beyond max_messages, releasing their results."""
+        if not self.max_messages or len(messages) <= self.max_messages:
+            return
+        start = len(messages) - self.max_messages
+        while start < len(messages) - 1 and messages[start]["role"] != "user":
+            start += 1
+        self._release([m["tool_result_ref"] for m in messages[:start] if m.get("tool_result_ref")])
+        del messages[:start]
+
+    def evict_idle(self):
+        """Compact sessions idle for longer than idle_seconds and forget them.
+        
+        The transcript is trimmed in place (that is what frees the memory), and
+        the session is remembered as compacted until its next touch().
+        """
+        now = time.monotonic()
+        with self._lock:
+            idle = [sid for sid, s in self._sessions.items() if now - s["last_seen"] > self.idle_seconds]
+            evicted = [(sid, self._sessions.pop(sid)["messages"]) for sid in idle]
+            for sid in idle:
+                self._evicted[sid] = now
+            for sid in [sid for sid, at in self._evicted.items() if now - at > EVICTED_MEMORY_SECONDS]:
+                del self._evicted[sid]
+        for session_id, messages in evicted:
+            if len(messages) > self.idle_keep:
+                del messages[:len(messages) - self.idle_keep]
+            for message in messages:
+                message.pop("html", None)
+                message.pop("tool_result_ref", None)
+            self.drop_session(session_id)
+
+    def drop_session(self, session_id: str):
+        """Release every stored result of a session (e.g. on Clear Chat)."""
+        with self._lock:
+            refs = [ref for ref, blob in self._blobs.items() if blob["session"] == session_id]
+        self._release(refs)
+
+    def usage(self, session_id: str, messages: List[Dict]) -> Dict[str, int]:
+        """Bytes a session holds: inline transcript text, compressed and spilled results."""
+        with self._lock:
+            blobs = [blob for blob in self._blobs.values() if blob["session"] == session_id]
+        return {
+            "inline": sum(message_bytes(m) for m in messages),
+            "compressed": sum(b["size"] for b in blobs if "data" in b),
+            "spilled": sum(b["size"] for b in blobs if "path" in b),
+        }
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "results": len(self._blobs),
+                "compressed": sum(b["size"] for b in self._blobs.values() if "data" in b),
+                "spilled": sum(b["size"] for b in self._blobs.values() if "path" in b),
+            }
@@ -0,0 +1,56 @@
+"""Make the frontend modules importable the way app.py imports them, and serve
+scripted HTTP replicas for client tests."""
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class Replica(BaseHTTPRequestHandler):
+    """Answers 200 with a JSON body, or drops the connection once the request is read."""
+
+    def do_GET(self):
+        self.answer()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.answer()
+
+    def answer(self):
+        self.server.requests.append((self.command, self.path))
+        if self.server.drop:
+            self.close_connection = True
+            return
+        body = b'{"content": [{"type": "text", "text": "ok"}], "data": []}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def replica():
+    """Factory starting local replicas; each has .url, .requests and .drop."""
+    servers = []
+
+    def start(drop=False):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Replica)
+        server.daemon_threads = True
+        server.requests, server.drop = [], drop
+        server.url = f"http://127.0.0.1:{server.server_address[1]}"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
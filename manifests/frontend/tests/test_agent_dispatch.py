@@ -0,0 +1,63 @@
+"""Concurrent tool dispatch within one turn (agent.dispatch_tool_calls)."""
+import json
+import threading
+import time
+
+from agent import dispatch_tool_calls
+
+
+def tool_call(name, **args):
+    return {"id": f"call_{name}", "function": {"name": name, "arguments": json.dumps(args)}}
+
+
+def test_results_keep_call_order_and_calls_overlap():
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def execute(tool_name, tool_args):
+        with lock:
+            running.append(tool_name)
+            peak.append(len(running))
+        time.sleep(0.05 if tool_name == "slow" else 0.01)
+        with lock:
+            running.remove(tool_name)
+        return f"{tool_name}:{tool_args.get('n')}"
+
+    results = dispatch_tool_calls(
+        [tool_call("slow", n=1), tool_call("fast", n=2), tool_call("other", n=3)], execute, max_workers=3
+    )
+
+    assert results == ["slow:1", "fast:2", "other:3"]
+    assert max(peak) > 1
+
+
+def test_failed_and_overdue_calls_become_error_results():
+    release = threading.Event()
+
+    def execute(tool_name, tool_args):
+        if tool_name == "broken":
+            raise RuntimeError("boom")
+        if tool_name == "hung":
+            release.wait(5)
+        return "ok"
+
+    started = time.monotonic()
+    results = dispatch_tool_calls(
+        [tool_call("fine"), tool_call("broken"), tool_call("hung")], execute, deadline=0.1
+    )
+    release.set()
+
+    assert time.monotonic() - started < 2
+    assert results[0] == "ok"
+    assert results[1] == "Tool execution error: boom"
+    assert results[2] == "Tool execution error: hung did not finish within 0.1s"
+
+
+def test_malformed_arguments_are_passed_as_empty():
+    seen = []
+    dispatch_tool_calls(
+        [{"function": {"name": "list_stations", "arguments": "{not json"}}],
+        lambda name, args: seen.append((name, args)) or ""
+    )
+    assert seen == [("list_stations", {})]
@@ -0,0 +1,97 @@
+"""Budgeted multi-step agent loop (agent.run_agent_loop)."""
+import json
+
+from agent import AgentBudget, run_agent_loop
+
+
+def tool_response(name, **args):
+    return {"choices": [{"message": {"role": "assistant", "content": None, "tool_calls": [
+        {"id": f"call_{name}", "type": "function", "function": {"name": name, "arguments": json.dumps(args)}}
+    ]}}], "usage": {"total_tokens": 100}}
+
+
+def answer(text):
+    return {"choices": [{"message": {"role": "assistant", "content": text}}], "usage": {"total_tokens": 50}}
+
+
+class ScriptedModel:
+    """complete() callable replaying canned responses and recording tool_choice."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.tool_choices = []
+
+    def __call__(self, messages, tools, tool_choice, step):
+        self.tool_choices.append(tool_choice)
+        return self.responses.pop(0)
+
+
+def test_runs_tool_rounds_until_the_model_answers():
+    model = ScriptedModel([
+        tool_response("list_stations"),
+        tool_response("get_current_weather", station="VIDP"),
+        answer("It is 31°C at VIDP."),
+    ])
+    messages = [{"role": "user", "content": "Weather in Delhi?"}]
+    rounds = []
+
+    outcome = run_agent_loop(
+        messages, [{"type": "function"}], complete=model,
+        execute=lambda calls: [f"result {i}" for i, _ in enumerate(calls)],
+        on_tool_results=lambda step, calls, results: rounds.append(calls)
+    )
+
+    assert outcome["content"] == "It is 31°C at VIDP."
+    assert outcome["stop_reason"] == "answered"
+    assert rounds == [[("list_stations", {})], [("get_current_weather", {"station": "VIDP"})]]
+    assert [m["role"] for m in messages] == ["user", "assistant", "tool", "assistant", "tool"]
+    assert len(outcome["steps"]) == 3
+
+
+def test_step_budget_forces_a_final_answer_without_tools():
+    model = ScriptedModel([tool_response("list_stations"), answer("Here is what I found.")])
+
+    outcome = run_agent_loop(
+        [], [{"type": "function"}], complete=model, execute=lambda calls: ["ok"],
+        budget=AgentBudget(max_steps=1, max_seconds=0, max_tokens=0)
+    )
+
+    assert outcome["stop_reason"] == "step budget"
+    assert model.tool_choices == ["auto", "none"]
+
+
+def test_token_budget_counts_usage():
+    model = ScriptedModel([tool_response("list_stations"), answer("done")])
+
+    outcome = run_agent_loop(
+        [], [{"type": "function"}], complete=model, execute=lambda calls: ["ok"],
+        budget=AgentBudget(max_steps=0, max_seconds=0, max_tokens=100)
+    )
+
+    assert outcome["stop_reason"] == "token budget"
+
+
+def test_repeated_identical_calls_stop_the_loop():
+    model = ScriptedModel([
+        tool_response("get_current_weather", station="VIDP"),
+        tool_response("get_current_weather", station="VIDP"),
+        answer("done"),
+    ])
+    executed = []
+
+    outcome = run_agent_loop(
+        [], [{"type": "function"}], complete=model, execute=lambda calls: executed.append(calls) or ["ok"]
+    )
+
+    assert outcome["stop_reason"] == "repeated tool calls"
+    assert len(executed) == 1
+    assert model.tool_choices == ["auto", "auto", "none"]
+
+
+def test_completion_error_ends_the_turn():
+    outcome = run_agent_loop(
+        [], None, complete=ScriptedModel([{"error": "503 Service Unavailable"}]), execute=lambda calls: []
+    )
+
+    assert outcome["stop_reason"] == "error"
+    assert outcome["error"] == "503 Service Unavailable"
@@ -0,0 +1,130 @@
+"""Process-wide catalog cache (catalog.CatalogCache)."""
+import threading
+import time
+
+from catalog import CatalogCache
+
+URL = "http://llamastack:8321"
+
+TOOLS = [
+    {"name": "get_current_weather", "toolgroup_id": "mcp::weather-data", "description": "Current weather"},
+    {"name": "get_vacation_balance", "toolgroup_id": "mcp::hr-tools", "description": "Vacation days"},
+]
+
+
+class FakeClient:
+    def __init__(self, models=None, tools=TOOLS):
+        self.models = [{"identifier": "llama"}] if models is None else models
+        self.tools = tools
+        self.calls = {"models": 0, "tools": 0}
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def list_models(self, base_url):
+        self.gate.wait(5)
+        self.calls["models"] += 1
+        return list(self.models)
+
+    def list_tools(self, base_url):
+        self.calls["tools"] += 1
+        # None is how the real client reports a failed fetch
+        return None if self.tools is None else list(self.tools)
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_fresh_entries_are_served_from_memory():
+    client = FakeClient()
+    cache = CatalogCache(client, ttl=60)
+
+    assert cache.get_models(URL) == [{"identifier": "llama"}]
+    assert cache.get_models(URL) == [{"identifier": "llama"}]
+    assert cache.get_tools(URL) == TOOLS
+    cache.get_servers(URL)
+    cache.get_catalog_version(URL)
+
+    assert client.calls == {"models": 1, "tools": 1}
+
+
+def test_expired_entry_is_served_stale_while_refreshing():
+    client = FakeClient()
+    cache = CatalogCache(client, ttl=0.05)
+    cache.get_models(URL)
+    time.sleep(0.1)
+    client.models = [{"identifier": "granite"}]
+
+    assert cache.get_models(URL) == [{"identifier": "llama"}]
+    wait_for(lambda: cache.get_models(URL) == [{"identifier": "granite"}])
+    assert client.calls["models"] == 2
+
+
+def test_empty_catalog_expires_sooner():
+    client = FakeClient(models=[])
+    cache = CatalogCache(client, ttl=60, empty_ttl=0.05)
+    assert cache.get_models(URL) == []
+    time.sleep(0.1)
+    client.models = [{"identifier": "llama"}]
+
+    cache.get_models(URL)
+    wait_for(lambda: cache.get_models(URL) == [{"identifier": "llama"}])
+
+
+def test_cold_cache_without_wait_returns_none_and_loads_in_background():
+    client = FakeClient()
+    client.gate.clear()
+    cache = CatalogCache(client)
+
+    assert cache.get_models(URL, wait=False) is None
+    client.gate.set()
+    wait_for(lambda: cache.get_models(URL, wait=False) is not None)
+    assert client.calls["models"] == 1
+
+
+def test_servers_are_copies_of_the_shared_entry():
+    cache = CatalogCache(FakeClient())
+    servers = cache.get_servers(URL)
+    servers[0]["enabled"] = False
+
+    assert all(server["enabled"] for server in cache.get_servers(URL))
+    assert [s["toolgroup_id"] for s in servers] == ["mcp::hr-tools", "mcp::weather-data"]
+
+
+def test_refresh_refetches_both_catalogs():
+    client = FakeClient()
+    cache = CatalogCache(client)
+    cache.get_models(URL)
+    cache.get_tools(URL)
+    client.tools = TOOLS[:1]
+
+    assert cache.refresh(URL) == TOOLS[:1]
+    assert cache.get_tools(URL) == TOOLS[:1]
+    assert client.calls == {"models": 2, "tools": 2}
+
+
+def test_failed_tool_fetch_keeps_the_catalog_and_retries_soon():
+    client = FakeClient()
+    cache = CatalogCache(client, ttl=60, empty_ttl=0.05)
+    version = cache.get_catalog_version(URL)
+
+    client.tools = None
+    assert cache.refresh(URL) == TOOLS
+    assert cache.get_catalog_version(URL) == version
+    assert not cache.tools_expired(URL)
+
+    time.sleep(0.1)
+    assert cache.tools_expired(URL)
+    client.tools = TOOLS[:1]
+    wait_for(lambda: cache.get_tools(URL) == TOOLS[:1])
+
+
+def test_failed_first_tool_fetch_is_an_empty_catalog():
+    client = FakeClient(tools=None)
+    cache = CatalogCache(client, empty_ttl=0.05)
+
+    assert cache.get_tools(URL) == []
+    assert cache.get_servers(URL) == []
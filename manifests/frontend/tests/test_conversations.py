@@ -0,0 +1,100 @@
+"""Conversation persistence and paging (conversations)."""
+import sqlite3
+
+import pytest
+
+import conversations
+from conversations import SQLiteConversationStore, create_conversation_store
+
+
+def turn(i):
+    return [{"role": "user", "content": f"q{i}"}, {"role": "assistant", "content": f"a{i}", "html": "<p>cached</p>"}]
+
+
+class FailingInserts:
+    """sqlite3 connection stand-in whose inserts fail mid-transaction."""
+
+    def __init__(self, db):
+        self._db = db
+
+    def __enter__(self):
+        return self._db.__enter__()
+
+    def __exit__(self, *exc):
+        return self._db.__exit__(*exc)
+
+    def execute(self, *args):
+        return self._db.execute(*args)
+
+    def executemany(self, *args):
+        raise sqlite3.OperationalError("disk I/O error")
+
+
+def test_append_numbers_entries_and_load_pages_backwards(tmp_path):
+    store = SQLiteConversationStore(str(tmp_path / "c.db"))
+    messages = [m for i in range(3) for m in turn(i)]
+
+    store.append("c1", messages)
+
+    assert [m["seq"] for m in messages] == [1, 2, 3, 4, 5, 6]
+    newest = store.load("c1", limit=4)
+    assert [m["content"] for m in newest] == ["q1", "a1", "q2", "a2"]
+    assert "html" not in newest[1]
+    assert [m["content"] for m in store.load("c1", before_seq=newest[0]["seq"], limit=4)] == ["q0", "a0"]
+    assert store.load("other") == []
+
+
+def test_failed_append_leaves_entries_unnumbered_for_a_retry(tmp_path):
+    store = SQLiteConversationStore(str(tmp_path / "c.db"))
+    store.append("c1", turn(0))
+    messages = turn(1)
+    db, store._db = store._db, FailingInserts(store._db)
+
+    with pytest.raises(sqlite3.OperationalError):
+        store.append("c1", messages)
+
+    assert all("seq" not in m for m in messages)
+    store._db = db
+    store.append("c1", messages)
+    assert [m["seq"] for m in messages] == [3, 4]
+    assert [m["content"] for m in store.load("c1")] == ["q0", "a0", "q1", "a1"]
+
+
+def test_mongo_store_fails_fast_and_numbers_only_inserted_entries(monkeypatch):
+    mongomock = pytest.importorskip("mongomock")
+    from pymongo.errors import BulkWriteError
+
+    clients = []
+
+    def client(url, **kwargs):
+        clients.append(kwargs)
+        return mongomock.MongoClient()
+
+    monkeypatch.setattr("pymongo.MongoClient", client)
+    store = create_conversation_store("mongodb://mongodb:27017/frontend")
+    assert isinstance(store, conversations.MongoConversationStore)
+    assert clients[0]["serverSelectionTimeoutMS"] == conversations.CONVERSATION_STORE_TIMEOUT_MS
+
+    first = turn(0)
+    store.append("c1", first)
+    assert [m["seq"] for m in first] == [1, 2]
+
+    def insert_one_then_fail(docs, **kwargs):
+        store._collection.insert_one(docs[0])
+        raise BulkWriteError({"nInserted": 1, "writeErrors": [{"index": 1, "errmsg": "timeout"}]})
+
+    messages = turn(1)
+    monkeypatch.setattr(store._collection, "insert_many", insert_one_then_fail)
+    with pytest.raises(BulkWriteError):
+        store.append("c1", messages)
+
+    assert messages[0]["seq"] == 3
+    assert "seq" not in messages[1]
+    assert [m["content"] for m in store.load("c1")] == ["q0", "a0", "q1"]
+
+
+def test_sqlite_store_creates_its_data_dir(tmp_path):
+    store = create_conversation_store(f"sqlite:///{tmp_path / 'data' / 'c.db'}")
+    store.append("c1", turn(0))
+
+    assert (tmp_path / "data" / "c.db").exists()
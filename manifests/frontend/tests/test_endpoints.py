@@ -0,0 +1,196 @@
+"""Replica routing, circuit breaking and failover (endpoints, LlamaStackClient)."""
+import socket
+import time
+
+import pytest
+import requests
+
+from endpoints import EndpointPool, split_endpoints
+from llamastack_client import LlamaStackClient, create_session
+from metrics import MetricsRegistry
+
+A, B = "http://ls-a:8321", "http://ls-b:8321"
+
+
+def circuit(pool, url):
+    return next(e["circuit"] for e in pool.status() if e["url"] == url)
+
+
+def fail(pool, endpoint, times):
+    for _ in range(times):
+        pool.acquire()
+        pool.release(endpoint, ok=False)
+
+
+def test_split_endpoints():
+    assert split_endpoints(f" {A}/, {B} ,") == [A, B]
+
+
+def test_least_outstanding_replica_wins():
+    pool = EndpointPool([A, B])
+
+    first = pool.acquire()
+    second = pool.acquire()
+
+    assert {first.url, second.url} == {A, B}
+    pool.release(first, latency=0.1)
+    assert pool.acquire() is first
+
+
+def test_unhealthy_replicas_are_a_last_resort():
+    pool = EndpointPool([A, B])
+    pool.mark_health(pool.endpoints[0], False)
+
+    assert pool.acquire().url == B
+    assert pool.acquire().url == B
+    assert pool.acquire(exclude=[pool.endpoints[1]]).url == A
+
+
+def test_circuit_opens_after_consecutive_failures_and_closes_on_success():
+    pool = EndpointPool([A, B], failure_threshold=2, cooldown=60)
+    a = pool.endpoints[0]
+    pool.release(pool.acquire(exclude=[pool.endpoints[1]]), ok=False)
+    assert circuit(pool, A) == "closed"
+    pool.release(pool.acquire(exclude=[pool.endpoints[1]]), ok=False)
+    assert circuit(pool, A) == "open"
+
+    # Open circuits are skipped while another replica is available
+    assert [pool.acquire().url for _ in range(3)] == [B, B, B]
+
+    pool.mark_health(a, True)
+    assert circuit(pool, A) == "closed"
+
+
+def test_half_open_lets_one_trial_request_through():
+    pool = EndpointPool([A, B], failure_threshold=1, cooldown=0.05)
+    a, b = pool.endpoints
+    pool.release(pool.acquire(exclude=[b]), ok=False)
+    time.sleep(0.06)
+    assert circuit(pool, A) == "half-open"
+
+    trial = pool.acquire(exclude=[b])
+    assert trial is a
+    # Held back again until the trial reports back
+    assert circuit(pool, A) == "open"
+    pool.release(trial, latency=0.1, ok=True)
+    assert circuit(pool, A) == "closed"
+
+
+def test_last_remaining_replica_is_never_refused():
+    pool = EndpointPool([A], failure_threshold=1, cooldown=60)
+    fail(pool, pool.endpoints[0], 1)
+    assert circuit(pool, A) == "open"
+
+    assert pool.acquire() is pool.endpoints[0]
+
+
+def test_all_open_picks_the_replica_closest_to_its_cooldown_end():
+    pool = EndpointPool([A, B], failure_threshold=1, cooldown=60)
+    a, b = pool.endpoints
+    pool.release(pool.acquire(exclude=[b]), ok=False)
+    time.sleep(0.01)
+    pool.release(pool.acquire(exclude=[a]), ok=False)
+
+    assert pool.acquire() is a
+    assert pool.acquire(exclude=[a]) is b
+    assert pool.acquire(exclude=[a, b]) is None
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def json(self):
+        return {"data": [{"identifier": "llama", "model_type": "llm"}]}
+
+
+class FakeSession:
+    """requests.Session stand-in refusing connections to some replicas."""
+
+    def __init__(self, down=()):
+        self.down = set(down)
+        self.requested = []
+        self.mounted = {}
+
+    def mount(self, prefix, adapter):
+        self.mounted[prefix] = adapter
+
+    def request(self, method, url, **kwargs):
+        self.requested.append(url)
+        if any(url.startswith(replica) for replica in self.down):
+            raise requests.exceptions.ConnectionError(f"refused: {url}")
+        return FakeResponse()
+
+
+def test_connection_errors_fail_over_and_are_counted_once_per_switch():
+    metrics = MetricsRegistry()
+    session = FakeSession(down=[A])
+    client = LlamaStackClient(session=session, metrics=metrics)
+    client.endpoint_pool(f"{A},{B}").endpoints[1].latency = 1.0  # route to A first
+
+    assert client.list_models(f"{A},{B}") == [{"identifier": "llama", "model_type": "llm"}]
+    assert session.requested == [f"{A}/v1/models", f"{B}/v1/models"]
+    assert metrics.counter("llamastack_failovers_total", endpoint=A) == 1
+
+
+def test_no_failover_is_counted_without_another_replica():
+    metrics = MetricsRegistry()
+    client = LlamaStackClient(session=FakeSession(down=[A]), metrics=metrics)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        with client._request(A, "GET", "/v1/models"):
+            pass
+
+    assert metrics.counter("llamastack_failovers_total") == 0
+
+
+def test_multi_replica_urls_do_not_retry_connections_in_place():
+    session = FakeSession()
+    client = LlamaStackClient(session=session)
+
+    client.endpoint_pool(A)
+    assert session.mounted == {}
+
+    client.endpoint_pool(f"{A},{B}")
+    assert set(session.mounted) == {f"{A}/", f"{B}/"}
+    assert session.mounted[f"{A}/"].max_retries.connect == 0
+
+
+def closed_port_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+def prefer_first(client, base_url):
+    client.endpoint_pool(base_url).endpoints[1].latency = 1.0
+
+
+def test_a_post_dropped_after_sending_is_not_replayed(replica):
+    a, b = replica(drop=True), replica()
+    base_url = f"{a.url},{b.url}"
+    client = LlamaStackClient(session=create_session(retry_backoff=0))
+    prefer_first(client, base_url)
+
+    result = client.invoke_tool(base_url, "create_vacation_request", {"employee_id": "EMP001"})
+
+    assert result.startswith("Tool execution error")
+    assert len(a.requests) == 1
+    assert b.requests == []
+
+
+def test_a_refused_post_fails_over(replica):
+    b = replica()
+    base_url = f"{closed_port_url()},{b.url}"
+    metrics = MetricsRegistry()
+    client = LlamaStackClient(session=create_session(retry_backoff=0), metrics=metrics)
+    prefer_first(client, base_url)
+
+    assert client.invoke_tool(base_url, "get_current_weather", {"station": "VIDP"}) == "ok"
+    assert b.requests == [("POST", "/v1/tool-runtime/invoke")]
+    assert metrics.counter("llamastack_failovers_total") == 1
@@ -0,0 +1,87 @@
+"""Bounded chat payloads (history.build_api_messages)."""
+from history import build_api_messages, summarize_messages, to_api_message, truncate
+
+SYSTEM_PROMPT = "You are a helpful assistant."
+
+
+def turn(i, words=50):
+    return [
+        {"role": "user", "content": f"question {i} " + "word " * words},
+        {"role": "assistant", "content": f"answer {i} " + "word " * words},
+    ]
+
+
+def transcript(turns, words=50):
+    return [message for i in range(turns) for message in turn(i, words)]
+
+
+def test_short_history_is_sent_verbatim():
+    messages = transcript(2)
+
+    api_messages = build_api_messages(SYSTEM_PROMPT, messages, max_tokens=10000)
+
+    assert api_messages[0] == {"role": "system", "content": SYSTEM_PROMPT}
+    assert [m["content"] for m in api_messages[1:]] == [m["content"] for m in messages]
+
+
+def test_older_messages_are_folded_into_the_single_system_prompt():
+    messages = transcript(20)
+
+    api_messages = build_api_messages(SYSTEM_PROMPT, messages, max_tokens=300, summary_tokens=200)
+
+    assert [m["role"] for m in api_messages].count("system") == 1
+    system = api_messages[0]["content"]
+    assert system.startswith(SYSTEM_PROMPT)
+    assert "Summary of the earlier conversation:" in system
+    # Newest lines survive in the summary, the oldest are elided
+    assert "- ..." in system
+    assert "question 0 " not in system
+    assert "answer 17 " in system
+    assert api_messages[-1]["content"] == messages[-1]["content"]
+    assert len(api_messages) - 1 < len(messages)
+
+
+def test_window_stays_within_budget_but_keeps_the_latest_message():
+    messages = transcript(10)
+    messages.append({"role": "user", "content": "huge " * 5000})
+
+    api_messages = build_api_messages(SYSTEM_PROMPT, messages, max_tokens=500)
+
+    assert api_messages[-1]["content"] == messages[-1]["content"]
+    assert len(api_messages) == 2
+
+
+def test_summary_can_be_disabled():
+    api_messages = build_api_messages(SYSTEM_PROMPT, transcript(20), max_tokens=300, summary_tokens=0)
+
+    assert api_messages[0] == {"role": "system", "content": SYSTEM_PROMPT}
+
+
+def test_tool_rounds_are_replayed_with_truncated_results():
+    message = {
+        "role": "assistant",
+        "content": "Using tools to fetch data...",
+        "tool_calls": [{"name": "search_weather", "args": {}}],
+        "tool_result": "x" * 100,
+        "tool_result_chars": 5000,
+    }
+
+    content = to_api_message(message, tool_result_chars=40)["content"]
+
+    assert "Results from search_weather:" in content
+    assert "[truncated 4960 characters]" in content
+
+
+def test_summary_lists_tool_calls_and_truncates_long_lines():
+    summary = summarize_messages([
+        {"role": "user", "content": "long " * 100},
+        {"role": "assistant", "content": "", "tool_calls": [{"name": "list_stations"}]},
+    ])
+
+    assert summary.startswith("- User: long")
+    assert "[truncated" in summary
+    assert summary.endswith("\n- Assistant called tools: list_stations")
+
+
+def test_truncate_leaves_short_text_alone():
+    assert truncate("short", 10) == "short"
@@ -0,0 +1,52 @@
+"""Pooled keep-alive session and its retry policy (llamastack_client.create_adapter)."""
+import requests
+
+from llamastack_client import LlamaStackClient, create_adapter, create_session
+
+
+def test_adapter_pool_and_retry_settings():
+    adapter = create_adapter(pool_size=7, max_retries=3, retry_backoff=0.25)
+    retry = adapter.max_retries
+
+    assert (adapter._pool_connections, adapter._pool_maxsize) == (7, 7)
+    assert (retry.total, retry.connect, retry.read, retry.status) == (3, 3, 3, 3)
+    assert retry.backoff_factor == 0.25
+    assert set(retry.status_forcelist) == {502, 503, 504}
+    assert retry.raise_on_status is False
+
+
+def test_connect_retries_can_be_set_apart():
+    retry = create_adapter(max_retries=2, connect_retries=0).max_retries
+
+    assert (retry.connect, retry.read, retry.status) == (0, 2, 2)
+
+
+def test_only_idempotent_methods_are_retried_once_sent():
+    retry = create_adapter().max_retries
+
+    assert retry.is_retry("GET", 503)
+    assert not retry.is_retry("POST", 503)
+    assert "POST" not in retry.allowed_methods
+
+
+def test_session_mounts_the_adapter_for_both_schemes():
+    session = create_session(pool_size=3)
+
+    for url in ("http://llamastack:8321/v1/models", "https://llamastack:8321/v1/models"):
+        assert session.get_adapter(url)._pool_maxsize == 3
+
+
+def test_a_dropped_post_is_sent_once_and_a_dropped_get_is_retried(replica):
+    server = replica(drop=True)
+    client = LlamaStackClient(session=create_session(max_retries=2, retry_backoff=0))
+
+    assert client.invoke_tool(server.url, "get_current_weather", {"station": "VIDP"}).startswith(
+        "Tool execution error")
+    assert server.requests == [("POST", "/v1/tool-runtime/invoke")]
+
+    server.requests.clear()
+    try:
+        client.session.get(f"{server.url}/v1/models", timeout=5)
+    except requests.exceptions.ConnectionError:
+        pass
+    assert server.requests == [("GET", "/v1/models")] * 3
@@ -0,0 +1,58 @@
+"""Latency metrics and Prometheus exposition (metrics.MetricsRegistry)."""
+from metrics import MetricsRegistry
+
+
+def test_summary_percentiles_per_label_and_overall():
+    metrics = MetricsRegistry()
+    for i in range(1, 101):
+        metrics.observe("llamastack_tool_seconds", i / 100, tool="list_stations")
+    metrics.observe("llamastack_tool_seconds", 5.0, tool="search_weather")
+
+    one = metrics.summary("llamastack_tool_seconds", tool="list_stations")
+    assert one["count"] == 100
+    assert one["p50"] == 0.51
+    assert one["p99"] == 1.0
+    assert metrics.summary("llamastack_tool_seconds")["count"] == 101
+    assert metrics.label_values("llamastack_tool_seconds", "tool") == ["list_stations", "search_weather"]
+
+
+def test_summary_of_an_unknown_series_is_empty():
+    assert MetricsRegistry().summary("frontend_turn_seconds") == {"count": 0}
+
+
+def test_window_bounds_the_samples_but_not_the_count():
+    metrics = MetricsRegistry(window=10)
+    for i in range(50):
+        metrics.observe("frontend_turn_seconds", float(i))
+
+    summary = metrics.summary("frontend_turn_seconds")
+    assert summary["count"] == 50
+    assert summary["p50"] >= 40
+
+
+def test_counters_sum_over_labels():
+    metrics = MetricsRegistry()
+    metrics.inc("llamastack_tokens_total", 120, kind="prompt")
+    metrics.inc("llamastack_tokens_total", 30, kind="completion")
+    metrics.inc("llamastack_tokens_total", 80, kind="prompt")
+
+    assert metrics.counter("llamastack_tokens_total", kind="prompt") == 200
+    assert metrics.counter("llamastack_tokens_total") == 230
+    assert metrics.counter("llamastack_errors_total") == 0
+
+
+def test_prometheus_exposition():
+    metrics = MetricsRegistry()
+    metrics.observe("llamastack_ttft_seconds", 0.3)
+    metrics.observe("llamastack_request_bytes", 2000)
+    metrics.inc("llamastack_errors_total", endpoint='chat "stream"')
+
+    text = metrics.render_prometheus()
+
+    assert "# TYPE llamastack_ttft_seconds histogram" in text
+    assert 'llamastack_ttft_seconds_bucket{le="0.25"} 0' in text
+    assert 'llamastack_ttft_seconds_bucket{le="0.5"} 1' in text
+    assert 'llamastack_ttft_seconds_bucket{le="+Inf"} 1' in text
+    assert 'llamastack_request_bytes_bucket{le="4096"} 1' in text
+    assert 'llamastack_errors_total{endpoint="chat \\"stream\\""} 1' in text
+    assert text.endswith("\n")
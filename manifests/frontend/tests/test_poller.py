@@ -0,0 +1,107 @@
+"""Background health/catalog poller (poller.CatalogPoller)."""
+import time
+
+from catalog import CatalogCache
+from poller import CatalogPoller
+
+URL = "http://llamastack:8321"
+
+
+class FakeClient:
+    def __init__(self):
+        self.healthy = True
+        self.tool_fetches = 0
+        self.tools = [{"name": "get_current_weather", "toolgroup_id": "mcp::weather-data"}]
+
+    def health(self, base_url):
+        return self.healthy
+
+    def list_models(self, base_url):
+        return []
+
+    def list_tools(self, base_url):
+        self.tool_fetches += 1
+        # None is how the real client reports a failed fetch
+        return None if self.tools is None else list(self.tools)
+
+
+def make_poller(client, changes, ttl=60):
+    # A long interval keeps the background thread out of the way
+    return CatalogPoller(client, CatalogCache(client, ttl=ttl), interval=3600, on_catalog_change=changes.append)
+
+
+def test_snapshot_version_follows_health_and_catalog_changes():
+    client = FakeClient()
+    poller = make_poller(client, [])
+
+    first = poller.poll_now(URL)
+    assert (first["version"], first["healthy"], first["toolgroups"]) == (1, True, ["mcp::weather-data"])
+    assert poller.poll_now(URL)["version"] == 1
+
+    client.tools.append({"name": "get_vacation_balance", "toolgroup_id": "mcp::hr-tools"})
+    changed = poller.poll_now(URL)
+    assert changed["version"] == 2
+    assert changed["added"] == ["mcp::hr-tools"]
+
+    client.healthy = False
+    down = poller.poll_now(URL)
+    assert (down["version"], down["healthy"]) == (3, False)
+    # A down server keeps the last known tools
+    assert down["toolgroups"] == ["mcp::hr-tools", "mcp::weather-data"]
+
+
+def test_catalog_change_callback_skips_the_first_poll():
+    client = FakeClient()
+    changes = []
+    poller = make_poller(client, changes)
+
+    poller.poll_now(URL)
+    poller.poll_now(URL)
+    assert changes == []
+
+    client.tools = []
+    poller.poll_now(URL)
+    assert changes == [URL]
+
+
+def test_scheduled_polls_refetch_the_catalog_only_once_it_expires():
+    client = FakeClient()
+    poller = make_poller(client, [], ttl=0.05)
+
+    poller._poll(URL)
+    poller._poll(URL)
+    assert client.tool_fetches == 1
+
+    time.sleep(0.1)
+    poller._poll(URL)
+    assert client.tool_fetches == 2
+    poller.poll_now(URL, refetch=False)
+    assert client.tool_fetches == 2
+
+
+def test_catalog_is_refetched_when_llamastack_comes_back():
+    client = FakeClient()
+    poller = make_poller(client, [])
+    poller._poll(URL)
+
+    client.healthy = False
+    poller._poll(URL)
+    client.healthy = True
+    poller._poll(URL)
+
+    assert client.tool_fetches == 2
+
+
+def test_failed_tool_fetch_keeps_the_catalog_and_reports_no_change():
+    client = FakeClient()
+    changes = []
+    poller = make_poller(client, changes)
+    first = poller.poll_now(URL)
+
+    client.tools = None
+    failed = poller.poll_now(URL)
+
+    assert client.tool_fetches == 2
+    assert (failed["version"], failed["toolgroups"], failed["removed"]) == (1, ["mcp::weather-data"], [])
+    assert failed["catalog_version"] == first["catalog_version"]
+    assert changes == []
@@ -0,0 +1,123 @@
+"""Speculative tool prefetch (prefetch)."""
+import json
+import time
+
+from prefetch import StationDirectory, classify_prompt, parse_station_list, predict_tool_calls
+
+URL = "http://llamastack:8321"
+
+STATION_LIST = json.dumps({"stations": [
+    {"station": "EGLL", "city": "London", "country": "United Kingdom", "station_name": "London Heathrow"},
+    {"station": "RJTT", "city": "Tokyo", "country": "Japan", "station_name": "Tokyo Haneda"},
+    {"station": "VIDP", "city": "New Delhi", "country": "India", "station_name": "Delhi - Indira Gandhi International"},
+    {"station": "ZZZZ"},
+]})
+# What the weather server's list_stations prints today
+STATION_LISTING = """📡 Available Weather Stations
+========================================
+
+Station Codes:
+    1. EGLL
+    2. VIDP
+"""
+STATIONS = parse_station_list(STATION_LIST)
+
+TOOLS = [{"name": name} for name in (
+    "get_current_weather", "list_stations", "get_vacation_balance", "get_employee_info", "create_vacation_request",
+)]
+
+
+def test_parse_station_list_maps_codes_and_places():
+    assert STATIONS == {
+        "egll": "EGLL", "london": "EGLL", "london heathrow": "EGLL",
+        "rjtt": "RJTT", "tokyo": "RJTT", "tokyo haneda": "RJTT",
+        "vidp": "VIDP", "new delhi": "VIDP", "delhi": "VIDP",
+        "zzzz": "ZZZZ",
+    }
+
+
+def test_only_structured_station_lists_are_parsed():
+    assert parse_station_list(json.dumps(["EGLL", {"_id": "VIDP", "city": "New Delhi"}])) == {
+        "egll": "EGLL", "vidp": "VIDP", "new delhi": "VIDP",
+    }
+    assert parse_station_list(STATION_LISTING) is None
+    assert parse_station_list(json.dumps({"total": 2})) is None
+
+
+def test_stations_by_code_and_place_in_prompt_order():
+    calls = classify_prompt("Compare the weather in Tokyo, vidp and London", STATIONS)
+
+    assert calls == [
+        ("get_current_weather", {"station": "RJTT"}),
+        ("get_current_weather", {"station": "VIDP"}),
+        ("get_current_weather", {"station": "EGLL"}),
+    ]
+
+
+def test_unknown_upper_case_words_are_not_stations():
+    assert classify_prompt("Weather as JSON over HTTP ASAP please", STATIONS) == []
+    assert classify_prompt("What's the weather at KJFK?", STATIONS) == []
+
+
+def test_no_station_directory_means_no_station_predictions():
+    assert classify_prompt("Weather in Delhi?") == []
+    assert classify_prompt("Which stations are available?") == [("list_stations", {})]
+
+
+def test_employee_calls():
+    assert classify_prompt("Vacation balance for emp001") == [("get_vacation_balance", {"employee_id": "EMP001"})]
+    assert classify_prompt("Who is EMP002?") == [("get_employee_info", {"employee_id": "EMP002"})]
+
+
+def test_predictions_are_limited_to_offered_cacheable_tools():
+    cacheable = {"get_current_weather", "get_vacation_balance"}.__contains__
+
+    calls = predict_tool_calls("Weather in Delhi, Tokyo and London", TOOLS, cacheable, STATIONS, max_calls=2)
+
+    assert calls == [("get_current_weather", {"station": "VIDP"}), ("get_current_weather", {"station": "RJTT"})]
+    assert predict_tool_calls("Weather in Delhi", TOOLS[1:], cacheable, STATIONS) == []
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_directory_loads_in_the_background_from_list_stations():
+    directory = StationDirectory()
+    calls = []
+
+    def execute(tool_name, tool_args):
+        calls.append(tool_name)
+        return STATION_LIST
+
+    assert directory.aliases(URL, execute) == {}
+    wait_for(lambda: directory.aliases(URL, execute) == STATIONS)
+    assert calls == ["list_stations"]
+
+
+def test_directory_keeps_known_stations_when_a_reload_fails():
+    directory = StationDirectory(ttl=0, retry=60)
+    directory.aliases(URL, lambda name, args: STATION_LIST)
+    wait_for(lambda: directory.aliases(URL, lambda name, args: "Tool execution error: down") == STATIONS)
+    time.sleep(0.05)
+
+    assert directory.aliases(URL, lambda name, args: STATION_LIST) == STATIONS
+
+
+def test_human_readable_station_listing_is_not_retried_until_the_reload():
+    directory = StationDirectory(ttl=60, retry=0)
+    calls = []
+
+    def execute(tool_name, tool_args):
+        calls.append(tool_name)
+        return STATION_LISTING
+
+    directory.aliases(URL, execute)
+    wait_for(lambda: URL not in directory._loading)
+    time.sleep(0.05)
+
+    assert directory.aliases(URL, execute) == {}
+    assert calls == ["list_stations"]
@@ -0,0 +1,55 @@
+"""Tool selection per prompt (catalog.select_tools)."""
+from catalog import select_tools
+
+TOOLS = [
+    {"name": "get_current_weather", "toolgroup_id": "mcp::weather-data",
+     "description": "Latest observation for a weather station",
+     "parameters": {"type": "object", "properties": {"station": {"type": "string"}}}},
+    {"name": "search_weather", "toolgroup_id": "mcp::weather-data",
+     "description": "Search observations by location, condition and temperature"},
+    {"name": "get_vacation_balance", "toolgroup_id": "mcp::hr-tools",
+     "description": "Remaining vacation days of an employee"},
+    {"name": "list_job_openings", "toolgroup_id": "mcp::hr-tools", "description": "Open positions"},
+    {"name": "knowledge_search", "description": "Built-in document search"},
+]
+ALL_GROUPS = {"mcp::weather-data", "mcp::hr-tools"}
+
+
+def names(tools):
+    return [tool["name"] for tool in tools]
+
+
+def test_disabled_toolgroups_are_dropped_but_ungrouped_tools_kept():
+    selected = select_tools(TOOLS, {"mcp::hr-tools"}, top_k=0)
+
+    assert names(selected) == ["get_vacation_balance", "list_job_openings", "knowledge_search"]
+
+
+def test_top_k_ranks_name_hits_above_description_hits():
+    selected = select_tools(TOOLS, ALL_GROUPS, "What's the current weather at the station?", top_k=2)
+
+    assert names(selected) == ["get_current_weather", "search_weather"]
+
+
+def test_parameter_names_count_as_keywords():
+    selected = select_tools(TOOLS, ALL_GROUPS, "which station", top_k=1)
+
+    assert names(selected) == ["get_current_weather"]
+
+
+def test_ties_keep_catalog_order():
+    selected = select_tools(TOOLS, ALL_GROUPS, "weather", top_k=2)
+
+    assert names(selected) == ["get_current_weather", "search_weather"]
+
+
+def test_no_keyword_match_sends_every_enabled_tool():
+    selected = select_tools(TOOLS, ALL_GROUPS, "hello there", top_k=2)
+
+    assert names(selected) == names(TOOLS)
+
+
+def test_small_catalog_is_not_filtered():
+    selected = select_tools(TOOLS[:2], ALL_GROUPS, "vacation", top_k=5)
+
+    assert names(selected) == ["get_current_weather", "search_weather"]
@@ -0,0 +1,94 @@
+"""Bounded per-session transcript memory (session_store.SessionStore)."""
+import os
+import time
+
+from session_store import SessionStore
+
+
+def tool_message():
+    return {"role": "assistant", "content": "Using tools to fetch data...", "tool_calls": [{"name": "search_weather"}]}
+
+
+def test_short_results_stay_inline():
+    store = SessionStore(inline_chars=100)
+    message = tool_message()
+
+    store.add_tool_result("s", message, "VIDP 31°C")
+
+    assert message["tool_result"] == "VIDP 31°C"
+    assert "tool_result_ref" not in message
+
+
+def test_long_results_keep_their_head_and_store_the_rest_compressed():
+    store = SessionStore(inline_chars=10)
+    message = tool_message()
+    result = "observation\n" * 1000
+
+    store.add_tool_result("s", message, result)
+
+    assert message["tool_result"] == result[:10]
+    assert message["tool_result_chars"] == len(result)
+    assert store.get(message["tool_result_ref"]) == result
+    usage = store.usage("s", [message])
+    assert 0 < usage["compressed"] < len(result)
+    assert usage["spilled"] == 0
+
+
+def test_large_results_spill_to_disk_and_are_removed_on_drop(tmp_path):
+    store = SessionStore(inline_chars=10, spill_dir=str(tmp_path), spill_bytes=16)
+    message = tool_message()
+    result = os.urandom(2000).hex()
+
+    store.add_tool_result("s", message, result)
+
+    assert store.get(message["tool_result_ref"]) == result
+    assert store.usage("s", [message])["spilled"] > 0
+    assert len(list(tmp_path.iterdir())) == 1
+    store.drop_session("s")
+    assert store.get(message["tool_result_ref"]) is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_bound_drops_whole_turns_and_releases_their_results():
+    store = SessionStore(inline_chars=5, max_messages=4)
+    messages = []
+    for i in range(3):
+        message = tool_message()
+        store.add_tool_result("s", message, f"result {i} " * 10)
+        messages += [{"role": "user", "content": f"q{i}"}, message, {"role": "assistant", "content": f"a{i}"}]
+    first_ref = messages[1]["tool_result_ref"]
+
+    store.bound(messages)
+
+    assert [m["content"] for m in messages if m["role"] == "user"] == ["q2"]
+    assert store.get(first_ref) is None
+    assert store.get(messages[1]["tool_result_ref"]) is not None
+
+
+def test_idle_sessions_are_compacted():
+    store = SessionStore(inline_chars=5, idle_seconds=0.05, idle_keep=2)
+    message = tool_message()
+    store.add_tool_result("s", message, "long result " * 10)
+    messages = [{"role": "user", "content": "q"}, dict(message, html="<div>cached</div>"),
+                {"role": "assistant", "content": "a"}]
+    store.touch("s", messages)
+    time.sleep(0.1)
+
+    store.evict_idle()
+
+    assert len(messages) == 2
+    assert "html" not in messages[0] and "tool_result_ref" not in messages[0]
+    assert store.stats() == {"sessions": 0, "results": 0, "compressed": 0, "spilled": 0}
+
+
+def test_a_compacted_session_is_told_once_when_it_returns():
+    store = SessionStore(idle_seconds=0.05, idle_keep=1)
+    messages = [{"role": "user", "content": "q"}, {"role": "assistant", "content": "a"}]
+    assert store.touch("s", messages) is False
+    time.sleep(0.1)
+
+    store.evict_idle()
+
+    assert store.touch("s", messages) is True
+    assert store.touch("s", messages) is False
+    assert store.touch("other", []) is False
@@ -0,0 +1,92 @@
+"""Request coalescing (singleflight.SingleFlight)."""
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def run_concurrently(flight, key, fn, callers=5):
+    """Call flight.do from several threads once the first one is in flight."""
+    outcomes = []
+    lock = threading.Lock()
+
+    def call():
+        try:
+            result = ("ok", flight.do(key, fn))
+        except Exception as e:
+            result = ("error", e)
+        with lock:
+            outcomes.append(result)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return ["llama"]
+
+    threads, outcomes = run_concurrently(flight, "models", fetch)
+    wait_until(lambda: flight.coalesced == 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert outcomes == [("ok", ["llama"])] * 5
+
+
+def test_waiters_receive_the_leaders_exception():
+    flight = SingleFlight()
+    release = threading.Event()
+    error = ConnectionError("LlamaStack down")
+
+    def fetch():
+        release.wait(5)
+        raise error
+
+    threads, outcomes = run_concurrently(flight, "tools", fetch, callers=3)
+    wait_until(lambda: flight.coalesced == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes == [("error", error)] * 3
+
+
+def test_sequential_calls_and_distinct_keys_are_not_coalesced():
+    flight = SingleFlight()
+    calls = []
+
+    assert flight.do("a", lambda: calls.append("a") or 1) == 1
+    assert flight.do("a", lambda: calls.append("a") or 2) == 2
+    assert flight.do("b", lambda: calls.append("b") or 3) == 3
+
+    assert calls == ["a", "a", "b"]
+    assert flight.coalesced == 0
+
+
+def test_a_failed_call_does_not_poison_the_key():
+    flight = SingleFlight()
+
+    with pytest.raises(ValueError):
+        flight.do("k", lambda: int("nope"))
+
+    assert flight.do("k", lambda: 42) == 42
@@ -0,0 +1,95 @@
+"""Streamed chat completion parsing (llamastack_client)."""
+import json
+
+from llamastack_client import LlamaStackClient, iter_sse_events, merge_tool_call_deltas
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.read = 0
+
+    def iter_lines(self, decode_unicode=False):
+        for line in self.lines:
+            self.read += 1
+            yield line
+
+    def raise_for_status(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    def __init__(self, response):
+        self.response = response
+
+    def request(self, method, url, **kwargs):
+        return self.response
+
+
+def test_merge_tool_call_deltas_assembles_fragments_by_index():
+    tool_calls = {}
+    merge_tool_call_deltas(tool_calls, [
+        {"index": 0, "id": "call_a", "type": "function", "function": {"name": "get_current_", "arguments": ""}},
+        {"index": 1, "id": "call_b", "function": {"name": "list_stations", "arguments": "{}"}},
+    ])
+    merge_tool_call_deltas(tool_calls, [{"index": 0, "function": {"name": "weather", "arguments": '{"station": '}}])
+    merge_tool_call_deltas(tool_calls, [{"index": 0, "function": {"arguments": '"VIDP"}'}}])
+
+    assert tool_calls[0] == {
+        "id": "call_a",
+        "type": "function",
+        "function": {"name": "get_current_weather", "arguments": '{"station": "VIDP"}'},
+    }
+    assert tool_calls[1]["id"] == "call_b"
+    assert tool_calls[1]["function"] == {"name": "list_stations", "arguments": "{}"}
+
+
+def test_merge_tool_call_deltas_without_index_appends():
+    tool_calls = {}
+    merge_tool_call_deltas(tool_calls, [{"id": "a", "function": {"name": "one"}}])
+    merge_tool_call_deltas(tool_calls, [{"id": "b", "function": {"name": "two"}}])
+
+    assert [tool_calls[i]["function"]["name"] for i in sorted(tool_calls)] == ["one", "two"]
+
+
+def test_iter_sse_events_stops_at_done_and_skips_noise():
+    response = FakeResponse([
+        ": keep-alive",
+        "",
+        'data: {"choices": [{"delta": {"content": "Hel"}}]}',
+        "data: not json",
+        'data: {"choices": [{"delta": {"content": "lo"}}]}',
+        "data: [DONE]",
+        'data: {"choices": [{"delta": {"content": "ignored"}}]}',
+    ])
+    stats = {}
+
+    chunks = list(iter_sse_events(response, stats))
+
+    assert [c["choices"][0]["delta"]["content"] for c in chunks] == ["Hel", "lo"]
+    assert stats["bytes"] > 0
+
+
+def test_stream_stops_between_tool_call_chunks():
+    delta = {"choices": [{"delta": {"tool_calls": [{"index": 0, "function": {"arguments": "{}"}}]}}]}
+    response = FakeResponse([f"data: {json.dumps(delta)}"] * 100 + ["data: [DONE]"])
+    client = LlamaStackClient(session=FakeSession(response))
+    seen = []
+    result = {}
+
+    tokens = list(client.stream_chat_completion(
+        "http://llamastack:8321", {"model": "llama", "messages": []}, result,
+        stop=lambda: seen.append(1) or len(seen) > 2,
+    ))
+
+    assert tokens == []
+    assert response.read == 3
+    assert result == {}
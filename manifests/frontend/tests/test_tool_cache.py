@@ -0,0 +1,105 @@
+"""Shared tool result cache (tool_cache.ToolResultCache)."""
+import threading
+import time
+
+from tool_cache import ToolResultCache, canonical_args
+
+URL = "http://llamastack:8321"
+WEATHER = "mcp::weather-data"
+
+
+class Invoker:
+    def __init__(self, result="VIDP 31°C"):
+        self.result = result
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.result
+
+
+def test_canonical_args_ignore_key_order_and_padding():
+    assert canonical_args({"station": " VIDP ", "hours": 24}) == canonical_args({"hours": 24, "station": "VIDP"})
+    assert canonical_args(None) == "{}"
+
+
+def test_cacheable_results_are_reused_until_they_expire():
+    cache = ToolResultCache(ttls={"get_current_weather": 0.1})
+    invoke = Invoker()
+
+    for _ in range(3):
+        assert cache.call(URL, WEATHER, "get_current_weather", {"station": "VIDP"}, invoke) == "VIDP 31°C"
+    assert invoke.calls == 1
+    time.sleep(0.15)
+    cache.call(URL, WEATHER, "get_current_weather", {"station": "VIDP"}, invoke)
+
+    assert invoke.calls == 2
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["per_tool"]["get_current_weather"] == {"hits": 2, "misses": 2}
+
+
+def test_tools_off_the_allowlist_and_errors_are_not_cached():
+    cache = ToolResultCache(ttls={"get_current_weather": 60})
+    write = Invoker("created")
+    failing = Invoker("Tool execution error: timeout")
+
+    cache.call(URL, "mcp::hr-tools", "create_vacation_request", {}, write)
+    cache.call(URL, "mcp::hr-tools", "create_vacation_request", {}, write)
+    cache.call(URL, WEATHER, "get_current_weather", {}, failing)
+    cache.call(URL, WEATHER, "get_current_weather", {}, failing)
+
+    assert (write.calls, failing.calls) == (2, 2)
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ToolResultCache(ttls={"get_current_weather": 60}, max_entries=2)
+    for station in ("VIDP", "VABB", "VIDP", "RJTT"):
+        cache.call(URL, WEATHER, "get_current_weather", {"station": station}, Invoker(station))
+
+    invoke = Invoker()
+    cache.call(URL, WEATHER, "get_current_weather", {"station": "VABB"}, invoke)
+
+    assert invoke.calls == 1
+    assert cache.stats()["entries"] == 2
+
+
+def test_invalidate_drops_only_the_given_url():
+    cache = ToolResultCache(ttls={"list_stations": 60})
+    other = "http://other:8321"
+    cache.call(URL, WEATHER, "list_stations", {}, Invoker())
+    cache.call(other, WEATHER, "list_stations", {}, Invoker())
+
+    cache.invalidate(URL)
+    here, there = Invoker(), Invoker()
+    cache.call(URL, WEATHER, "list_stations", {}, here)
+    cache.call(other, WEATHER, "list_stations", {}, there)
+
+    assert (here.calls, there.calls) == (1, 0)
+
+
+def test_identical_misses_share_one_invocation():
+    cache = ToolResultCache(ttls={"list_stations": 60})
+    release = threading.Event()
+    calls = []
+
+    def invoke():
+        calls.append(1)
+        release.wait(5)
+        return "stations"
+
+    threads = [
+        threading.Thread(target=cache.call, args=(URL, WEATHER, "list_stations", {}, invoke))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 2
+    while cache.stats()["misses"] < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 4
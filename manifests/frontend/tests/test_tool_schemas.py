@@ -0,0 +1,64 @@
+"""Precomputed tool schemas and request encoding (catalog, llamastack_client)."""
+import json
+
+from catalog import CatalogCache, OpenAITools, format_tools_for_openai, precompute_tool_schemas
+from llamastack_client import chat_payload, encode_payload
+
+URL = "http://llamastack:8321"
+
+TOOLS = [
+    {"name": "get_current_weather", "toolgroup_id": "mcp::weather-data", "description": "Current weather",
+     "parameters": {"type": "object", "properties": {"station": {"type": "string"}}, "required": ["station"]}},
+    {"name": "list_stations", "toolgroup_id": "mcp::weather-data", "description": "All stations"},
+]
+
+
+class FakeClient:
+    def __init__(self, tools):
+        self.tools = tools
+
+    def list_models(self, base_url):
+        return []
+
+    def list_tools(self, base_url):
+        return list(self.tools)
+
+
+def test_encode_payload_splices_fragment_identically_to_json_dumps():
+    schemas = format_tools_for_openai(TOOLS)
+    tools = OpenAITools(schemas, [json.dumps(schema) for schema in schemas])
+    payload = chat_payload("llama", [{"role": "user", "content": "Weather at VIDP?"}], tools)
+
+    assert json.loads(encode_payload(payload)) == json.loads(json.dumps(dict(payload, tools=schemas)))
+
+
+def test_encode_payload_without_fragment_is_plain_json():
+    payload = chat_payload("llama", [{"role": "user", "content": "hi"}], format_tools_for_openai(TOOLS))
+
+    assert encode_payload(payload) == json.dumps(payload).encode()
+
+
+def test_encode_payload_with_only_tools():
+    tools = OpenAITools([], [])
+
+    assert json.loads(encode_payload({"tools": tools})) == {"tools": []}
+
+
+def test_precomputed_schemas_are_reused_per_catalog_version():
+    first = precompute_tool_schemas(TOOLS)
+    renamed = [dict(TOOLS[0], description="Latest observation"), TOOLS[1]]
+
+    assert precompute_tool_schemas(list(TOOLS))["version"] == first["version"]
+    assert precompute_tool_schemas(renamed)["version"] != first["version"]
+    assert set(first["by_name"]) == {"get_current_weather", "list_stations"}
+
+
+def test_openai_tools_use_precomputed_and_convert_unknown_tools():
+    cache = CatalogCache(FakeClient(TOOLS))
+    unknown = {"name": "retired_tool", "description": "From an older catalog"}
+
+    tools = cache.get_openai_tools(URL, [TOOLS[1], unknown])
+
+    assert [t["function"]["name"] for t in tools] == ["list_stations", "retired_tool"]
+    assert json.loads(tools.json_fragment) == list(tools)
+    assert tools[0] is cache.get_openai_tools(URL, [TOOLS[1]])[0]
@@ -0,0 +1,47 @@
+"""Incremental transcript rendering (transcript.message_html, split_transcript)."""
+from transcript import RESULT_PREVIEW_CHARS, message_html, split_transcript
+
+
+def test_message_html_is_rendered_once_and_cached():
+    message = {
+        "role": "assistant",
+        "content": "Using tools to fetch data...",
+        "tool_calls": [{"name": "get_current_weather", "args": {"station": "VIDP"}}],
+        "tool_result": "x" * (RESULT_PREVIEW_CHARS + 100),
+    }
+
+    html = message_html(message)
+    message["tool_calls"] = []
+
+    assert message_html(message) is html
+    assert "🔧 Tool Call: get_current_weather" in html
+    assert '"station": "VIDP"' in html
+    assert "x" * RESULT_PREVIEW_CHARS + "..." in html
+    assert "x" * (RESULT_PREVIEW_CHARS + 1) not in html
+
+
+def test_plain_messages_have_no_tool_html():
+    assert message_html({"role": "user", "content": "hi"}) == ""
+
+
+def test_split_keeps_short_transcripts_whole():
+    messages = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+
+    assert split_transcript(messages, recent=5) == ([], messages)
+    assert split_transcript(messages, recent=0) == ([], messages)
+
+
+def test_split_never_cuts_a_turn_in_half():
+    messages = []
+    for i in range(5):
+        messages += [
+            {"role": "user", "content": f"q{i}"},
+            {"role": "assistant", "content": "Using tools to fetch data..."},
+            {"role": "assistant", "content": f"a{i}"},
+        ]
+
+    older, recent = split_transcript(messages, recent=4)
+
+    assert older + recent == messages
+    assert recent[0] == {"role": "user", "content": "q3"}
+    assert len(recent) == 6
@@ -0,0 +1,147 @@
+"""Background chat turns (turns.ChatTurn, run_turn, turn_transcript)."""
+import json
+import threading
+
+from session_store import SessionStore
+from turns import ChatTurn, run_turn, turn_transcript
+
+URL = "http://llamastack:8321"
+
+
+class FakeClient:
+    """Blocking completions only: one tool round, then an answer."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def chat_completion(self, base_url, payload):
+        self.calls += 1
+        if self.calls == 1:
+            return {"choices": [{"message": {"role": "assistant", "content": None, "tool_calls": [
+                {"id": "call_1", "function": {"name": "get_current_weather",
+                                              "arguments": json.dumps({"station": "VIDP"})}}
+            ]}}]}
+        return {"choices": [{"message": {"role": "assistant", "content": "31°C in Delhi."}}]}
+
+
+def run(turn, client=None):
+    return run_turn(
+        turn, client or FakeClient(), URL, "llama",
+        api_messages=[{"role": "user", "content": "Weather in Delhi?"}],
+        tools=[{"type": "function"}],
+        execute_tool=lambda name, args: f"{args['station']}: 31°C",
+        stream=False,
+    )
+
+
+def test_worker_records_the_finished_turn_once():
+    store = SessionStore(inline_chars=1000)
+    recorded = []
+
+    def record(turn):
+        entries = turn_transcript(turn, store, "session")
+        recorded.append(entries)
+        return entries
+
+    turn = ChatTurn(record=record)
+    run(turn)
+
+    assert len(recorded) == 1
+    entries = turn.settle()
+    assert entries is recorded[0]
+    assert len(recorded) == 1
+    assert [m["content"] for m in entries] == ["Using tools to fetch data...", "31°C in Delhi."]
+    assert entries[0]["tool_calls"] == [{"name": "get_current_weather", "args": {"station": "VIDP"}}]
+    assert entries[0]["tool_result"] == "VIDP: 31°C"
+    assert "html" in entries[0]
+    assert entries[1]["summary"].startswith("⏱️ 1 tool round")
+
+
+def test_settle_is_recorded_by_whoever_comes_first():
+    recorded = []
+    turn = ChatTurn(record=lambda t: recorded.append(t.result()) or [{"role": "assistant", "content": "x"}])
+    turn.cancel()
+
+    # The UI gives up on the stopped turn before the worker gets to it
+    assert turn.settle() == [{"role": "assistant", "content": "x"}]
+    run(turn)
+
+    assert len(recorded) == 1
+    assert recorded[0]["stop_reason"] == "stopped"
+
+
+def test_concurrent_settle_records_once():
+    release = threading.Event()
+    recorded = []
+
+    def record(turn):
+        release.wait(5)
+        recorded.append(1)
+        return []
+
+    turn = ChatTurn(record=record)
+    threads = [threading.Thread(target=turn.settle) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert recorded == [1]
+
+
+def test_recording_errors_do_not_break_the_turn():
+    def record(turn):
+        raise RuntimeError("store down")
+
+    outcome = run(ChatTurn(record=record))
+
+    assert outcome["content"] == "31°C in Delhi."
+
+
+def test_transcript_of_failed_and_stopped_turns():
+    store = SessionStore()
+    failed = ChatTurn()
+    failed.finish({"error": "503", "stop_reason": "error", "steps": []})
+    stopped = ChatTurn()
+    stopped.append_partial("It is")
+    stopped.cancel()
+
+    assert turn_transcript(failed, store, "s") == [
+        {"role": "assistant", "content": "Sorry, I encountered an error: 503"}
+    ]
+    assert turn_transcript(stopped, store, "s") == [
+        {"role": "assistant", "content": "It is", "notice": "⏹️ Stopped by user", "summary": ""}
+    ]
+
+
+class StreamingToolCalls:
+    """Streams tool-call deltas only (no content tokens) until told to stop."""
+
+    def __init__(self, turn):
+        self.turn = turn
+        self.chunks = 0
+
+    def stream_chat_completion(self, base_url, payload, result, stop=None):
+        for _ in range(1000):
+            if stop is not None and stop():
+                return
+            self.chunks += 1
+            if self.chunks == 3:
+                self.turn.cancel()
+        result["choices"] = [{"message": {"role": "assistant", "content": None}}]
+        yield from ()
+
+
+def test_a_stopped_turn_leaves_the_stream_between_chunks():
+    turn = ChatTurn()
+    client = StreamingToolCalls(turn)
+
+    outcome = run_turn(
+        turn, client, URL, "llama", api_messages=[{"role": "user", "content": "Weather?"}],
+        tools=None, execute_tool=lambda name, args: "", stream=True,
+    )
+
+    assert client.chunks == 3
+    assert outcome["stop_reason"] == "stopped"
+    assert turn.done
@@ -0,0 +1,138 @@
+"""
+MCP tool result cache
+Process-wide cache of read-only tool invocations shared by all sessions.
+
+Only tools on the allowlist are cached, each with its own TTL, and identical
+calls that miss at the same time share a single invocation. Entries are
+keyed by LlamaStack URL, toolgroup, tool name and canonicalized arguments, so
+"get_current_weather(station='VIDP')" asked by several users within a few
+minutes reaches the tool runtime (and MongoDB) once.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
+
+from singleflight import SingleFlight
+
+# Read-only tools that are safe to cache, with their TTL in seconds.
+# Override with TOOL_CACHE_TTLS='{"tool_name": seconds, ...}' ({} disables caching).
+DEFAULT_TOOL_CACHE_TTLS = {
+    "get_current_weather": 300,
+    "search_weather": 300,
+    "list_stations": 3600,
+    "get_statistics": 600,
+    "get_employee_info": 600,
+    "get_vacation_balance": 60,
+    "list_employees": 600,
+    "list_job_openings": 900,
+}
+TOOL_CACHE_TTLS = json.loads(os.getenv("TOOL_CACHE_TTLS", json.dumps(DEFAULT_TOOL_CACHE_TTLS)))
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "512"))
+
+# Results that report a failure are never cached
+ERROR_PREFIXES = ("Tool execution error", "❌")
+
+
+def canonical_args(tool_args: Dict) -> str:
+    """Stable string form of tool arguments (sorted keys, trimmed strings)."""
+    def normalize(value):
+        if isinstance(value, str):
+            return value.strip()
+        if isinstance(value, dict):
+            return {k: normalize(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [normalize(v) for v in value]
+        return value
+    return json.dumps(normalize(tool_args or {}), sort_keys=True, separators=(",", ":"), default=str)
+
+
+class ToolResultCache:
+    """LRU + per-tool TTL cache of tool results, with hit/miss counters."""
+
+    def __init__(self, ttls: Dict[str, float] = None, max_entries: int = TOOL_CACHE_MAX_ENTRIES):
+        self.ttls = dict(TOOL_CACHE_TTLS if ttls is None else ttls)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, Tuple[float, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.per_tool: Dict[str, Dict[str, int]] = {}
+        # Identical misses in flight at once reach the tool runtime once
+        self._flight = SingleFlight()
+
+    def is_cacheable(self, tool_name: str) -> bool:
+        return self.ttls.get(tool_name, 0) > 0
+
+    def _count(self, tool_name: str, outcome: str):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+            counts = self.per_tool.setdefault(tool_name, {"hits": 0, "misses": 0})
+            counts[outcome] += 1
+
+    def get(self, key: Tuple):
+        """Cached result for key, or None if missing/expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, result = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return result
+
+    def put(self, key: Tuple, result: str, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def call(self, base_url: str, toolgroup_id: str, tool_name: str, tool_args: Dict,
+             invoke: Callable[[], str]) -> str:
+        """Return the cached result for this call, or invoke the tool and cache it."""
+        if not self.is_cacheable(tool_name):
+            return invoke()
+
+        key = (base_url, toolgroup_id or "", tool_name, canonical_args(tool_args))
+        result = self.get(key)
+        if result is not None:
+            self._count(tool_name, "hits")
+            return result
+
+        self._count(tool_name, "misses")
+        return self._flight.do(key, lambda: self._invoke_and_store(key, tool_name, invoke))
+
+    def _invoke_and_store(self, key: Tuple, tool_name: str, invoke: Callable[[], str]) -> str:
+        result = invoke()
+        if not result.startswith(ERROR_PREFIXES):
+            self.put(key, result, self.ttls[tool_name])
+        return result
+
+    def invalidate(self, base_url: str = None):
+        """Drop cached results for base_url (or everything).
+
+        app.py calls this on "🔄 Refresh" and when the poller sees the tool
+        catalog change, since a redeployed MCP server may answer differently.
+        """
+        with self._lock:
+            for key in list(self._entries):
+                if base_url is None or key[0] == base_url:
+                    del self._entries[key]
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "coalesced": self._flight.coalesced,
+                "per_tool": {name: dict(counts) for name, counts in self.per_tool.items()},
+            }
@@ -0,0 +1,60 @@
+"""
+Chat transcript rendering
+Pre-rendered HTML for transcript entries and windowing of older turns.
+
+Every rerun replays the whole transcript, so the tool call/result boxes of a
+message are built once (json.dumps + HTML assembly) and cached on the message
+itself; only the newest turns are rendered by default and older ones are shown
+on demand, keeping rerun cost roughly constant as a session grows.
+"""
+import json
+import os
+from typing import Dict, List, Tuple
+
+# Messages rendered by default; older turns are collapsed behind a toggle
+TRANSCRIPT_RECENT_MESSAGES = int(os.getenv("TRANSCRIPT_RECENT_MESSAGES", "20"))
+# Characters of a tool result shown in the UI
+RESULT_PREVIEW_CHARS = 500
+
+
+def tool_call_html(header: str, tool_args: Dict) -> str:
+    return f"""
+    <div class="tool-call-box">
+        <div class="tool-call-header">{header}</div>
+        <div class="tool-call-content">{json.dumps(tool_args, indent=2)}</div>
+    </div>
+    """
+
+
+def tool_result_html(header: str, result: str) -> str:
+    result_preview = result[:RESULT_PREVIEW_CHARS] + "..." if len(result) > RESULT_PREVIEW_CHARS else result
+    return f"""
+    <div class="tool-result-box">
+        <div class="tool-result-header">{header}</div>
+        <div class="tool-result-content">{result_preview}</div>
+    </div>
+    """
+
+
+def message_html(message: Dict) -> str:
+    """Tool call/result boxes of a transcript entry, rendered once and cached on it."""
+    if "html" not in message:
+        parts = [
+            tool_call_html(f"🔧 Tool Call: {tc.get('name', 'unknown')}", tc.get("args", {}))
+            for tc in message.get("tool_calls") or []
+        ]
+        if message.get("tool_result"):
+            parts.append(tool_result_html("📊 Tool Result", message["tool_result"]))
+        message["html"] = "".join(parts)
+    return message["html"]
+
+
+def split_transcript(messages: List[Dict],
+                     recent: int = TRANSCRIPT_RECENT_MESSAGES) -> Tuple[List[Dict], List[Dict]]:
+    """Split into (older, recent) messages, never cutting a turn in half."""
+    if not recent or len(messages) <= recent:
+        return [], messages
+    start = len(messages) - recent
+    while start > 0 and messages[start]["role"] != "user":
+        start -= 1
+    return messages[:start], messages[start:]
@@ -0,0 +1,268 @@
+"""
+Background chat turns
+Runs each user turn on a shared worker pool instead of the Streamlit script
+thread.
+
+The script thread only starts a ChatTurn and then polls it from a fragment:
+a slow LLM or tool call no longer pins a script run for minutes, other
+widgets stay responsive, and the user can stop the turn. Workers never touch
+st.session_state; everything the turn needs is resolved up front and its
+progress is published as events the UI replays. A finished turn records its
+own transcript entries (see ChatTurn.settle), so the answer is kept even when
+the tab was closed mid-turn.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from agent import dispatch_tool_calls, run_agent_loop, summarize_steps, TOOL_TURN_DEADLINE
+from llamastack_client import LlamaStackClient, chat_payload
+from session_store import SessionStore
+from transcript import message_html
+
+# Max chat turns executing at once in this process (others queue)
+TURN_WORKERS = int(os.getenv("TURN_WORKERS", "16"))
+# Hard wall-clock deadline for a whole turn, queueing included
+TURN_DEADLINE = float(os.getenv("TURN_DEADLINE_SECONDS", "300"))
+
+# Caption shown under an answer that ended before the model was done, by stop_reason
+STOP_NOTICES = {
+    "stopped": "⏹️ Stopped by user",
+    "deadline": "⏱️ Turn deadline reached",
+    "step budget": "⚠️ Stopped calling tools: step budget reached",
+    "time budget": "⚠️ Stopped calling tools: time budget reached",
+    "token budget": "⚠️ Stopped calling tools: token budget reached",
+    "repeated tool calls": "⚠️ Stopped calling tools: the model repeated the same calls",
+}
+
+
+class TurnCancelled(Exception):
+    """Raised inside a worker once its turn was stopped or ran out of time."""
+
+
+class ChatTurn:
+    """Progress and outcome of one user turn running on a worker thread."""
+
+    def __init__(self, deadline: float = TURN_DEADLINE,
+                 record: Callable[["ChatTurn"], List[Dict]] = None):
+        self.created_at = time.monotonic()
+        self.deadline_at = self.created_at + deadline
+        self.status = "queued"
+        self.partial = ""
+        self.outcome: Optional[Dict] = None
+        self._events: List[Dict] = []
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        # Builds (and persists) the turn's transcript entries; see settle()
+        self._record = record
+        self._settle_lock = threading.Lock()
+        self._entries: Optional[List[Dict]] = None
+
+    # --- worker side ---
+    def emit(self, event_type: str, **data):
+        with self._lock:
+            self._events.append(dict(data, type=event_type))
+
+    def append_partial(self, token: str):
+        with self._lock:
+            self.partial += token
+
+    def reset_partial(self):
+        with self._lock:
+            self.partial = ""
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline_at - time.monotonic())
+
+    @property
+    def stopped(self) -> bool:
+        """True if the user asked to stop the turn."""
+        return self._cancel.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set() or self.remaining() <= 0
+
+    def check(self):
+        """Abort the worker if the turn was stopped or its deadline passed."""
+        if self.cancelled:
+            raise TurnCancelled()
+
+    def finish(self, outcome: Dict):
+        self.outcome = outcome
+        self.status = "done"
+        self._done.set()
+
+    # --- UI side ---
+    def cancel(self):
+        """Ask the worker to stop at its next checkpoint."""
+        self._cancel.set()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def settled(self) -> bool:
+        """True once the UI can stop waiting: finished, stopped or past its deadline.
+
+        A worker blocked on a slow request only notices cancellation at its
+        next checkpoint; the UI doesn't wait for that.
+        """
+        return self.done or self.cancelled
+
+    def result(self) -> Dict:
+        """The turn's outcome, or what was produced so far if it was abandoned."""
+        if self.outcome is not None:
+            return self.outcome
+        with self._lock:
+            partial = self.partial
+        return {"content": partial, "stop_reason": "stopped" if self.stopped else "deadline", "steps": []}
+
+    def events(self) -> List[Dict]:
+        with self._lock:
+            return list(self._events)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.created_at
+
+    # --- either side ---
+    def settle(self) -> List[Dict]:
+        """The turn's transcript entries, recorded exactly once.
+
+        The worker settles a turn as soon as it completes, so its answer is
+        stored even if nobody is polling anymore (the tab was closed); the UI
+        settles it itself when it stops waiting first (stop or deadline).
+        Whoever comes second gets the same entries without recording again.
+        """
+        with self._settle_lock:
+            if self._entries is None:
+                self._entries = self._record(self) if self._record else []
+            return self._entries
+
+
+def run_turn(turn: ChatTurn, client: LlamaStackClient, base_url: str, model_id: str,
+             api_messages: List[Dict], tools: Optional[List[Dict]],
+             execute_tool: Callable[[str, Dict], str], stream: bool = True,
+             prefetch: List[Tuple[str, Dict]] = ()) -> Dict:
+    """Drive the agent loop for one turn, publishing progress on ``turn``.
+
+    ``prefetch`` calls are started alongside the first completion; they only
+    pay off when ``execute_tool`` caches results (see prefetch.py).
+    """
+
+    def complete(messages, tools, tool_choice, step):
+        turn.check()
+        turn.emit("thinking", step=step)
+        turn.reset_partial()
+        payload = chat_payload(model_id, messages, tools, tool_choice)
+        if not stream:
+            return client.chat_completion(base_url, payload)
+
+        result = {}
+        # Checked on every chunk, so a stopped turn frees its worker mid-stream
+        tokens = client.stream_chat_completion(base_url, payload, result, stop=lambda: turn.cancelled)
+        try:
+            for token in tokens:
+                if turn.cancelled:
+                    break
+                turn.append_partial(token)
+        finally:
+            # Closing the generator also closes the streaming HTTP response
+            tokens.close()
+        turn.check()
+        return result
+
+    def execute(tool_calls):
+        turn.check()
+        return dispatch_tool_calls(
+            tool_calls, execute_tool,
+            deadline=min(TOOL_TURN_DEADLINE, turn.remaining())
+        )
+
+    turn.status = "running"
+    for tool_name, tool_args in prefetch:
+        threading.Thread(
+            target=prefetch_tool, args=(execute_tool, tool_name, tool_args),
+            name="tool-prefetch", daemon=True
+        ).start()
+    try:
+        outcome = run_agent_loop(
+            api_messages,
+            tools,
+            complete=complete,
+            execute=execute,
+            on_tool_calls=lambda step, calls: turn.emit("tool_calls", step=step, calls=calls),
+            on_tool_results=lambda step, calls, results: turn.emit(
+                "tool_results", step=step, calls=calls, results=results
+            )
+        )
+    except TurnCancelled:
+        outcome = {
+            "content": turn.partial,
+            "stop_reason": "stopped" if turn.stopped else "deadline",
+            "steps": [],
+        }
+    except Exception as e:
+        outcome = {"error": str(e), "stop_reason": "error", "steps": []}
+    turn.finish(outcome)
+    try:
+        turn.settle()
+    except Exception as e:
+        print(f"⚠️ Recording a finished turn failed: {e}")
+    return outcome
+
+
+def turn_transcript(turn: ChatTurn, session_store: SessionStore, session_id: str) -> List[Dict]:
+    """Transcript entries of a settled turn: one per tool round, then the answer.
+
+    Long tool results keep only their head inline; session_store holds the rest.
+    """
+    entries = []
+    for event in turn.events():
+        if event["type"] == "tool_results":
+            message = {
+                "role": "assistant",
+                "content": "Using tools to fetch data...",
+                "tool_calls": [{"name": tool_name, "args": tool_args} for tool_name, tool_args in event["calls"]],
+            }
+            session_store.add_tool_result(session_id, message, "\n".join(event["results"]))
+            message_html(message)  # render the tool boxes once, not on every rerun
+            entries.append(message)
+
+    outcome = turn.result()
+    if "error" in outcome:
+        entries.append({
+            "role": "assistant",
+            "content": f"Sorry, I encountered an error: {outcome['error']}"
+        })
+    else:
+        entries.append({
+            "role": "assistant",
+            "content": outcome["content"],
+            "notice": STOP_NOTICES.get(outcome["stop_reason"], ""),
+            "summary": summarize_steps(outcome["steps"]) if outcome["steps"] else ""
+        })
+    return entries
+
+
+def prefetch_tool(execute_tool: Callable[[str, Dict], str], tool_name: str, tool_args: Dict):
+    """Run a speculative tool call; its result is only kept by the cache."""
+    try:
+        execute_tool(tool_name, tool_args)
+    except Exception as e:
+        print(f"⚠️ Prefetching {tool_name} failed: {e}")
+
+
+def start_turn(executor: ThreadPoolExecutor, turn: ChatTurn, **kwargs) -> ChatTurn:
+    """Queue a turn on the shared executor and return it for polling."""
+    executor.submit(run_turn, turn, **kwargs)
+    return turn
+
+
+def create_turn_executor(max_workers: int = TURN_WORKERS) -> ThreadPoolExecutor:
+    """Process-wide pool that runs chat turns for every session."""
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chat-turn")
@@ -16,14 +16,87 @@ from datetime import datetime, timedelta
 from mcp.server.fastmcp import FastMCP
 from mcp.server.transport_security import TransportSecuritySettings
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import OperationFailure
 import json
 import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
 
 # Server configuration from environment
 SERVER_NAME = os.getenv("MCP_SERVER_NAME", "weather-data")
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://mongodb:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "weather")
 COLLECTION_NAME = os.getenv("COLLECTION_NAME", "observations")
+# Materialized per-station summary (observation count, first/last observation)
+SUMMARY_COLLECTION = os.getenv("SUMMARY_COLLECTION", f"{COLLECTION_NAME}_stations")
+# Seconds between background refreshes of the station summary
+SUMMARY_REFRESH_SECONDS = float(os.getenv("SUMMARY_REFRESH_SECONDS", "60"))
+# Cached results of get_current_weather/list_stations/get_statistics
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "300"))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "256"))
+# Invalidate cached results on every write via a change stream (replica sets only)
+RESULT_CACHE_CHANGE_STREAM = os.getenv("RESULT_CACHE_CHANGE_STREAM", "true").lower() == "true"
+# Backoff between attempts to reopen a lost change stream, doubling up to the maximum
+CHANGE_STREAM_RETRY_SECONDS = 1.0
+CHANGE_STREAM_RETRY_MAX_SECONDS = 60.0
+# Server error codes meaning change streams are not available at all (standalone MongoDB)
+NO_CHANGE_STREAM_CODES = (40573,)
+# How long the station/conditions vocabulary used to resolve search terms is reused
+VOCABULARY_TTL_SECONDS = float(os.getenv("VOCABULARY_TTL_SECONDS", "300"))
+
+# Default output of search_weather/get_current_weather: one table row per observation
+COMPACT_OUTPUT = os.getenv("COMPACT_OUTPUT", "false").lower() == "true"
+
+# Ensure indexes and migrate documents to the canonical schema at startup
+MANAGE_SCHEMA = os.getenv("MANAGE_SCHEMA", "true").lower() == "true"
+# Records which schema version a collection was migrated to, so restarts skip the migration scans
+SCHEMA_COLLECTION = os.getenv("SCHEMA_COLLECTION", "schema_migrations")
+# Bump whenever migrate_documents learns a new rewrite
+SCHEMA_VERSION = 1
+
+# observed_at (BSON datetime) is the one canonical time field
+NEWEST_FIRST = [("observed_at", DESCENDING)]
+
+# Displayed fields and the other names some feeds use for them, in priority order
+FIELD_ALIASES = {
+    "station": ("station", "stationICAO"),
+    "station_name": ("station_name", "stationIATA"),
+    "observed_at": ("observed_at", "timestamp"),
+    "temperature": ("temperature", "airTemperature", "temp"),
+    "dewpoint": ("dewpoint", "dewpointTemperature", "dew_point"),
+    "humidity": ("humidity", "relative_humidity"),
+    "wind_speed": ("wind_speed", "windSpeed"),
+    "wind_direction": ("wind_direction", "windDirection"),
+    "visibility": ("visibility", "horizontalVisibility"),
+    "pressure": ("pressure", "observedQNH", "sea_level_pressure"),
+    "clouds": ("clouds", "cloudLayers", "cloud_cover"),
+    "conditions": ("conditions", "weatherConditions", "weather"),
+}
+# alias -> (canonical field, priority), precomputed once
+ALIAS_FIELDS = {alias: (field, rank) for field, aliases in FIELD_ALIASES.items() for rank, alias in enumerate(aliases)}
+# search_weather and get_current_weather fetch only what they display
+DISPLAY_PROJECTION = {"_id": 0, **{alias: 1 for alias in ALIAS_FIELDS}}
+COMPACT_HEADER = "Station | Observed (UTC) | Temp °C | Humidity % | Wind | Visibility m | Pressure hPa | Weather"
+
+# Indexes the server manages, by name: filter field first, then the newest-first sort
+MANAGED_INDEXES = {
+    "station_observed_at": [("station", ASCENDING), ("observed_at", DESCENDING)],
+    "conditions_observed_at": [("conditions", ASCENDING), ("observed_at", DESCENDING)],
+    "observed_at": [("observed_at", DESCENDING)],
+}
+# Indexes made redundant by (or replaced with) the ones above, or never queried
+# (city/country are matched against the station summary, not the observations)
+OBSOLETE_INDEXES = (
+    "station_1", "conditions_1", "timestamp_1", "observed_at_1", "station_observed_at_current",
+    "city_1", "country_1",
+)
+
+# Station fields a free-text location is matched against
+LOCATION_FIELDS = ("city", "region", "country", "location", "station_name")
 
 # Disable DNS rebinding protection for Kubernetes deployments
 # This is required when the server receives requests with K8s service hostnames
@@ -34,10 +107,84 @@ transport_security = TransportSecuritySettings(
 # Initialize FastMCP server
 mcp = FastMCP(SERVER_NAME, transport_security=transport_security)
 
+
+
+class ResultCache:
+    """LRU cache of tool results with a TTL, shared by every MCP session.
+    
+    Concurrent misses for the same key await one shared computation, so a
+    burst of identical tool calls costs a single database round trip. The
+    computation runs as its own task: a caller that is cancelled stops
+    waiting without cancelling it for the others. invalidate() drops
+    everything, including computations still running, so a result read
+    before a change is never served to a later call.
+    """
+    
+    def __init__(self, max_entries: int = RESULT_CACHE_MAX_ENTRIES, ttl: float = RESULT_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    async def get(self, key: tuple, compute) -> Any:
+        """Cached result for key, or the result of awaiting compute()."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return await asyncio.shield(entry[1])
+        
+        self.misses += 1
+        task = asyncio.ensure_future(compute())
+        self._store(key, task)
+        task.add_done_callback(lambda done: self._settle(key, done))
+        return await asyncio.shield(task)
+    
+    def _settle(self, key: tuple, task: asyncio.Future):
+        # Errors are not cached; callers already waiting get the error too
+        if task.cancelled() or task.exception() is not None:
+            self._discard(key, task)
+    
+    def _store(self, key: tuple, future: asyncio.Future):
+        self._entries[key] = (time.monotonic() + self.ttl, future)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _discard(self, key: tuple, future: asyncio.Future):
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] is future:
+            del self._entries[key]
+    
+    def invalidate(self):
+        if self._entries:
+            self.invalidations += 1
+        self._entries.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "invalidations": self.invalidations}
+
+
+result_cache = ResultCache()
+
 # Global MongoDB client
 client = None
 db = None
 
+# Newest observation _id folded into the station summary (None: not known yet)
+summary_watermark = None
+summary_lock = asyncio.Lock()
+# Background tasks, held so they are not garbage collected
+background_tasks = []
+
+# Known stations (code -> name/city/country) and condition values
+vocabulary_cache = None
+vocabulary_loaded_at = 0.0
+vocabulary_lock = asyncio.Lock()
+
 
 async def get_mongodb_client():
     """Get MongoDB client connection."""
@@ -45,77 +192,408 @@ async def get_mongodb_client():
     if client is None:
         client = AsyncIOMotorClient(MONGODB_URL)
         db = client[DATABASE_NAME]
+        loop = asyncio.get_running_loop()
+        background_tasks.append(loop.create_task(keep_summary_fresh()))
+        if RESULT_CACHE_CHANGE_STREAM:
+            background_tasks.append(loop.create_task(invalidate_on_changes()))
     return client, db
 
 
-def format_weather_observation(doc: Dict) -> str:
-    """Format a weather observation into a readable string."""
-    station = doc.get('station', doc.get('stationICAO', 'Unknown'))
-    station_name = doc.get('station_name', doc.get('stationIATA', ''))
-    timestamp = doc.get('timestamp', doc.get('observed_at', 'Unknown'))
-    
-    result = f"📍 Station: {station}"
-    if station_name:
-        result += f" ({station_name})"
-    result += f"\n🕐 Observed: {timestamp}\n"
+async def invalidate_on_changes():
+    """Clear the result cache on every write to the observations.
     
-    # Handle various data formats - flat structure
-    result += format_conditions(doc)
+    A lost stream is reopened with exponential backoff, and the cache is
+    cleared each time it opens since writes made in between went unseen.
+    Change streams need a replica set; on a standalone MongoDB the cache is
+    invalidated when the station summary refresh sees new observations.
+    """
+    delay = CHANGE_STREAM_RETRY_SECONDS
+    while True:
+        try:
+            async with db[COLLECTION_NAME].watch() as stream:
+                result_cache.invalidate()
+                delay = CHANGE_STREAM_RETRY_SECONDS
+                async for _ in stream:
+                    result_cache.invalidate()
+        except OperationFailure as e:
+            if e.code in NO_CHANGE_STREAM_CODES:
+                print(f"ℹ️  No change stream ({e}); cached results refresh with the station summary")
+                return
+            print(f"⚠️  Change stream failed ({e}); reopening in {delay:.0f}s")
+        except Exception as e:
+            print(f"⚠️  Change stream lost ({e}); reopening in {delay:.0f}s")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, CHANGE_STREAM_RETRY_MAX_SECONDS)
+
+
+# Summary document recording the watermark, so a restart resumes instead of rebuilding
+SUMMARY_WATERMARK_ID = "_watermark"
+# The per-station rows of the summary collection
+STATION_ROWS = {"_id": {"$nin": [None, SUMMARY_WATERMARK_ID]}}
+
+# Newest first per station, the order of the station_observed_at index (so a
+# rebuild needs no in-memory sort), and $first picks each station's newest values
+SUMMARY_SORT = {"$sort": {"station": ASCENDING, "observed_at": DESCENDING}}
+# One summary row per station, grouped from observations
+SUMMARY_GROUP = {"$group": {
+    "_id": "$station",
+    "count": {"$sum": 1},
+    "first_observed_at": {"$min": "$observed_at"},
+    "last_observed_at": {"$max": "$observed_at"},
+    **{field: {"$first": f"${field}"} for field in LOCATION_FIELDS},
+}}
+
+
+async def summary_total(db) -> int:
+    rows = await db[SUMMARY_COLLECTION].aggregate([
+        {"$group": {"_id": None, "total": {"$sum": "$count"}}}
+    ]).to_list(length=1)
+    return rows[0]["total"] if rows else 0
+
+
+async def summary_reconciled(db, upto) -> bool:
+    """True if the summary counts exactly the observations with _id <= upto.
+
+    The cheap estimated count settles the common case; it also counts
+    observations inserted after upto was read, so a mismatch is checked
+    against an exact count before the summary is declared out of date.
+    """
+    collection = db[COLLECTION_NAME]
+    total = await summary_total(db)
+    if total == await collection.estimated_document_count():
+        return True
+    return total == await collection.count_documents({"_id": {"$lte": upto}})
+
+
+async def refresh_station_summary(db):
+    """Fold observations inserted since the last refresh into the station summary.
     
-    return result
+    Observations are folded in _id (insertion) order, so a refresh only
+    aggregates the new ones. The watermark is saved with the summary, so a
+    restart picks up where the last refresh stopped. The summary is rebuilt
+    from scratch when there is no watermark yet, and whenever its total stops
+    matching the number of observations up to the watermark (observations
+    were deleted or reloaded). Observations inserted while a refresh runs lie
+    past the watermark and are folded in by the next one.
+    """
+    global summary_watermark
+    async with summary_lock:
+        collection, summary = db[COLLECTION_NAME], db[SUMMARY_COLLECTION]
+        newest = await collection.find_one({}, projection={"_id": 1}, sort=[("_id", DESCENDING)])
+        if newest is None:
+            await summary.delete_many({})
+            if summary_watermark is not None:
+                result_cache.invalidate()
+            summary_watermark = None
+            return
+        upto = newest["_id"]
+        
+        if summary_watermark is None:
+            saved = await summary.find_one({"_id": SUMMARY_WATERMARK_ID})
+            if saved is not None:
+                summary_watermark = saved["upto"]
+        
+        if summary_watermark is not None:
+            if upto != summary_watermark:
+                # New observations: cached tool results may be out of date
+                result_cache.invalidate()
+                async for row in collection.aggregate([
+                    {"$match": {"_id": {"$gt": summary_watermark, "$lte": upto}}}, SUMMARY_SORT, SUMMARY_GROUP
+                ], allowDiskUse=True):
+                    await summary.update_one({"_id": row["_id"]}, {
+                        "$inc": {"count": row["count"]},
+                        "$min": {"first_observed_at": row["first_observed_at"]},
+                        "$max": {"last_observed_at": row["last_observed_at"]},
+                        "$set": {field: row.get(field) for field in LOCATION_FIELDS},
+                    }, upsert=True)
+            if await summary_reconciled(db, upto):
+                if upto != summary_watermark:
+                    await summary.update_one({"_id": SUMMARY_WATERMARK_ID}, {"$set": {"upto": upto}}, upsert=True)
+                    summary_watermark = upto
+                return
+        
+        await collection.aggregate([
+            {"$match": {"_id": {"$lte": upto}}}, SUMMARY_SORT, SUMMARY_GROUP, {"$out": SUMMARY_COLLECTION}
+        ], allowDiskUse=True).to_list(length=None)
+        # $out replaced the whole collection, watermark included
+        await summary.update_one({"_id": SUMMARY_WATERMARK_ID}, {"$set": {"upto": upto}}, upsert=True)
+        result_cache.invalidate()
+        summary_watermark = upto
+
+
+async def keep_summary_fresh():
+    """Background task refreshing the station summary every SUMMARY_REFRESH_SECONDS."""
+    while True:
+        try:
+            await refresh_station_summary(db)
+        except Exception as e:
+            print(f"⚠️  Station summary refresh failed: {e}")
+        await asyncio.sleep(SUMMARY_REFRESH_SECONDS)
+
 
+async def get_station_summary(db) -> List[Dict]:
+    """Summary rows sorted by station code; built on the spot if there is none yet."""
+    summary = db[SUMMARY_COLLECTION]
+    rows = await summary.find(STATION_ROWS).sort("_id", ASCENDING).to_list(length=None)
+    if not rows and summary_watermark is None:
+        await refresh_station_summary(db)
+        rows = await summary.find(STATION_ROWS).sort("_id", ASCENDING).to_list(length=None)
+    return rows
 
-def format_conditions(obs: Dict) -> str:
-    """Format weather conditions from observation data."""
-    result = "\n🌡️ Conditions:\n"
+
+async def get_vocabulary(db) -> Dict:
+    """Stations and condition values in the collection, reloaded every VOCABULARY_TTL_SECONDS.
     
-    # Temperature
-    temp = obs.get('temperature', obs.get('airTemperature', obs.get('temp')))
-    if temp is not None:
-        result += f"   Temperature: {temp}°C\n"
+    Search terms are resolved against this small vocabulary in Python, so the
+    query sent to MongoDB only holds exact station/conditions values.
+    """
+    global vocabulary_cache, vocabulary_loaded_at
+    async with vocabulary_lock:
+        if vocabulary_cache is None or time.monotonic() - vocabulary_loaded_at > VOCABULARY_TTL_SECONDS:
+            stations = {row["_id"]: row for row in await get_station_summary(db)}
+            conditions = [value for value in await db[COLLECTION_NAME].distinct("conditions") if value]
+            vocabulary_cache = {"stations": stations, "conditions": conditions}
+            vocabulary_loaded_at = time.monotonic()
+        return vocabulary_cache
+
+
+async def migrate_documents(collection) -> int:
+    """Move older documents to the canonical schema; returns how many changed.
     
-    # Humidity/Dewpoint
-    dewpoint = obs.get('dewpoint', obs.get('dewpointTemperature', obs.get('dew_point')))
-    if dewpoint is not None:
-        result += f"   Dewpoint: {dewpoint}°C\n"
+    Station aliases (stationICAO/station_id) are copied into `station`, and the
+    ISO `timestamp` string is replaced by the BSON `observed_at` datetime.
+    """
+    changed = 0
+    for alias in ("stationICAO", "station_id"):
+        result = await collection.update_many(
+            {"station": {"$exists": False}, alias: {"$type": "string"}},
+            [{"$set": {"station": {"$toUpper": f"${alias}"}}}]
+        )
+        changed += result.modified_count
     
-    humidity = obs.get('humidity', obs.get('relative_humidity'))
-    if humidity is not None:
-        result += f"   Humidity: {humidity}%\n"
+    updates = []
+    async for doc in collection.find({"timestamp": {"$exists": True}}, projection={"timestamp": 1, "observed_at": 1}):
+        observed_at = doc.get("observed_at")
+        if not isinstance(observed_at, datetime):
+            try:
+                observed_at = datetime.fromisoformat(str(doc["timestamp"]).replace("Z", ""))
+            except ValueError:
+                continue  # unparseable: leave the document alone
+        updates.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"observed_at": observed_at}, "$unset": {"timestamp": ""}}))
+        if len(updates) >= 1000:
+            changed += (await collection.bulk_write(updates, ordered=False)).modified_count
+            updates = []
+    if updates:
+        changed += (await collection.bulk_write(updates, ordered=False)).modified_count
+    return changed
+
+
+async def ensure_schema(db):
+    """Migrate documents, create the managed indexes and drop redundant ones.
     
-    # Wind
-    wind_speed = obs.get('wind_speed', obs.get('windSpeed'))
-    wind_dir = obs.get('wind_direction', obs.get('windDirection'))
-    if wind_speed is not None:
-        wind_str = f"   Wind: {wind_speed}"
-        if wind_dir is not None:
-            wind_str += f" from {wind_dir}°"
-        result += wind_str + "\n"
+    The migration scans the whole collection, so it runs once per
+    SCHEMA_VERSION: the version reached is recorded in SCHEMA_COLLECTION and
+    later restarts skip it. Delete that record to migrate again.
+    """
+    collection = db[COLLECTION_NAME]
+    marker = await db[SCHEMA_COLLECTION].find_one({"_id": COLLECTION_NAME})
+    if not marker or marker.get("version", 0) < SCHEMA_VERSION:
+        migrated = await migrate_documents(collection)
+        if migrated:
+            print(f"🔧 Migrated {migrated:,} documents to the canonical schema")
+        await db[SCHEMA_COLLECTION].update_one(
+            {"_id": COLLECTION_NAME},
+            {"$set": {"version": SCHEMA_VERSION, "migrated_at": datetime.utcnow()}},
+            upsert=True
+        )
+    existing = await collection.index_information()
+    for name, keys in MANAGED_INDEXES.items():
+        if name not in existing:
+            await collection.create_index(keys, name=name)
+            print(f"📇 Created index {name}")
+    for name in OBSOLETE_INDEXES:
+        if name in existing:
+            await collection.drop_index(name)
+            print(f"🗑️  Dropped redundant index {name}")
+
+
+async def prepare_database():
+    """Run ensure_schema once before serving, on its own short-lived client."""
+    schema_client = AsyncIOMotorClient(MONGODB_URL, serverSelectionTimeoutMS=10000)
+    try:
+        await ensure_schema(schema_client[DATABASE_NAME])
+    except Exception as e:
+        print(f"⚠️  Could not prepare the database schema: {e}")
+    finally:
+        schema_client.close()
+
+
+def prepare_database_in_background() -> threading.Thread:
+    """Run prepare_database on its own thread so the server starts right away.
+
+    Until it finishes, queries still work but may scan without the managed
+    indexes, and documents not yet migrated sort by their legacy timestamp.
+    """
+    thread = threading.Thread(target=lambda: asyncio.run(prepare_database()), name="prepare-database", daemon=True)
+    thread.start()
+    return thread
+
+
+def format_time(value: Any) -> str:
+    """observed_at as an ISO 8601 UTC string."""
+    if isinstance(value, datetime):
+        return value.isoformat() + "Z"
+    return str(value) if value else "Unknown"
+
+
+def normalize_station(code: str) -> str:
+    """Canonical station code, as stored in the `station` field."""
+    return code.strip().upper()
+
+
+def matches_term(term: str, value: Any) -> bool:
+    """Case-insensitive match of term at the start of a word ("delhi" matches "New Delhi").
     
-    # Visibility
-    visibility = obs.get('visibility', obs.get('horizontalVisibility'))
-    if visibility is not None:
-        result += f"   Visibility: {visibility}m\n"
+    Only text is matched: some feeds store `location` as coordinates.
+    """
+    if not value or not isinstance(value, str):
+        return False
+    return re.search(rf"(?<!\w){re.escape(term.strip().lower())}", value.lower()) is not None
+
+
+def range_clause(field: str, low: Optional[float], high: Optional[float]) -> Optional[Dict]:
+    bounds = {}
+    if low is not None:
+        bounds["$gte"] = low
+    if high is not None:
+        bounds["$lte"] = high
+    return {field: bounds} if bounds else None
+
+
+def build_weather_query(
+    vocabulary: Optional[Dict] = None,
+    station: str = None,
+    location: str = None,
+    min_temperature: float = None,
+    max_temperature: float = None,
+    min_visibility: int = None,
+    max_visibility: int = None,
+    conditions: str = None,
+    hours_back: int = None
+) -> Optional[Dict]:
+    """Compose search filters into one MongoDB filter; every filter narrows the result.
     
-    # Pressure
-    pressure = obs.get('pressure', obs.get('observedQNH', obs.get('sea_level_pressure')))
-    if pressure is not None:
-        result += f"   Pressure: {pressure} hPa\n"
+    Location and conditions are resolved against the vocabulary (needed only
+    when either is given) into exact `station`/`conditions` values, so MongoDB
+    can use those indexes instead of scanning with unanchored regexes. Returns
+    None when a filter cannot match anything.
+    """
+    clauses = []
     
-    # Clouds
-    clouds = obs.get('clouds', obs.get('cloudLayers', obs.get('cloud_cover')))
-    if clouds:
-        if isinstance(clouds, list):
-            result += f"   Clouds: {', '.join(str(c) for c in clouds)}\n"
-        else:
-            result += f"   Clouds: {clouds}\n"
+    stations = {normalize_station(station)} if station else None
+    if location:
+        located = {
+            code for code, info in vocabulary["stations"].items()
+            if matches_term(location, code) or any(matches_term(location, info.get(f)) for f in LOCATION_FIELDS)
+        }
+        stations = located if stations is None else stations & located
+    if stations is not None:
+        if not stations:
+            return None
+        codes = sorted(stations)
+        clauses.append({"station": codes[0] if len(codes) == 1 else {"$in": codes}})
     
-    # Weather conditions
-    conditions = obs.get('conditions', obs.get('weatherConditions', obs.get('weather')))
     if conditions:
-        result += f"   Weather: {conditions}\n"
+        matched = [value for value in vocabulary["conditions"] if matches_term(conditions, value)]
+        if not matched:
+            return None
+        clauses.append({"conditions": matched[0] if len(matched) == 1 else {"$in": matched}})
+    
+    if hours_back:
+        clauses.append({"observed_at": {"$gte": datetime.utcnow() - timedelta(hours=hours_back)}})
     
-    return result
+    for clause in (range_clause("temperature", min_temperature, max_temperature),
+                   range_clause("visibility", min_visibility, max_visibility)):
+        if clause:
+            clauses.append(clause)
+    
+    if len(clauses) > 1:
+        return {"$and": clauses}
+    return clauses[0] if clauses else {}
+
+
+def canonical_fields(doc: Dict) -> Dict:
+    """Displayed fields of a document under their canonical names, in one pass.
+    
+    When a document carries a field under several names, the highest
+    priority name in FIELD_ALIASES wins.
+    """
+    fields, ranks = {}, {}
+    for key, value in doc.items():
+        mapped = ALIAS_FIELDS.get(key)
+        if mapped is None or value is None:
+            continue
+        field, rank = mapped
+        if field not in ranks or rank < ranks[field]:
+            fields[field] = value
+            ranks[field] = rank
+    return fields
+
+
+def format_weather_observation(doc: Dict) -> str:
+    """Format a weather observation into a readable string."""
+    obs = canonical_fields(doc)
+    header = f"📍 Station: {obs.get('station', 'Unknown')}"
+    if obs.get('station_name'):
+        header += f" ({obs['station_name']})"
+    lines = [header, f"🕐 Observed: {format_time(obs.get('observed_at'))}", ""]
+    lines += format_conditions(obs)
+    return "\n".join(lines) + "\n"
+
+
+def format_conditions(obs: Dict) -> List[str]:
+    """Condition lines for an observation (already mapped by canonical_fields)."""
+    lines = ["🌡️ Conditions:"]
+    if "temperature" in obs:
+        lines.append(f"   Temperature: {obs['temperature']}°C")
+    if "dewpoint" in obs:
+        lines.append(f"   Dewpoint: {obs['dewpoint']}°C")
+    if "humidity" in obs:
+        lines.append(f"   Humidity: {obs['humidity']}%")
+    if "wind_speed" in obs:
+        wind = f"   Wind: {obs['wind_speed']}"
+        if "wind_direction" in obs:
+            wind += f" from {obs['wind_direction']}°"
+        lines.append(wind)
+    if "visibility" in obs:
+        lines.append(f"   Visibility: {obs['visibility']}m")
+    if "pressure" in obs:
+        lines.append(f"   Pressure: {obs['pressure']} hPa")
+    clouds = obs.get('clouds')
+    if clouds:
+        lines.append(f"   Clouds: {', '.join(str(c) for c in clouds) if isinstance(clouds, list) else clouds}")
+    if obs.get('conditions'):
+        lines.append(f"   Weather: {obs['conditions']}")
+    return lines
+
+
+def format_compact_table(docs: List[Dict]) -> str:
+    """Observations as a pipe-separated table, one row each (compact mode)."""
+    rows = [COMPACT_HEADER]
+    for doc in docs:
+        obs = canonical_fields(doc)
+        observed_at = obs.get('observed_at')
+        wind = obs.get('wind_speed')
+        if wind is not None and "wind_direction" in obs:
+            wind = f"{wind}@{obs['wind_direction']}°"
+        cells = (
+            obs.get('station'),
+            observed_at.strftime("%Y-%m-%d %H:%M") if isinstance(observed_at, datetime) else observed_at,
+            obs.get('temperature'), obs.get('humidity'), wind, obs.get('visibility'),
+            obs.get('pressure'), obs.get('conditions'),
+        )
+        rows.append(" | ".join("-" if cell is None else str(cell) for cell in cells))
+    return "\n".join(rows) + "\n"
 
 
 @mcp.tool()
@@ -128,9 +606,10 @@ async def search_weather(
     max_visibility: int = None,
     conditions: str = None,
     hours_back: int = None,
-    limit: int = 10
+    limit: int = 10,
+    compact: Optional[bool] = None
 ) -> str:
-    """Search for weather observations with optional filters.
+    """Search for weather observations with optional filters (all given filters must match).
 
     Args:
         station: Station code (ICAO or local identifier)
@@ -142,6 +621,7 @@ async def search_weather(
         conditions: Weather conditions to search for (e.g., 'rain', 'fog', 'clear')
         hours_back: Only include observations from the last N hours
         limit: Maximum results to return (default: 10, max: 50)
+        compact: One table row per observation instead of a detailed block (default: server setting)
     
     Returns:
         Formatted weather observations matching the search criteria
@@ -149,127 +629,82 @@ async def search_weather(
     try:
         _, db = await get_mongodb_client()
         
-        # Build the query
-        query = {}
-        
-        # Station filter - check multiple possible field names
-        if station:
-            station_upper = station.upper()
-            query["$or"] = [
-                {"station": station_upper},
-                {"stationICAO": station_upper},
-                {"station_id": station_upper}
-            ]
-        
-        # Location filter - search in location-related fields
-        if location:
-            query["$or"] = query.get("$or", []) + [
-                {"location": {"$regex": location, "$options": "i"}},
-                {"station_name": {"$regex": location, "$options": "i"}},
-                {"city": {"$regex": location, "$options": "i"}},
-                {"region": {"$regex": location, "$options": "i"}}
-            ]
-        
-        # Time filter
-        if hours_back:
-            time_threshold = datetime.utcnow() - timedelta(hours=hours_back)
-            query["$or"] = [
-                {"timestamp": {"$gte": time_threshold}},
-                {"observed_at": {"$gte": time_threshold}}
-            ]
-        
-        # Temperature filters
-        if min_temperature is not None:
-            query["$or"] = query.get("$or", []) + [
-                {"temperature": {"$gte": min_temperature}}
-            ]
-        
-        if max_temperature is not None:
-            query["$or"] = query.get("$or", []) + [
-                {"temperature": {"$lte": max_temperature}}
-            ]
-        
-        # Visibility filters
-        if min_visibility is not None:
-            query["$or"] = query.get("$or", []) + [
-                {"visibility": {"$gte": min_visibility}}
-            ]
-        
-        # Conditions filter
-        if conditions:
-            query["$or"] = query.get("$or", []) + [
-                {"conditions": {"$regex": conditions, "$options": "i"}},
-                {"weather": {"$regex": conditions, "$options": "i"}}
-            ]
+        filters = dict(
+            station=station, location=location,
+            min_temperature=min_temperature, max_temperature=max_temperature,
+            min_visibility=min_visibility, max_visibility=max_visibility,
+            conditions=conditions, hours_back=hours_back
+        )
+        # Free-text filters are resolved against the known stations/conditions
+        known = await get_vocabulary(db) if location or conditions else None
+        query = build_weather_query(known, **filters)
         
         # Limit results
         limit = min(limit, 50)
         
-        # Execute the query
-        cursor = db[COLLECTION_NAME].find(query).sort([("timestamp", -1), ("observed_at", -1)]).limit(limit)
-        results = await cursor.to_list(length=limit)
+        # Execute the query (skipped when a filter matched no known station/conditions)
+        results = []
+        if query is not None:
+            cursor = db[COLLECTION_NAME].find(query, projection=DISPLAY_PROJECTION).sort(NEWEST_FIRST).limit(limit)
+            results = await cursor.to_list(length=limit)
         
         if not results:
             filters_desc = []
             if station: filters_desc.append(f"station={station}")
             if location: filters_desc.append(f"location={location}")
-            if min_temperature: filters_desc.append(f"temp≥{min_temperature}°C")
-            if max_temperature: filters_desc.append(f"temp≤{max_temperature}°C")
+            if min_temperature is not None: filters_desc.append(f"temp≥{min_temperature}°C")
+            if max_temperature is not None: filters_desc.append(f"temp≤{max_temperature}°C")
+            if min_visibility is not None: filters_desc.append(f"visibility≥{min_visibility}m")
+            if max_visibility is not None: filters_desc.append(f"visibility≤{max_visibility}m")
             if conditions: filters_desc.append(f"conditions={conditions}")
             if hours_back: filters_desc.append(f"last {hours_back}h")
             
             return f"❌ No weather data found" + (f" with filters: {', '.join(filters_desc)}" if filters_desc else "")
         
         # Format results
-        result = f"🔍 Weather Search Results ({len(results)} observations found)\n"
-        result += "=" * 60 + "\n\n"
-        
-        for i, doc in enumerate(results, 1):
-            result += f"--- Result {i} ---\n"
-            result += format_weather_observation(doc)
-            result += "\n"
-        
-        return result
+        parts = [f"🔍 Weather Search Results ({len(results)} observations found)", "=" * 60, ""]
+        if COMPACT_OUTPUT if compact is None else compact:
+            parts.append(format_compact_table(results))
+        else:
+            parts += [f"--- Result {i} ---\n{format_weather_observation(doc)}" for i, doc in enumerate(results, 1)]
+        return "\n".join(parts) + "\n"
         
     except Exception as e:
         return f"❌ Error executing search: {str(e)}"
 
 
 @mcp.tool()
-async def get_current_weather(station: str) -> str:
+async def get_current_weather(station: str, compact: Optional[bool] = None) -> str:
     """Get the most recent weather observation for a specific station.
 
     Args:
         station: Station code (ICAO code like 'VIDP' or local identifier)
+        compact: One table row instead of a detailed block (default: server setting)
     
     Returns:
         Current weather conditions at the station
     """
     try:
         _, db = await get_mongodb_client()
+        code = normalize_station(station)
+        compact = COMPACT_OUTPUT if compact is None else compact
+        
+        async def load() -> str:
+            # Most recent observation for this station: one station_observed_at
+            # index entry, then one document
+            doc = await db[COLLECTION_NAME].find_one(
+                {"station": code},
+                projection=DISPLAY_PROJECTION,
+                sort=NEWEST_FIRST
+            )
+            
+            if not doc:
+                return f"❌ No weather data found for station: {station}"
+            
+            body = format_compact_table([doc]) if compact else format_weather_observation(doc)
+            return f"🌤️ Current Weather at {code}\n{'=' * 40}\n\n{body}"
         
-        station_upper = station.upper()
-        
-        # Find the most recent observation for this station
-        query = {"$or": [
-            {"station": station_upper},
-            {"stationICAO": station_upper},
-            {"station_id": station_upper}
-        ]}
-        
-        doc = await db[COLLECTION_NAME].find_one(
-            query, 
-            sort=[("timestamp", -1), ("observed_at", -1)]
-        )
-        
-        if not doc:
-            return f"❌ No weather data found for station: {station}"
-        
-        result = f"🌤️ Current Weather at {station.upper()}\n"
-        result += "=" * 40 + "\n\n"
-        result += format_weather_observation(doc)
-        
-        return result
+        return await result_cache.get(("get_current_weather", code, compact), load)
         
     except Exception as e:
         return f"❌ Error retrieving weather: {str(e)}"
@@ -285,26 +720,24 @@ async def list_stations() -> str:
     try:
         _, db = await get_mongodb_client()
         
-        # Try different field names for station codes
-        stations = set()
-        
-        for field in ["station", "stationICAO", "station_id"]:
-            codes = await db[COLLECTION_NAME].distinct(field)
-            stations.update(code for code in codes if code)
-        
-        stations = sorted(stations)
-        total_count = await db[COLLECTION_NAME].count_documents({})
-        
-        result = f"📡 Available Weather Stations\n"
-        result += "=" * 40 + "\n\n"
-        result += f"Total Observations: {total_count:,}\n"
-        result += f"Unique Stations: {len(stations)}\n\n"
-        
-        result += "Station Codes:\n"
-        for i, code in enumerate(stations, 1):
-            result += f"  {i:3d}. {code}\n"
+        async def load() -> str:
+            # Station codes from the materialized summary (aliases are normalized
+            # into `station` at ingest/startup); the total comes from metadata
+            stations = [row["_id"] for row in await get_station_summary(db)]
+            total_count = await db[COLLECTION_NAME].estimated_document_count()
+            
+            result = f"📡 Available Weather Stations\n"
+            result += "=" * 40 + "\n\n"
+            result += f"Total Observations: {total_count:,}\n"
+            result += f"Unique Stations: {len(stations)}\n\n"
+            
+            result += "Station Codes:\n"
+            for i, code in enumerate(stations, 1):
+                result += f"  {i:3d}. {code}\n"
+            
+            return result
         
-        return result
+        return await result_cache.get(("list_stations",), load)
         
     except Exception as e:
         return f"❌ Error listing stations: {str(e)}"
@@ -320,45 +753,33 @@ async def get_statistics() -> str:
     try:
         _, db = await get_mongodb_client()
         
-        # Get counts
-        total_docs = await db[COLLECTION_NAME].count_documents({})
-        
-        # Get unique stations
-        stations = set()
-        for field in ["station", "stationICAO", "station_id"]:
-            codes = await db[COLLECTION_NAME].distinct(field)
-            stations.update(code for code in codes if code)
-        
-        # Get date range
-        earliest = await db[COLLECTION_NAME].find_one(
-            {}, 
-            sort=[("timestamp", 1), ("observed_at", 1)]
-        )
-        latest = await db[COLLECTION_NAME].find_one(
-            {}, 
-            sort=[("timestamp", -1), ("observed_at", -1)]
-        )
-        
-        result = f"📊 Weather Database Statistics\n"
-        result += "=" * 40 + "\n\n"
-        
-        result += f"📈 Counts:\n"
-        result += f"   Total Observations: {total_docs:,}\n"
-        result += f"   Unique Stations: {len(stations)}\n\n"
-        
-        result += f"📅 Data Range:\n"
-        if earliest:
-            earliest_time = earliest.get('timestamp', earliest.get('observed_at', 'Unknown'))
-            result += f"   Earliest: {earliest_time}\n"
-        if latest:
-            latest_time = latest.get('timestamp', latest.get('observed_at', 'Unknown'))
-            result += f"   Latest: {latest_time}\n"
-        
-        result += f"\n💾 Database:\n"
-        result += f"   Name: {DATABASE_NAME}\n"
-        result += f"   Collection: {COLLECTION_NAME}\n"
+        async def load() -> str:
+            # Counts and date range from the materialized station summary
+            total_docs = await db[COLLECTION_NAME].estimated_document_count()
+            stations = await get_station_summary(db)
+            firsts = [row["first_observed_at"] for row in stations if row.get("first_observed_at")]
+            lasts = [row["last_observed_at"] for row in stations if row.get("last_observed_at")]
+            
+            result = f"📊 Weather Database Statistics\n"
+            result += "=" * 40 + "\n\n"
+            
+            result += f"📈 Counts:\n"
+            result += f"   Total Observations: {total_docs:,}\n"
+            result += f"   Unique Stations: {len(stations)}\n\n"
+            
+            result += f"📅 Data Range:\n"
+            if firsts:
+                result += f"   Earliest: {format_time(min(firsts))}\n"
+            if lasts:
+                result += f"   Latest: {format_time(max(lasts))}\n"
+            
+            result += f"\n💾 Database:\n"
+            result += f"   Name: {DATABASE_NAME}\n"
+            result += f"   Collection: {COLLECTION_NAME}\n"
+            
+            return result
         
-        return result
+        return await result_cache.get(("get_statistics",), load)
         
     except Exception as e:
         return f"❌ Error retrieving statistics: {str(e)}"
@@ -376,17 +797,73 @@ async def health_check() -> str:
         
         # Test database connection
         await db.command('ping')
-        count = await db[COLLECTION_NAME].count_documents({})
+        count = await db[COLLECTION_NAME].estimated_document_count()
         
-        return f"✅ Healthy - Database connected, {count:,} documents available"
+        cache = result_cache.stats()
+        return (f"✅ Healthy - Database connected, {count:,} documents available\n"
+                f"🗃️ Result cache: {cache['entries']} entries, {cache['hits']:,} hits, "
+                f"{cache['misses']:,} misses, {cache['invalidations']:,} invalidations")
         
     except Exception as e:
         return f"❌ Unhealthy - {str(e)}"
 
 
+# Query shapes the LLM sends most often; `--explain` checks each one uses an index
+COMMON_QUERY_SHAPES = [
+    ("station", {"station": "VIDP"}),
+    ("station + hours_back", {"station": "VIDP", "hours_back": 24}),
+    ("location", {"location": "Delhi"}),
+    ("conditions", {"conditions": "rain"}),
+    ("conditions + hours_back", {"conditions": "fog", "hours_back": 6}),
+    ("hours_back", {"hours_back": 6}),
+]
+
+
+def plan_stages(plan: Dict) -> List[str]:
+    """Stage names of a query plan, outermost first."""
+    plan = plan.get("queryPlan", plan)
+    stages = [plan.get("stage", "?")]
+    children = plan.get("inputStages") or ([plan["inputStage"]] if "inputStage" in plan else [])
+    for child in children:
+        stages += plan_stages(child)
+    return stages
+
+
+async def explain_common_queries() -> bool:
+    """Print the winning plan of each common search; False if any scans the collection."""
+    _, db = await get_mongodb_client()
+    known = await get_vocabulary(db)
+    ok = True
+    for label, filters in COMMON_QUERY_SHAPES:
+        query = build_weather_query(known, **filters)
+        if query is None:
+            print(f"⚠️  {label}: no matching station/conditions in the data")
+            continue
+        explained = await db[COLLECTION_NAME].find(query).sort(NEWEST_FIRST).limit(10).explain()
+        stages = plan_stages(explained["queryPlanner"]["winningPlan"])
+        scans = "COLLSCAN" in stages
+        ok = ok and not scans
+        print(f"{'❌' if scans else '✅'} {label}: {' <- '.join(stages)}")
+    
+    # get_current_weather should read the newest entry straight off the index, without sorting
+    explained = await db[COLLECTION_NAME].find(
+        {"station": "VIDP"}, projection=DISPLAY_PROJECTION
+    ).sort(NEWEST_FIRST).limit(1).explain()
+    stages = plan_stages(explained["queryPlanner"]["winningPlan"])
+    indexed = "IXSCAN" in stages and "SORT" not in stages
+    ok = ok and indexed
+    print(f"{'✅' if indexed else '❌'} current weather (index order): {' <- '.join(stages)}")
+    return ok
+
+
 if __name__ == "__main__":
     import uvicorn
     
+    if "--explain" in sys.argv:
+        if MANAGE_SCHEMA:
+            asyncio.run(prepare_database())
+        sys.exit(0 if asyncio.run(explain_common_queries()) else 1)
+    
     print(f"""
 ╔══════════════════════════════════════════════════════════════╗
 ║           Weather Data MCP Server                            ║
@@ -399,6 +876,9 @@ if __name__ == "__main__":
 ╚══════════════════════════════════════════════════════════════╝
     """)
     
+    if MANAGE_SCHEMA:
+        prepare_database_in_background()
+    
     print("🚀 Starting server on 0.0.0.0:8000...")
     
     # Get the ASGI app from FastMCP and run with uvicorn
@@ -159,7 +159,6 @@ def generate_observation(station: Dict, timestamp: datetime) -> Dict:
             "lat": station["lat"],
             "lon": station["lon"]
         },
-        "timestamp": timestamp.isoformat() + "Z",
         "observed_at": timestamp,
         "temperature": temperature,
         "dewpoint": dewpoint,
@@ -175,6 +174,25 @@ def generate_observation(station: Dict, timestamp: datetime) -> Dict:
     }
 
 
+def normalize_observation(obs: Dict) -> Dict:
+    """Store one canonical station code and a BSON `observed_at` time.
+    
+    Feeds that use `stationICAO`/`station_id` or an ISO `timestamp` string
+    are normalized here, so the MCP server can query the indexed `station`
+    and `observed_at` fields alone.
+    """
+    station = obs.get("station") or obs.get("stationICAO") or obs.get("station_id")
+    if station:
+        obs["station"] = str(station).strip().upper()
+    timestamp = obs.pop("timestamp", None)
+    observed_at = obs.get("observed_at") or timestamp
+    if isinstance(observed_at, str):
+        observed_at = datetime.fromisoformat(observed_at.replace("Z", ""))
+    if observed_at is not None:
+        obs["observed_at"] = observed_at
+    return obs
+
+
 def generate_sample_data(hours_back: int = 48, interval_minutes: int = 60) -> List[Dict]:
     """Generate sample weather data for all stations."""
     
@@ -188,8 +206,8 @@ def generate_sample_data(hours_back: int = 48, interval_minutes: int = 60) -> Li
             observations.append(obs)
             current_time -= timedelta(minutes=interval_minutes)
     
-    # Sort by timestamp descending
-    observations.sort(key=lambda x: x["timestamp"], reverse=True)
+    # Sort by observation time, newest first
+    observations.sort(key=lambda x: x["observed_at"], reverse=True)
     
     return observations
 
@@ -224,24 +242,17 @@ def main():
         print(f"🗑️  Deleted {deleted.deleted_count} existing documents")
         
         # Insert new data
-        result = collection.insert_many(data)
+        result = collection.insert_many([normalize_observation(obs) for obs in data])
         print(f"✅ Inserted {len(result.inserted_ids)} documents")
         
-        # Create indexes
-        collection.create_index("station")
-        collection.create_index("timestamp")
-        collection.create_index("city")
-        collection.create_index("country")
-        collection.create_index("conditions")
-        print("📇 Created indexes")
+        # Every index is managed by the MCP server (MANAGED_INDEXES in http_app.py)
         
         print(f"\n🎉 Done! Data available in {args.database}.{args.collection}")
         
     else:
-        # Convert datetime objects to strings for JSON serialization
+        # Convert datetime objects to ISO strings for JSON serialization
         for obs in data:
-            if "observed_at" in obs:
-                del obs["observed_at"]  # Remove datetime object, keep ISO string
+            obs["observed_at"] = obs["observed_at"].isoformat() + "Z"
         
         with open(args.output, "w") as f:
             json.dump(data, f, indent=2, default=str)
@@ -0,0 +1,83 @@
+"""Make http_app and sample_data importable the way the container runs them,
+and serve the motor calls under test from mongomock."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class AsyncCursor:
+    """motor cursor stand-in over a mongomock cursor."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._iterator = None
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def __aiter__(self):
+        self._iterator = iter(self._cursor)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def to_list(self, length=None):
+        return list(self._cursor)[:length]
+
+
+class AsyncCollection:
+    """motor collection stand-in: awaitable methods, cursors for find/aggregate."""
+
+    def __init__(self, collection, pipelines):
+        self._collection = collection
+        self._pipelines = pipelines
+
+    def find(self, *args, **kwargs):
+        return AsyncCursor(self._collection.find(*args, **kwargs))
+
+    def aggregate(self, pipeline, **kwargs):
+        self._pipelines.append(pipeline)
+        return AsyncCursor(self._collection.aggregate(pipeline))
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+        return call
+
+
+class AsyncDatabase:
+    """motor database stand-in; `sync` is the mongomock database, `pipelines` every aggregate run."""
+
+    def __init__(self, db):
+        self.sync = db
+        self.pipelines = []
+
+    def __getitem__(self, name):
+        return AsyncCollection(self.sync[name], self.pipelines)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """A fresh mongomock database behind http_app's motor client, with clean module state."""
+    mongomock = pytest.importorskip("mongomock")
+    import http_app
+
+    database = AsyncDatabase(mongomock.MongoClient().weather)
+
+    async def client():
+        return None, database
+
+    monkeypatch.setattr(http_app, "get_mongodb_client", client)
+    monkeypatch.setattr(http_app, "summary_watermark", None)
+    monkeypatch.setattr(http_app, "result_cache", http_app.ResultCache())
+    return database
@@ -0,0 +1,133 @@
+"""Shared tool result cache and change-driven invalidation (http_app)."""
+import asyncio
+
+import pytest
+
+pytest.importorskip("mcp")
+pytest.importorskip("motor")
+
+from pymongo.errors import AutoReconnect, OperationFailure
+
+import http_app
+from http_app import ResultCache
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = ResultCache()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "VIDP 31°C"
+
+    async def main():
+        results = await asyncio.gather(*(cache.get(("k",), load) for _ in range(5)))
+        return results + [await cache.get(("k",), load)]
+
+    assert asyncio.run(main()) == ["VIDP 31°C"] * 6
+    assert calls == [1]
+    assert (cache.hits, cache.misses) == (5, 1)
+
+
+def test_errors_reach_waiters_and_are_not_cached():
+    cache = ResultCache()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ConnectionError("MongoDB down")
+
+    async def main():
+        results = await asyncio.gather(cache.get(("k",), fail), cache.get(("k",), fail), return_exceptions=True)
+        return results, await cache.get(("k",), lambda: asyncio.sleep(0, "ok"))
+
+    (first, second), retried = asyncio.run(main())
+    assert isinstance(first, ConnectionError) and second is first
+    assert retried == "ok"
+
+
+def test_a_cancelled_leader_does_not_cancel_its_waiters():
+    cache = ResultCache()
+
+    async def load():
+        await asyncio.sleep(0.05)
+        return "fresh"
+
+    async def main():
+        leader = asyncio.create_task(cache.get(("k",), load))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get(("k",), load))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter, await cache.get(("k",), load)
+
+    assert asyncio.run(main()) == ("fresh", "fresh")
+    assert cache.misses == 1
+
+
+def test_invalidate_drops_running_computations():
+    cache = ResultCache()
+    values = iter(["old", "new"])
+
+    async def load():
+        await asyncio.sleep(0.01)
+        return next(values)
+
+    async def main():
+        running = asyncio.create_task(cache.get(("k",), load))
+        await asyncio.sleep(0)
+        cache.invalidate()
+        return await running, await cache.get(("k",), load)
+
+    assert asyncio.run(main()) == ("old", "new")
+
+
+class ChangeStream:
+    def __init__(self, events, error=None):
+        self.events, self.error = events, error
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.events:
+            return self.events.pop(0)
+        raise self.error or StopAsyncIteration
+
+
+class Observations:
+    """Collection whose watch() plays back scripted streams (or errors opening one)."""
+
+    def __init__(self, streams):
+        self.streams = streams
+
+    def watch(self):
+        stream = self.streams.pop(0)
+        if isinstance(stream, Exception):
+            raise stream
+        return stream
+
+
+def test_change_stream_is_reopened_with_backoff(monkeypatch):
+    invalidations = []
+    monkeypatch.setattr(http_app.result_cache, "invalidate", lambda: invalidations.append(1))
+    monkeypatch.setattr(http_app, "CHANGE_STREAM_RETRY_SECONDS", 0.001)
+    monkeypatch.setattr(http_app, "db", {http_app.COLLECTION_NAME: Observations([
+        AutoReconnect("primary stepped down"),
+        ChangeStream([{"operationType": "insert"}] * 2, error=AutoReconnect("connection reset")),
+        ChangeStream([{"operationType": "insert"}]),
+        OperationFailure("The $changeStream stage is only supported on replica sets", code=40573),
+    ])})
+
+    asyncio.run(asyncio.wait_for(http_app.invalidate_on_changes(), 5))
+
+    # Each opened stream clears the cache once, then once per change
+    assert len(invalidations) == (1 + 2) + (1 + 1)
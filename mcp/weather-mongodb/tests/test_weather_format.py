@@ -0,0 +1,66 @@
+"""Field aliases and compact output (http_app.canonical_fields, format_compact_table)."""
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("mcp")
+pytest.importorskip("motor")
+
+import http_app
+from http_app import COMPACT_HEADER, DISPLAY_PROJECTION, FIELD_ALIASES, canonical_fields, format_compact_table
+
+FULL = {
+    "station": "VIDP", "station_name": "Delhi", "observed_at": datetime(2024, 5, 1, 12, 30),
+    "temperature": 31, "dewpoint": 18, "humidity": 45, "wind_speed": 12, "wind_direction": 270,
+    "visibility": 6000, "pressure": 1004, "clouds": ["FEW030"], "conditions": "Haze",
+}
+
+
+def test_canonical_fields_prefer_the_highest_priority_name():
+    doc = {"airTemperature": 20, "temperature": 21, "temp": 19, "stationICAO": "EGLL", "city": "London"}
+
+    assert canonical_fields(doc) == {"temperature": 21, "station": "EGLL"}
+
+
+def test_observed_at_wins_over_the_legacy_timestamp_in_any_key_order():
+    observed_at = datetime(2024, 5, 1, 12)
+    legacy_first = {"timestamp": "2024-05-01T09:00:00Z", "observed_at": observed_at}
+    legacy_last = {"observed_at": observed_at, "timestamp": "2024-05-01T09:00:00Z"}
+
+    assert canonical_fields(legacy_first)["observed_at"] == observed_at
+    assert canonical_fields(legacy_last)["observed_at"] == observed_at
+    assert canonical_fields({"timestamp": "2024-05-01T09:00:00Z"})["observed_at"] == "2024-05-01T09:00:00Z"
+
+
+def test_missing_values_fall_back_to_an_alias():
+    assert canonical_fields({"temperature": None, "airTemperature": 18}) == {"temperature": 18}
+
+
+def test_compact_table_columns_follow_the_header():
+    table = format_compact_table([FULL])
+
+    header, row = table.rstrip("\n").split("\n")
+    assert header == COMPACT_HEADER
+    assert row.split(" | ") == ["VIDP", "2024-05-01 12:30", "31", "45", "12@270°", "6000", "1004", "Haze"]
+    assert len(row.split(" | ")) == len(header.split(" | "))
+
+
+def test_compact_table_marks_missing_fields():
+    table = format_compact_table([{"stationICAO": "EGLL", "timestamp": "2024-05-01T09:00:00Z", "windSpeed": 5}])
+
+    assert table.rstrip("\n").split("\n")[1].split(" | ") == [
+        "EGLL", "2024-05-01T09:00:00Z", "-", "-", "5", "-", "-", "-",
+    ]
+    assert format_compact_table([]) == COMPACT_HEADER + "\n"
+
+
+def test_display_projection_returns_every_shown_field():
+    mongomock = pytest.importorskip("mongomock")
+    collection = mongomock.MongoClient().weather[http_app.COLLECTION_NAME]
+    stored = {alias: FULL[field] for field, aliases in FIELD_ALIASES.items() for alias in aliases}
+    collection.insert_one(dict(stored, city="Delhi", raw_metar="VIDP 011230Z"))
+
+    projected = collection.find_one({}, projection=DISPLAY_PROJECTION)
+
+    assert projected == stored
+    assert canonical_fields(projected) == FULL
@@ -0,0 +1,127 @@
+"""Search filter composition (http_app.build_weather_query)."""
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("mcp")
+pytest.importorskip("motor")
+
+import http_app
+from http_app import (
+    COMMON_QUERY_SHAPES, DISPLAY_PROJECTION, MANAGED_INDEXES, NEWEST_FIRST, SUMMARY_GROUP,
+    build_weather_query, plan_stages,
+)
+from sample_data import generate_sample_data
+
+VOCABULARY = {
+    "stations": {
+        "VIDP": {"_id": "VIDP", "station_name": "Delhi - Indira Gandhi International", "city": "New Delhi",
+                 "country": "India", "location": {"lat": 28.5665, "lon": 77.1031}},
+        "VABB": {"_id": "VABB", "station_name": "Mumbai - Chhatrapati Shivaji", "city": "Mumbai",
+                 "region": "Maharashtra", "country": "India"},
+        "EGLL": {"_id": "EGLL", "station_name": "London Heathrow", "location": "Hillingdon, Greater London",
+                 "country": "United Kingdom"},
+    },
+    "conditions": ["Clear", "Fog", "Light Rain", "Heavy Rain"],
+}
+
+
+def query(**filters):
+    return build_weather_query(VOCABULARY, **filters)
+
+
+def test_no_filters_match_everything():
+    assert build_weather_query() == {}
+
+
+def test_station_needs_no_vocabulary():
+    assert build_weather_query(station=" vidp ") == {"station": "VIDP"}
+
+
+@pytest.mark.parametrize("location, stations", [
+    ("delhi", "VIDP"),                      # city
+    ("maharashtra", "VABB"),                # region
+    ("greater london", "EGLL"),             # location
+    ("heathrow", "EGLL"),                   # station_name
+    ("egll", "EGLL"),                       # station code
+    ("India", {"$in": ["VABB", "VIDP"]}),   # country
+])
+def test_location_resolves_to_station_codes(location, stations):
+    assert query(location=location) == {"station": stations}
+
+
+def test_location_ignores_coordinates():
+    assert query(location="lat") is None
+
+
+def test_station_and_location_must_both_match():
+    assert query(station="VIDP", location="India") == {"station": "VIDP"}
+    assert query(station="VIDP", location="London") is None
+
+
+def test_unknown_conditions_match_nothing():
+    assert query(conditions="snow") is None
+
+
+def test_filters_combine_with_and():
+    before = datetime.utcnow()
+
+    built = query(location="India", conditions="rain", min_temperature=20, max_visibility=5000, hours_back=6)
+
+    assert built["$and"][:2] == [{"station": {"$in": ["VABB", "VIDP"]}},
+                                 {"conditions": {"$in": ["Light Rain", "Heavy Rain"]}}]
+    since = built["$and"][2]["observed_at"]["$gte"]
+    assert before - timedelta(hours=6, seconds=5) < since <= datetime.utcnow() - timedelta(hours=6)
+    assert built["$and"][3:] == [{"temperature": {"$gte": 20}}, {"visibility": {"$lte": 5000}}]
+
+
+def load_sample(collection):
+    collection.insert_many(generate_sample_data(hours_back=12))
+    stations = {row["_id"]: row for row in collection.aggregate([SUMMARY_GROUP])}
+    return {"stations": stations, "conditions": collection.distinct("conditions")}
+
+
+def test_queries_return_exactly_the_matching_observations():
+    mongomock = pytest.importorskip("mongomock")
+    collection = mongomock.MongoClient().db.observations
+    vocabulary = load_sample(collection)
+    docs = list(collection.find())
+
+    def found(**filters):
+        return sorted(doc["_id"] for doc in collection.find(build_weather_query(vocabulary, **filters)))
+
+    def expected(predicate):
+        return sorted(doc["_id"] for doc in docs if predicate(doc))
+
+    assert found(location="India") == expected(lambda d: d["country"] == "India")
+    assert found(location="Tokyo", min_temperature=0, max_temperature=25) == expected(
+        lambda d: d["city"] == "Tokyo" and 0 <= d["temperature"] <= 25)
+    assert found(conditions="rain", max_visibility=8000) == expected(
+        lambda d: "Rain" in d["conditions"] and d["visibility"] <= 8000)
+
+
+@pytest.mark.skipif(not os.getenv("MONGODB_TEST_URL"), reason="set MONGODB_TEST_URL to a disposable mongod")
+def test_common_queries_use_an_index():
+    from pymongo import MongoClient
+
+    client = MongoClient(os.environ["MONGODB_TEST_URL"], serverSelectionTimeoutMS=5000)
+    db = client[f"weather_test_{uuid.uuid4().hex[:8]}"]
+    try:
+        collection = db[http_app.COLLECTION_NAME]
+        vocabulary = load_sample(collection)
+        for name, keys in MANAGED_INDEXES.items():
+            collection.create_index(keys, name=name)
+
+        for label, filters in COMMON_QUERY_SHAPES:
+            built = build_weather_query(vocabulary, **filters)
+            plan = collection.find(built).sort(NEWEST_FIRST).limit(10).explain()
+            assert "COLLSCAN" not in plan_stages(plan["queryPlanner"]["winningPlan"]), label
+
+        plan = collection.find({"station": "VIDP"}, projection=DISPLAY_PROJECTION).sort(NEWEST_FIRST).limit(1).explain()
+        stages = plan_stages(plan["queryPlanner"]["winningPlan"])
+        assert "IXSCAN" in stages and "SORT" not in stages
+    finally:
+        client.drop_database(db.name)
+        client.close()
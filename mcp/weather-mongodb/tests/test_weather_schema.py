@@ -0,0 +1,82 @@
+"""Schema migration, managed indexes and current weather (http_app)."""
+import asyncio
+import threading
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("mcp")
+pytest.importorskip("motor")
+pytest.importorskip("mongomock")
+
+import http_app
+
+
+def test_migration_runs_once_per_schema_version(db, monkeypatch):
+    runs = []
+
+    async def migrate(collection):
+        runs.append(collection)
+        return 0
+
+    monkeypatch.setattr(http_app, "migrate_documents", migrate)
+
+    asyncio.run(http_app.ensure_schema(db))
+    asyncio.run(http_app.ensure_schema(db))
+    assert len(runs) == 1
+
+    monkeypatch.setattr(http_app, "SCHEMA_VERSION", http_app.SCHEMA_VERSION + 1)
+    asyncio.run(http_app.ensure_schema(db))
+    assert len(runs) == 2
+    assert db.sync[http_app.SCHEMA_COLLECTION].find_one()["version"] == http_app.SCHEMA_VERSION
+
+
+def test_indexes_hold_only_filter_and_sort_fields(db, monkeypatch):
+    observations = db.sync[http_app.COLLECTION_NAME]
+    observations.create_index([("station", 1), ("observed_at", -1), ("temperature", 1)],
+                              name="station_observed_at_current")
+    observations.create_index("city")
+    observations.create_index("country")
+
+    async def migrate(collection):
+        return 0
+
+    monkeypatch.setattr(http_app, "migrate_documents", migrate)
+    asyncio.run(http_app.ensure_schema(db))
+
+    indexes = observations.index_information()
+    assert not {"station_observed_at_current", "city_1", "country_1"} & set(indexes)
+    for name, keys in http_app.MANAGED_INDEXES.items():
+        assert indexes[name]["key"] == keys
+        assert len(keys) <= 2
+
+
+def test_schema_is_prepared_without_holding_up_startup(monkeypatch):
+    release = threading.Event()
+    prepared = []
+
+    async def prepare():
+        release.wait(5)
+        prepared.append(True)
+
+    monkeypatch.setattr(http_app, "prepare_database", prepare)
+
+    thread = http_app.prepare_database_in_background()
+    assert thread.is_alive() and not prepared
+    release.set()
+    thread.join(5)
+    assert prepared == [True]
+
+
+def test_current_weather_shows_clouds(db):
+    db.sync[http_app.COLLECTION_NAME].insert_many([
+        {"station": "EGLL", "observed_at": datetime(2024, 5, 1, 11), "temperature": 11, "clouds": ["FEW020"]},
+        {"station": "EGLL", "observed_at": datetime(2024, 5, 1, 12), "temperature": 13,
+         "cloudLayers": ["BKN015", "OVC030"], "conditions": "Light Rain"},
+    ])
+
+    result = asyncio.run(http_app.get_current_weather("egll", compact=False))
+
+    assert "Temperature: 13" in result
+    assert "Clouds: BKN015, OVC030" in result
+    assert "Weather: Light Rain" in result
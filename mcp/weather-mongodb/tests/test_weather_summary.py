@@ -0,0 +1,103 @@
+"""Materialized station summary (http_app.refresh_station_summary)."""
+import asyncio
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("mcp")
+pytest.importorskip("motor")
+pytest.importorskip("mongomock")
+
+import http_app
+from http_app import COLLECTION_NAME, SUMMARY_COLLECTION, SUMMARY_GROUP, SUMMARY_SORT
+
+
+def observe(db, station, hour, city):
+    db.sync[COLLECTION_NAME].insert_one({"station": station, "observed_at": datetime(2024, 5, 1, hour), "city": city})
+
+
+def refresh(db):
+    asyncio.run(http_app.refresh_station_summary(db))
+
+
+def rebuilds(db):
+    return [p for p in db.pipelines if "$out" in p[-1]]
+
+
+def stations(db):
+    return {row["_id"]: (row["count"], row["city"]) for row in asyncio.run(http_app.get_station_summary(db))}
+
+
+def test_location_fields_come_from_the_newest_observation(db):
+    # Inserted out of time order: _id order alone would pick the older city
+    observe(db, "VIDP", 12, "New Delhi")
+    observe(db, "VIDP", 9, "Delhi Cantonment")
+    refresh(db)
+
+    observe(db, "EGLL", 8, "London")
+    observe(db, "EGLL", 7, "Hounslow")
+    refresh(db)
+
+    assert stations(db) == {"VIDP": (2, "New Delhi"), "EGLL": (2, "London")}
+    for pipeline in db.pipelines:
+        if SUMMARY_GROUP in pipeline:
+            assert pipeline[pipeline.index(SUMMARY_GROUP) - 1] == SUMMARY_SORT
+
+
+def test_restart_resumes_from_the_saved_watermark(db, monkeypatch):
+    observe(db, "VIDP", 10, "New Delhi")
+    observe(db, "RJTT", 10, "Tokyo")
+    refresh(db)
+    assert len(rebuilds(db)) == 1
+
+    # A new process: nothing in memory, the summary is already current
+    monkeypatch.setattr(http_app, "summary_watermark", None)
+    refresh(db)
+    assert len(rebuilds(db)) == 1
+    assert db.sync[SUMMARY_COLLECTION].count_documents({}) == 3
+
+    monkeypatch.setattr(http_app, "summary_watermark", None)
+    observe(db, "VIDP", 11, "New Delhi")
+    refresh(db)
+    assert len(rebuilds(db)) == 1
+    assert stations(db) == {"VIDP": (2, "New Delhi"), "RJTT": (1, "Tokyo")}
+
+
+def test_summary_is_rebuilt_when_observations_were_removed(db):
+    observe(db, "VIDP", 10, "New Delhi")
+    observe(db, "RJTT", 10, "Tokyo")
+    refresh(db)
+    db.sync[COLLECTION_NAME].delete_one({"station": "RJTT"})
+    observe(db, "VIDP", 11, "New Delhi")
+
+    refresh(db)
+
+    assert len(rebuilds(db)) == 2
+    assert stations(db) == {"VIDP": (2, "New Delhi")}
+
+
+def test_observation_inserted_during_a_refresh_does_not_force_a_rebuild(db, monkeypatch):
+    observe(db, "VIDP", 10, "New Delhi")
+    refresh(db)
+    observe(db, "VIDP", 11, "New Delhi")
+    summary_total = http_app.summary_total
+
+    async def racing_insert(database):
+        # Lands after the refresh read its watermark
+        observe(db, "RJTT", 10, "Tokyo")
+        monkeypatch.setattr(http_app, "summary_total", summary_total)
+        return await summary_total(database)
+
+    monkeypatch.setattr(http_app, "summary_total", racing_insert)
+    refresh(db)
+    assert len(rebuilds(db)) == 1
+    assert stations(db) == {"VIDP": (2, "New Delhi")}
+
+    refresh(db)
+    assert len(rebuilds(db)) == 1
+    assert stations(db) == {"VIDP": (2, "New Delhi"), "RJTT": (1, "Tokyo")}
+
+
+def test_summary_sort_follows_the_station_index():
+    keys = list(SUMMARY_SORT["$sort"].items())
+    assert keys == http_app.MANAGED_INDEXES["station_observed_at"]
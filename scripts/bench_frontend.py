@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Frontend chat pipeline benchmark.
+
+Drives the same pipeline app.py runs for every prompt (catalog lookup, tool
+selection, history trimming, completion, tool dispatch, final completion)
+from N concurrent simulated sessions against a local LlamaStack stub (or a
+real LlamaStack with --url), then reports throughput, turn latency
+percentiles and transcript memory per session.
+
+Usage:
+    python scripts/bench_frontend.py --sessions 50 --turns 5
+    python scripts/bench_frontend.py --sessions 20 --tool-latency 1.0 --max-p95 5
+    python scripts/bench_frontend.py --url http://localhost:8321 --sessions 5 --json
+
+Exits with status 1 if --max-p95 is given and the p95 turn latency exceeds it.
+"""
+import argparse
+import json
+import os
+import pickle
+import resource
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_DIR, "manifests", "frontend"))
+
+from catalog import CatalogCache, select_tools  # noqa: E402
+from history import build_api_messages  # noqa: E402
+from llamastack_client import LlamaStackClient, create_session  # noqa: E402
+from metrics import MetricsRegistry  # noqa: E402
+from session_store import SessionStore  # noqa: E402
+from tool_cache import ToolResultCache  # noqa: E402
+from turns import ChatTurn, run_turn, turn_transcript  # noqa: E402
+from llamastack_stub import add_arguments, start_stub  # noqa: E402
+
+SYSTEM_PROMPT = "You are an intelligent AI assistant with access to multiple external tools through MCP servers."
+
+PROMPTS = [
+    "What's the weather at VIDP right now?",
+    "Search for rainy weather in the last 24 hours",
+    "List all weather stations",
+    "Check vacation balance for EMP001",
+    "Compare the weather in Delhi and Tokyo",
+    "Who is employee EMP002?",
+]
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+class SimulatedSession:
+    """One user's transcript, driven through the pipeline like app.py does."""
+
+    def __init__(self, index: int, pipeline: Dict):
+        self.index = index
+        self.pipeline = pipeline
+        self.messages: List[Dict] = []
+        self.latencies: List[float] = []
+        self.errors = 0
+
+    def execute_tool(self, toolgroups: Dict[str, str]):
+        client, tool_cache, url = self.pipeline["client"], self.pipeline["tool_cache"], self.pipeline["url"]
+
+        def execute(tool_name: str, tool_args: Dict) -> str:
+            return tool_cache.call(
+                url, toolgroups.get(tool_name, ""), tool_name, tool_args,
+                lambda: client.invoke_tool(url, tool_name, tool_args)
+            )
+        return execute
+
+    def chat(self, prompt: str):
+        started = time.monotonic()
+        catalog, url = self.pipeline["catalog"], self.pipeline["url"]
+        self.messages.append({"role": "user", "content": prompt})
+
+        tools = catalog.get_tools(url)
+        enabled_toolgroups = {t["toolgroup_id"] for t in tools if t.get("toolgroup_id")}
+        selected = select_tools(tools, enabled_toolgroups, prompt)
+        openai_tools = catalog.get_openai_tools(url, selected) if selected else None
+        api_messages = build_api_messages(SYSTEM_PROMPT, self.messages)
+
+        # The session thread stands in for the turn worker pool; the turn
+        # records the same transcript entries app.py stores
+        session_store = self.pipeline["session_store"]
+        turn = ChatTurn(record=lambda t: turn_transcript(t, session_store, str(self.index)))
+        outcome = run_turn(
+            turn,
+            client=self.pipeline["client"],
+            base_url=url,
+            model_id=self.pipeline["model_id"],
+            api_messages=api_messages,
+            tools=openai_tools,
+            execute_tool=self.execute_tool({t["name"]: t.get("toolgroup_id", "") for t in tools}),
+            stream=self.pipeline["stream"],
+        )
+        if "error" in outcome:
+            self.errors += 1
+        self.messages.extend(turn.settle())
+        session_store.bound(self.messages)
+        self.latencies.append(time.monotonic() - started)
+
+    def memory_bytes(self) -> int:
+        """Serialized transcript plus the results stored aside for it."""
+        usage = self.pipeline["session_store"].usage(str(self.index), self.messages)
+        return len(pickle.dumps(self.messages)) + usage["compressed"] + usage["spilled"]
+
+    def run(self, turns: int, think_time: float):
+        for i in range(turns):
+            self.chat(PROMPTS[(self.index + i) % len(PROMPTS)])
+            if think_time:
+                time.sleep(think_time)
+        return self
+
+
+def max_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_benchmark(args) -> Dict:
+    stub = None
+    url = args.url
+    if not url:
+        stub, stub_config, url = start_stub(args)
+
+    metrics = MetricsRegistry()
+    client = LlamaStackClient(session=create_session(pool_size=max(10, args.sessions)), metrics=metrics)
+    catalog = CatalogCache(client)
+    models = catalog.get_models(url)
+    pipeline = {
+        "url": url,
+        "client": client,
+        "catalog": catalog,
+        "tool_cache": ToolResultCache(ttls={} if args.no_tool_cache else None),
+        "session_store": SessionStore(),
+        "model_id": args.model_id or (models[0]["identifier"] if models else ""),
+        "stream": not args.no_stream,
+    }
+
+    rss_before = max_rss_mb()
+    sessions = [SimulatedSession(i, pipeline) for i in range(args.sessions)]
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.sessions, thread_name_prefix="bench-session") as executor:
+        list(executor.map(lambda session: session.run(args.turns, args.think_time), sessions))
+    wall = time.monotonic() - started
+
+    latencies = [latency for session in sessions for latency in session.latencies]
+    transcript_bytes = [session.memory_bytes() for session in sessions]
+    ttft = metrics.summary("llamastack_ttft_seconds")
+    tool = metrics.summary("llamastack_tool_seconds")
+    report = {
+        "url": url,
+        "sessions": args.sessions,
+        "turns": len(latencies),
+        "errors": sum(session.errors for session in sessions),
+        "wall_seconds": round(wall, 3),
+        "turns_per_second": round(len(latencies) / wall, 2) if wall else 0.0,
+        "turn_p50": round(percentile(latencies, 0.5), 3),
+        "turn_p95": round(percentile(latencies, 0.95), 3),
+        "turn_p99": round(percentile(latencies, 0.99), 3),
+        "ttft_p95": round(ttft.get("p95", 0.0), 3),
+        "tool_p95": round(tool.get("p95", 0.0), 3),
+        "tool_cache": pipeline["tool_cache"].stats()["hit_rate"],
+        "transcript_kb_per_session": round(sum(transcript_bytes) / len(transcript_bytes) / 1024, 1),
+        "rss_growth_mb_per_session": round((max_rss_mb() - rss_before) / args.sessions, 3),
+        "llamastack_requests": stub_config.requests if stub else None,
+    }
+    if stub:
+        stub.shutdown()
+    return report
+
+
+def print_report(report: Dict):
+    print("📊 Frontend chat pipeline benchmark")
+    print(f"   Target:        {report['url']}")
+    print(f"   Sessions:      {report['sessions']} ({report['turns']} turns, {report['errors']} errors)")
+    print(f"   Throughput:    {report['turns_per_second']} turns/s over {report['wall_seconds']}s")
+    print(f"   Turn latency:  p50 {report['turn_p50']}s · p95 {report['turn_p95']}s · p99 {report['turn_p99']}s")
+    print(f"   TTFT p95:      {report['ttft_p95']}s · tool p95 {report['tool_p95']}s")
+    print(f"   Tool cache:    {report['tool_cache']:.0%} hit rate")
+    print(f"   Memory:        {report['transcript_kb_per_session']} KiB transcript · "
+          f"{report['rss_growth_mb_per_session']} MiB RSS growth per session")
+    if report["llamastack_requests"] is not None:
+        print(f"   Stub requests: {report['llamastack_requests']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20, help="Concurrent simulated sessions")
+    parser.add_argument("--turns", type=int, default=5, help="Turns per session")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Seconds a session waits between turns")
+    parser.add_argument("--url", default="", help="Benchmark a running LlamaStack instead of the built-in stub")
+    parser.add_argument("--model-id", default="", help="Model to use (default: first LLM listed)")
+    parser.add_argument("--no-stream", action="store_true", help="Use blocking completions")
+    parser.add_argument("--no-tool-cache", action="store_true", help="Disable the tool result cache")
+    parser.add_argument("--max-p95", type=float, default=0.0, help="Fail if p95 turn latency exceeds this (seconds)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    if args.max_p95 and report["turn_p95"] > args.max_p95:
+        print(f"❌ p95 turn latency {report['turn_p95']}s exceeds {args.max_p95}s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
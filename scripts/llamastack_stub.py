@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+LlamaStack stand-in server for benchmarks and local UI work.
+
+Serves just enough of the LlamaStack API for the frontend chat pipeline:
+/v1/health, /v1/models, /v1/tools, the OpenAI-compatible chat completions
+endpoint (blocking and SSE streaming) and /v1/tool-runtime/invoke.
+
+A completion whose conversation has no tool results since the last user
+message asks for tool calls; otherwise it answers with text. Latency,
+streaming speed and payload sizes are configurable.
+
+Usage:
+    python scripts/llamastack_stub.py --port 8399 --ttft 0.3 --token-delay 0.02 --tool-latency 0.5
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MODELS = [
+    {"identifier": "stub-llm", "model_type": "llm"},
+    {"identifier": "stub-embedding", "model_type": "embedding"},
+]
+
+
+def tool(name, toolgroup_id, description, **properties):
+    return {
+        "name": name,
+        "toolgroup_id": toolgroup_id,
+        "description": description,
+        "parameters": {
+            "type": "object",
+            "properties": {key: {"type": kind} for key, kind in properties.items()},
+            "required": [],
+        },
+    }
+
+
+TOOLS = [
+    tool("get_current_weather", "mcp::weather-data", "Get the latest weather observation for a station",
+         station="string"),
+    tool("search_weather", "mcp::weather-data", "Search weather observations by location, condition or time range",
+         location="string", condition="string", hours_back="integer"),
+    tool("list_stations", "mcp::weather-data", "List all weather stations"),
+    tool("get_employee_info", "mcp::hr-tools", "Get employee details by employee ID", employee_id="string"),
+    tool("get_vacation_balance", "mcp::hr-tools", "Get the vacation balance of an employee", employee_id="string"),
+]
+
+STATIONS = ["VIDP", "KJFK", "EGLL", "RJTT", "YSSY", "LFPG", "EDDF", "OMDB"]
+
+WORDS = ("the current conditions look clear with light winds and mild temperatures "
+         "across the region while humidity stays moderate through the evening").split()
+
+
+class StubConfig:
+    """Behaviour knobs shared by all request handlers."""
+
+    def __init__(self, args):
+        self.ttft = args.ttft
+        self.token_delay = args.token_delay
+        self.answer_tokens = args.answer_tokens
+        self.tool_calls = args.tool_calls
+        self.tool_latency = args.tool_latency
+        self.tool_result_bytes = args.tool_result_bytes
+        self.catalog_latency = args.catalog_latency
+        self.jitter = args.jitter
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            time.sleep(seconds * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+
+def wants_tools(body: dict) -> bool:
+    """Ask for tools unless tool results already follow the last user message."""
+    if not body.get("tools") or body.get("tool_choice") == "none":
+        return False
+    for message in reversed(body.get("messages", [])):
+        if message.get("role") == "tool":
+            return False
+        if message.get("role") == "user":
+            return True
+    return True
+
+
+def make_tool_calls(body: dict, count: int) -> list:
+    offered = [t["function"]["name"] for t in body.get("tools", [])] or ["get_current_weather"]
+    calls = []
+    for i in range(count):
+        name = offered[i % len(offered)]
+        args = {"station": random.choice(STATIONS)} if name == "get_current_weather" else {}
+        calls.append({
+            "id": f"call_{i}_{random.randrange(1 << 30)}",
+            "type": "function",
+            "function": {"name": name, "arguments": json.dumps(args)},
+        })
+    return calls
+
+
+def usage(body: dict, completion_tokens: int) -> dict:
+    prompt_tokens = len(json.dumps(body.get("messages", []))) // 4
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens}
+
+
+def make_handler(config: StubConfig):
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _json(self, obj, code=200):
+            body = json.dumps(obj).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _chunk(self, data):
+            payload = f"data: {data if isinstance(data, str) else json.dumps(data)}\n\n".encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(payload), payload))
+            self.wfile.flush()
+
+        def do_GET(self):
+            config.count()
+            if self.path == "/v1/health":
+                return self._json({"status": "OK"})
+            if self.path == "/v1/models":
+                config.sleep(config.catalog_latency)
+                return self._json({"data": MODELS})
+            if self.path == "/v1/tools":
+                config.sleep(config.catalog_latency)
+                return self._json({"data": TOOLS})
+            self._json({"detail": "not found"}, 404)
+
+        def do_POST(self):
+            config.count()
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if self.path == "/v1/openai/v1/chat/completions":
+                return self._chat(body)
+            if self.path == "/v1/tool-runtime/invoke":
+                config.sleep(config.tool_latency)
+                text = f"{body.get('tool_name')} {json.dumps(body.get('kwargs', {}))}: "
+                text += ("x" * max(0, config.tool_result_bytes - len(text)))
+                return self._json({"content": [{"type": "text", "text": text}]})
+            self._json({"detail": "not found"}, 404)
+
+        def _chat(self, body):
+            tool_calls = make_tool_calls(body, config.tool_calls) if wants_tools(body) else None
+            words = [random.choice(WORDS) + " " for _ in range(config.answer_tokens)]
+            config.sleep(config.ttft)
+
+            if not body.get("stream"):
+                config.sleep(config.token_delay * (0 if tool_calls else len(words)))
+                message = {"role": "assistant", "content": None if tool_calls else "".join(words)}
+                if tool_calls:
+                    message["tool_calls"] = tool_calls
+                return self._json({
+                    "choices": [{"index": 0, "message": message,
+                                 "finish_reason": "tool_calls" if tool_calls else "stop"}],
+                    "usage": usage(body, len(tool_calls or words)),
+                })
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            if tool_calls:
+                for index, call in enumerate(tool_calls):
+                    self._chunk({"choices": [{"index": 0, "delta": {"tool_calls": [dict(call, index=index)]}}]})
+                self._chunk({"choices": [{"index": 0, "delta": {}, "finish_reason": "tool_calls"}]})
+            else:
+                for word in words:
+                    self._chunk({"choices": [{"index": 0, "delta": {"content": word}}]})
+                    config.sleep(config.token_delay)
+                self._chunk({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+            if (body.get("stream_options") or {}).get("include_usage"):
+                self._chunk({"choices": [], "usage": usage(body, len(tool_calls or words))})
+            self._chunk("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+
+    return StubHandler
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping idle keep-alive connections is expected under load
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--ttft", type=float, default=0.2, help="Seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="Seconds between streamed tokens")
+    parser.add_argument("--answer-tokens", type=int, default=40, help="Tokens in a final answer")
+    parser.add_argument("--tool-calls", type=int, default=1, help="Tool calls requested per tool round")
+    parser.add_argument("--tool-latency", type=float, default=0.3, help="Seconds per tool invocation")
+    parser.add_argument("--tool-result-bytes", type=int, default=2000, help="Size of each tool result")
+    parser.add_argument("--catalog-latency", type=float, default=0.05, help="Seconds per /v1/models or /v1/tools")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Random +/- fraction applied to every delay")
+
+
+def start_stub(args, host: str = "127.0.0.1", port: int = 0):
+    """Start the stub on a daemon thread; returns (server, config, base_url)."""
+    config = StubConfig(args)
+    server = StubServer((host, port), make_handler(config))
+    threading.Thread(target=server.serve_forever, name="llamastack-stub", daemon=True).start()
+    return server, config, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8321)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    config = StubConfig(args)
+    server = StubServer((args.host, args.port), make_handler(config))
+    print(f"🦙 LlamaStack stub listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
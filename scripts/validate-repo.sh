@@ -62,6 +62,21 @@ check_file "docs/PROJECT-LOG.md"
 echo ""
 echo "📄 Checking frontend files..."
 check_file "manifests/frontend/app.py"
+check_file "manifests/frontend/llamastack_client.py"
+check_file "manifests/frontend/catalog.py"
+check_file "manifests/frontend/agent.py"
+check_file "manifests/frontend/history.py"
+check_file "manifests/frontend/tool_cache.py"
+check_file "manifests/frontend/turns.py"
+check_file "manifests/frontend/metrics.py"
+check_file "manifests/frontend/transcript.py"
+check_file "manifests/frontend/poller.py"
+check_file "manifests/frontend/session_store.py"
+check_file "manifests/frontend/singleflight.py"
+check_file "manifests/frontend/prefetch.py"
+check_file "manifests/frontend/endpoints.py"
+check_file "manifests/frontend/conversations.py"
+check_file "manifests/frontend/static/app.css"
 check_file "manifests/frontend/deployment.yaml"
 
 echo ""
@@ -87,15 +102,17 @@ check_file "mcp/Dockerfile.openshift"
 echo ""
 echo "📜 Checking scripts..."
 check_file "scripts/deploy-demo.sh"
+check_file "scripts/bench_frontend.py"
+check_file "scripts/llamastack_stub.py"
 
 echo ""
 echo "🔍 Validating Dockerfile references..."
 
 # Check root Dockerfile
-if grep -q "COPY manifests/frontend/app.py" Dockerfile; then
-    echo "   ✅ Dockerfile references correct app.py path"
+if grep -q "COPY manifests/frontend/\*.py" Dockerfile; then
+    echo "   ✅ Dockerfile references correct frontend module path"
 else
-    echo "   ❌ Dockerfile has incorrect app.py path"
+    echo "   ❌ Dockerfile has incorrect frontend module path"
     ERRORS=$((ERRORS + 1))
 fi
 